@@ -0,0 +1,182 @@
+"""
+ShieldCraft AI - Chunking Throughput and Memory Benchmark
+
+Chunks a synthetic log corpus with one strategy and reports throughput and
+the resident memory held by the resulting chunks, once as offset-only
+ChunkSpans and once exported to pydantic Chunks (the previous
+representation). Strategies with a planner are also measured as offset
+arrays alone (ChunkPlan). Each mode runs in a fresh process so RSS readings
+do not carry over between them.
+
+The default corpus repeats the same paragraphs every 1500 lines, as real logs
+do; --unique numbers every line instead. ordered_offsets checks that chunk
+starts strictly increase, which fails if repeated parts share offsets.
+
+--batch-docs N instead splits the corpus into N documents and times
+Chunker.chunk_batch in each execution mode, next to the mode auto picks.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import time
+from datetime import datetime
+import numpy as np
+from ai_core.chunking.chunk import (
+    Chunker,
+    FixedChunkingStrategy,
+    SlidingWindowChunkingStrategy,
+    SentenceChunkingStrategy,
+    SemanticChunkingStrategy,
+    CustomHeuristicChunkingStrategy,
+    export_chunks,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+LOG_LINES = [
+    "{seq}2026-10-18T12:00:{s:02d}Z sshd[4242]: Failed password for root from 203.0.113.{n} port 52311 ssh2.\n",
+    "2026-10-18T12:00:{s:02d}Z kernel: [UFW BLOCK] IN=eth0 SRC=198.51.100.{n} DST=10.0.0.5 PROTO=TCP DPT=3389.\n",
+    "2026-10-18T12:00:{s:02d}Z cloudtrail: ConsoleLogin failure for svc-deploy-{n} without MFA!\n\n",
+]
+
+STRATEGIES = {
+    "fixed": (FixedChunkingStrategy, dict(chunk_size=256, overlap=16, min_length=64)),
+    "sliding_window": (
+        SlidingWindowChunkingStrategy,
+        dict(window_size=256, step_size=128, min_length=64),
+    ),
+    "sentence": (SentenceChunkingStrategy, dict(min_length=16)),
+    "semantic": (SemanticChunkingStrategy, dict(min_length=16)),
+    "custom_heuristic": (
+        CustomHeuristicChunkingStrategy,
+        dict(delimiter="\n\n", min_length=16),
+    ),
+}
+
+
+def log_corpus(size_mb, unique=False):
+    lines = []
+    total = 0
+    i = 0
+    while total < size_mb * 2**20:
+        line = LOG_LINES[i % len(LOG_LINES)].format(
+            s=i % 60, n=i % 250, seq=f"#{i} " if unique else ""
+        )
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return "".join(lines)
+
+
+def rss_bytes():
+    """Current resident set size (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _run_mode(strategy, size_mb, mode, unique):
+    text = log_corpus(size_mb, unique)
+    strategy_cls, params = STRATEGIES[strategy]
+    before = rss_bytes()
+    start = time.perf_counter()
+    if mode == "offsets":
+        chunks = strategy_cls.plan(text, "corpus", **params)
+    else:
+        chunks = strategy_cls.chunk(text, doc_id="corpus", **params)
+    if mode == "models":
+        chunks = export_chunks(chunks)
+    seconds = time.perf_counter() - start
+    if mode == "offsets":
+        starts = chunks.starts
+    else:
+        starts = np.array([c.start_offset for c in chunks], dtype=np.int64)
+    return {
+        "ordered_offsets": bool(np.all(np.diff(starts) > 0)),
+        "chunks": len(chunks),
+        "seconds": seconds,
+        "mb_per_sec": len(text) / 2**20 / seconds,
+        "chunks_per_sec": len(chunks) / seconds,
+        "rss_delta_mb": (rss_bytes() - before) / 2**20,
+    }
+
+
+def run_chunking_benchmark(strategy="fixed", size_mb=64, unique=False):
+    """Offsets, spans and pydantic models for one strategy, each in its own process."""
+    ctx = multiprocessing.get_context("spawn")
+    report = {"strategy": strategy, "corpus_mb": size_mb, "unique": unique}
+    modes = ["spans", "models"]
+    if hasattr(STRATEGIES[strategy][0], "plan"):
+        modes.insert(0, "offsets")
+    for mode in modes:
+        with ctx.Pool(1) as pool:
+            report[mode] = pool.apply(_run_mode, (strategy, size_mb, mode, unique))
+        logging.info(
+            f"{strategy} | {mode}: {report[mode]['mb_per_sec']:.1f} MB/s | {report[mode]['chunks']} chunks | RSS +{report[mode]['rss_delta_mb']:.0f}MB | Ordered: {report[mode]['ordered_offsets']}"
+        )
+    return report
+
+
+def run_batch_benchmark(strategy="semantic", size_mb=64, docs=64, max_workers=4):
+    """chunk_batch seconds per execution mode for the corpus split into docs."""
+    text = log_corpus(size_mb, unique=True)
+    step = -(-len(text) // docs)
+    texts = [text[i : i + step] for i in range(0, len(text), step)]
+    chunker = Chunker(export_models=False)
+    chunker.strategy_class, chunker.params = STRATEGIES[strategy]
+    report = {
+        "strategy": strategy,
+        "corpus_mb": size_mb,
+        "docs": len(texts),
+        "auto_mode": chunker.select_mode([len(t) for t in texts], max_workers),
+    }
+    try:
+        # Start the pool outside the timed runs.
+        chunker.plan_batch(texts[:2], max_workers=max_workers, mode="process")
+        for mode in ("serial", "thread", "process"):
+            start = time.perf_counter()
+            chunks = chunker.chunk_batch(texts, max_workers=max_workers, mode=mode)
+            report[mode] = {
+                "seconds": time.perf_counter() - start,
+                "chunks": sum(len(c) for c in chunks),
+            }
+            logging.info(
+                f"{strategy} batch | {mode}: {report[mode]['seconds']:.2f}s | {report[mode]['chunks']} chunks"
+            )
+    finally:
+        chunker.close()
+    logging.info(f"Auto mode for this batch: {report['auto_mode']}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Chunking throughput and RSS: offsets, ChunkSpans, pydantic Chunks."
+    )
+    parser.add_argument(
+        "--strategy", type=str, default="fixed", choices=sorted(STRATEGIES)
+    )
+    parser.add_argument("--size-mb", type=float, default=64)
+    parser.add_argument(
+        "--unique", action="store_true", help="Number every line (no repeats)."
+    )
+    parser.add_argument("--batch-docs", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", type=str, default="chunking_results.json")
+    args = parser.parse_args()
+
+    if args.batch_docs:
+        report = run_batch_benchmark(
+            args.strategy, args.size_mb, args.batch_docs, args.workers
+        )
+    else:
+        report = run_chunking_benchmark(args.strategy, args.size_mb, args.unique)
+    output = {"timestamp": datetime.utcnow().isoformat(), "results": report}
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    logging.info(f"Chunking benchmark complete. Results saved to {args.output}")
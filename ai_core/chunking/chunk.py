@@ -1,9 +1,31 @@
 """
 Chunking module for text processing.
+
+Strategies return ChunkSpan objects: offsets into the source text, which all
+chunks of a document share, rather than a copy of each chunk's text. The text
+is sliced out only when read. The pydantic Chunk is the export format
+(ChunkSpan.to_model(), export_chunks(), or export_models in config).
+
+Fixed and sliding-window boundaries are pure arithmetic, so those strategies
+also have plan(): every (start, end) for a document or batch as NumPy arrays
+(ChunkPlan), with ChunkSpans created only when asked for. Delimiter-based
+strategies (semantic, sentence, custom_heuristic) plan in one finditer pass
+over each text (split_offsets), so offsets are linear-time and stay correct
+when parts repeat.
+
+Chunker.chunk_batch picks serial, thread or process execution per batch
+(batch_mode). Process workers read documents from one shared-memory segment
+and send back offset arrays only. Chunker.chunk_stream chunks files too large
+to hold in memory (ai_core.chunking.streaming).
 """
 
+import os
+import re
+import sys
 from typing import List, Dict, Any
 from abc import ABC, abstractmethod
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
 from pydantic import BaseModel
 from infra.utils.config_loader import get_config_loader
 
@@ -23,9 +45,272 @@ class Chunk(BaseModel):
         return self.__str__()
 
 
+class ChunkSpan:
+    """
+    Compact chunk: the shared source plus [start_offset, end_offset). text is
+    materialized on each read and not kept. A bytes-like source (memoryview,
+    mmap) is indexed by byte offsets and decoded as UTF-8. Chunks whose text
+    is not a slice of the source (token-based) carry it in text instead.
+    """
+
+    __slots__ = (
+        "source",
+        "doc_id",
+        "chunk_index",
+        "start_offset",
+        "end_offset",
+        "_text",
+        "_metadata",
+    )
+
+    def __init__(
+        self,
+        source,
+        doc_id="",
+        chunk_index=0,
+        start_offset=0,
+        end_offset=0,
+        text=None,
+        metadata=None,
+    ):
+        self.source = source
+        self.doc_id = doc_id
+        self.chunk_index = chunk_index
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self._text = text
+        self._metadata = metadata
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        piece = self.source[self.start_offset : self.end_offset]
+        if isinstance(piece, str):
+            return piece
+        return bytes(piece).decode("utf-8", errors="replace")
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        # Most chunks never get metadata, so the dict is created on first use.
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value):
+        self._metadata = value
+
+    def to_model(self) -> Chunk:
+        return Chunk(
+            text=self.text,
+            doc_id=self.doc_id,
+            chunk_index=self.chunk_index,
+            start_offset=self.start_offset,
+            end_offset=self.end_offset,
+            metadata=dict(self._metadata or {}),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, ChunkSpan):
+            return NotImplemented
+        return (
+            self.doc_id == other.doc_id
+            and self.chunk_index == other.chunk_index
+            and self.start_offset == other.start_offset
+            and self.end_offset == other.end_offset
+            and self.text == other.text
+            and (self._metadata or {}) == (other._metadata or {})
+        )
+
+    __hash__ = None
+
+    def __str__(self):
+        return f"ChunkSpan(doc_id={self.doc_id}, idx={self.chunk_index}, start={self.start_offset}, end={self.end_offset}, text='{self.text[:30]}...')"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def export_chunks(chunks) -> List[Chunk]:
+    """Pydantic Chunk copies of ChunkSpans (Chunks pass through)."""
+    return [c.to_model() if isinstance(c, ChunkSpan) else c for c in chunks]
+
+
+class ChunkPlan:
+    """
+    Chunk offsets for a batch of documents as flat arrays: doc_index, starts
+    and ends (int64), grouped by document in order. bounds[i]:bounds[i + 1]
+    is document i's range. A chunk's index within its document is its
+    position in that range, unless indexes gives it explicitly.
+    """
+
+    def __init__(self, sources, doc_ids, doc_index, starts, ends, indexes=None):
+        self.sources = sources
+        self.doc_ids = doc_ids
+        self.doc_index = doc_index
+        self.starts = starts
+        self.ends = ends
+        self.indexes = indexes
+        self.bounds = np.searchsorted(doc_index, np.arange(len(sources) + 1))
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def merge(cls, sources, doc_ids, parts):
+        """Plan from (doc_index, starts, ends, indexes) array tuples in document order."""
+        columns = list(zip(*parts)) or [[np.zeros(0, dtype=np.int64)]] * 4
+        return cls(sources, doc_ids, *(np.concatenate(column) for column in columns))
+
+    def arrays(self, first_doc: int = 0):
+        """(doc_index + first_doc, starts, ends, indexes), indexes made explicit."""
+        indexes = self.indexes
+        if indexes is None:
+            indexes = np.arange(len(self.starts)) - self.bounds[self.doc_index]
+        return self.doc_index + first_doc, self.starts, self.ends, indexes
+
+    def offsets(self, doc: int):
+        """(starts, ends) arrays of document doc."""
+        lo, hi = self.bounds[doc], self.bounds[doc + 1]
+        return self.starts[lo:hi], self.ends[lo:hi]
+
+    def chunks(self, doc: int = None):
+        """ChunkSpans of document doc, or a list per document if doc is None."""
+        if doc is None:
+            return [self.chunks(i) for i in range(len(self.sources))]
+        source, doc_id = self.sources[doc], self.doc_ids[doc]
+        starts, ends = self.offsets(doc)
+        if self.indexes is None:
+            indexes = range(len(starts))
+        else:
+            indexes = self.indexes[self.bounds[doc] : self.bounds[doc + 1]].tolist()
+        return [
+            ChunkSpan(source, doc_id, idx, start, end)
+            for idx, start, end in zip(indexes, starts.tolist(), ends.tolist())
+        ]
+
+
+def plan_windows(lengths, size: int, step: int, counts, min_length: int = 0):
+    """
+    (doc_index, starts, ends) for windows of size starting every step
+    characters, counts[i] windows in document i of lengths[i] characters,
+    ends clipped to the document. Windows shorter than min_length are dropped.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    doc_index = np.repeat(np.arange(len(lengths), dtype=np.int64), counts)
+    first = np.cumsum(counts) - counts
+    starts = (np.arange(counts.sum(), dtype=np.int64) - first[doc_index]) * step
+    ends = np.minimum(starts + size, lengths[doc_index])
+    if min_length > 0:
+        keep = ends - starts >= min_length
+        doc_index, starts, ends = doc_index[keep], starts[keep], ends[keep]
+    return doc_index, starts, ends
+
+
+def _plan_inputs(texts, doc_ids):
+    if isinstance(texts, str):
+        texts, doc_ids = [texts], [doc_ids or ""]
+    if doc_ids is None:
+        doc_ids = ["" for _ in texts]
+    if len(doc_ids) != len(texts):
+        raise ValueError("Length of doc_ids must match texts.")
+    for text in texts:
+        if not isinstance(text, str) or not text:
+            raise ValueError("Input text must be a non-empty string.")
+    return list(texts), list(doc_ids), np.fromiter(map(len, texts), np.int64)
+
+
+_PARAGRAPH = re.compile("\n\n")
+_SENTENCE_END = re.compile(r"[.!?](\s+)")
+# Group 1 spans the part without surrounding whitespace (str.strip() bounds).
+_STRIPPED = re.compile(r"\s*((?:.*\S)?)", re.DOTALL)
+
+
+def strip_offsets(text: str, start: int, end: int):
+    """Bounds of text[start:end].strip(); empty (end, end) if it is all whitespace."""
+    return _STRIPPED.match(text, start, end).span(1)
+
+
+def delimiter_spans(text: str, pattern, end: int = None):
+    """
+    (n, 2) int64 array of the delimiter matches of pattern in text[:end]. If
+    pattern has a group, group 1 is the delimiter and the rest of the match
+    is context that stays in the parts (cheaper than a lookbehind).
+    """
+    end = len(text) if end is None else end
+    group = 1 if pattern.groups else 0
+    return np.array(
+        [m.span(group) for m in pattern.finditer(text, 0, end)], dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def split_parts(
+    text: str, pattern=None, end: int = None, strip: bool = False, spans=None
+):
+    """
+    (starts, ends, blank) arrays of the parts of text[:end] between matches
+    of pattern (the parts re.split would return), found in one finditer pass
+    without copying them, or between precomputed delimiter spans. blank
+    marks all-whitespace parts; with strip, the other parts exclude their
+    surrounding whitespace.
+    """
+    end = len(text) if end is None else end
+    if spans is None:
+        spans = delimiter_spans(text, pattern, end)
+    starts = np.concatenate(([0], spans[:, 1]))
+    ends = np.concatenate((spans[:, 0], [end]))
+    # Most parts have no surrounding whitespace; only the others need a strip.
+    edges = [
+        i
+        for i, (start, stop) in enumerate(zip(starts.tolist(), ends.tolist()))
+        if start == stop or text[start].isspace() or text[stop - 1].isspace()
+    ]
+    blank = np.zeros(len(starts), dtype=bool)
+    for i in edges:
+        inner_start, inner_end = strip_offsets(text, starts[i], ends[i])
+        if inner_start == inner_end:
+            blank[i] = True
+        elif strip:
+            starts[i], ends[i] = inner_start, inner_end
+    return starts, ends, blank
+
+
+def split_offsets(text: str, pattern, min_length: int = 0, strip: bool = False):
+    """
+    (starts, ends, indexes) arrays of text's chunks: the non-blank parts
+    from split_parts, numbered in order, then filtered by min_length.
+    """
+    starts, ends, blank = split_parts(text, pattern, strip=strip)
+    indexes = np.cumsum(~blank) - 1
+    keep = ~blank & (ends - starts >= min_length)
+    return starts[keep], ends[keep], indexes[keep]
+
+
+def plan_delimited(texts, doc_ids, pattern, min_length: int = 0, strip: bool = False):
+    """
+    ChunkPlan of the parts between matches of pattern. All-whitespace parts
+    are dropped; each other part takes the next chunk_index, and is then
+    kept if at least min_length long. With strip, chunks exclude the part's
+    surrounding whitespace.
+    """
+    texts, doc_ids, _ = _plan_inputs(texts, doc_ids)
+    parts = [split_offsets(text, pattern, min_length, strip) for text in texts]
+    counts = [len(starts) for starts, _, _ in parts]
+    return ChunkPlan(
+        texts,
+        doc_ids,
+        np.repeat(np.arange(len(texts), dtype=np.int64), counts),
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        np.concatenate([p[2] for p in parts]),
+    )
+
+
 class ChunkingStrategy(ABC):
     @abstractmethod
-    def chunk(self, text: str, doc_id: str = "") -> List[Chunk]:
+    def chunk(self, text: str, doc_id: str = "") -> List[ChunkSpan]:
         pass
 
 
@@ -37,53 +322,42 @@ class FixedChunkingStrategy(ChunkingStrategy):
         chunk_size: int = 512,
         overlap: int = 0,
         min_length: int = 0,
-    ) -> List[Chunk]:
-        if not isinstance(text, str) or not text:
-            raise ValueError("Input text must be a non-empty string.")
-        chunks = []
-        start = 0
-        idx = 0
-        while start < len(text):
-            end = min(start + chunk_size, len(text))
-            chunk_text = text[start:end]
-            if len(chunk_text) >= min_length:
-                chunks.append(
-                    Chunk(
-                        text=chunk_text,
-                        doc_id=doc_id,
-                        chunk_index=idx,
-                        start_offset=start,
-                        end_offset=end,
-                    )
-                )
-                idx += 1
-            start += chunk_size - overlap if chunk_size > overlap else chunk_size
-        return chunks
+    ) -> List[ChunkSpan]:
+        return FixedChunkingStrategy.plan(
+            text, doc_id, chunk_size, overlap, min_length
+        ).chunks(0)
+
+    @staticmethod
+    def plan(
+        texts,
+        doc_ids=None,
+        chunk_size: int = 512,
+        overlap: int = 0,
+        min_length: int = 0,
+    ) -> ChunkPlan:
+        """Offsets of chunk() for one text or a list of texts."""
+        texts, doc_ids, lengths = _plan_inputs(texts, doc_ids)
+        step = chunk_size - overlap if chunk_size > overlap else chunk_size
+        if step <= 0:
+            raise ValueError("chunk_size must be positive.")
+        counts = -(-lengths // step)
+        return ChunkPlan(
+            texts,
+            doc_ids,
+            *plan_windows(lengths, chunk_size, step, counts, min_length),
+        )
 
 
 # 2. Semantic Chunking: split by paragraphs (double newline) as a simple semantic proxy
 class SemanticChunkingStrategy(ChunkingStrategy):
     @staticmethod
-    def chunk(text: str, doc_id: str = "", min_length: int = 0) -> List[Chunk]:
-        if not isinstance(text, str) or not text:
-            raise ValueError("Input text must be a non-empty string.")
-        paragraphs = [p for p in text.split("\n\n") if p.strip()]
-        chunks = []
-        for idx, para in enumerate(paragraphs):
-            if len(para) < min_length:
-                continue
-            start_offset = text.find(para)
-            end_offset = start_offset + len(para)
-            chunks.append(
-                Chunk(
-                    text=para,
-                    doc_id=doc_id,
-                    chunk_index=idx,
-                    start_offset=start_offset,
-                    end_offset=end_offset,
-                )
-            )
-        return chunks
+    def chunk(text: str, doc_id: str = "", min_length: int = 0) -> List[ChunkSpan]:
+        return SemanticChunkingStrategy.plan(text, doc_id, min_length).chunks(0)
+
+    @staticmethod
+    def plan(texts, doc_ids=None, min_length: int = 0) -> ChunkPlan:
+        """Offsets of chunk() for one text or a list of texts."""
+        return plan_delimited(texts, doc_ids, _PARAGRAPH, min_length)
 
 
 # 3. Recursive Chunking: try semantic, then fixed if too large
@@ -91,20 +365,21 @@ class RecursiveChunkingStrategy(ChunkingStrategy):
     @staticmethod
     def chunk(
         text: str, doc_id: str = "", max_chunk_size: int = 512, min_length: int = 0
-    ) -> List[Chunk]:
+    ) -> List[ChunkSpan]:
         semantic = SemanticChunkingStrategy()
         sem_chunks = semantic.chunk(text, doc_id)
         final_chunks = []
         idx = 0
         for chunk in sem_chunks:
-            if len(chunk.text) > max_chunk_size:
-                sub_chunks = FixedChunkingStrategy.chunk(
-                    chunk.text, doc_id, max_chunk_size, 0, min_length
-                )
-                for sub in sub_chunks:
-                    sub.chunk_index = idx
-                    final_chunks.append(sub)
-                    idx += 1
+            if chunk.end_offset - chunk.start_offset > max_chunk_size:
+                # Split in place so sub-chunk offsets stay relative to text.
+                for start in range(
+                    chunk.start_offset, chunk.end_offset, max_chunk_size
+                ):
+                    end = min(start + max_chunk_size, chunk.end_offset)
+                    if end - start >= min_length:
+                        final_chunks.append(ChunkSpan(text, doc_id, idx, start, end))
+                        idx += 1
             else:
                 chunk.chunk_index = idx
                 final_chunks.append(chunk)
@@ -113,34 +388,15 @@ class RecursiveChunkingStrategy(ChunkingStrategy):
 
 
 # 4. Sentence Chunking: split by period, exclamation, or question mark
-import re
-
-
 class SentenceChunkingStrategy(ChunkingStrategy):
     @staticmethod
-    def chunk(text: str, doc_id: str = "", min_length: int = 0) -> List[Chunk]:
-        if not isinstance(text, str) or not text:
-            raise ValueError("Input text must be a non-empty string.")
-        sentences = re.split(r"(?<=[.!?])\s+", text)
-        chunks = []
-        offset = 0
-        for idx, sent in enumerate(sentences):
-            sent = sent.strip()
-            if not sent or len(sent) < min_length:
-                continue
-            start_offset = text.find(sent, offset)
-            end_offset = start_offset + len(sent)
-            offset = end_offset
-            chunks.append(
-                Chunk(
-                    text=sent,
-                    doc_id=doc_id,
-                    chunk_index=idx,
-                    start_offset=start_offset,
-                    end_offset=end_offset,
-                )
-            )
-        return chunks
+    def chunk(text: str, doc_id: str = "", min_length: int = 0) -> List[ChunkSpan]:
+        return SentenceChunkingStrategy.plan(text, doc_id, min_length).chunks(0)
+
+    @staticmethod
+    def plan(texts, doc_ids=None, min_length: int = 0) -> ChunkPlan:
+        """Offsets of chunk() for one text or a list of texts."""
+        return plan_delimited(texts, doc_ids, _SENTENCE_END, min_length, strip=True)
 
 
 # 5. Token-Based Chunking: requires a tokenizer callable
@@ -153,33 +409,50 @@ class TokenBasedChunkingStrategy(ChunkingStrategy):
         chunk_size: int = 512,
         overlap: int = 0,
         min_length: int = 0,
-    ) -> List[Chunk]:
+    ) -> List[ChunkSpan]:
+        # A string names a shared TokenizerService (HF model name, or
+        # "embedding" for the embedding model's tokenizer).
+        if isinstance(tokenizer, str):
+            from ai_core.tokenizer_service import get_tokenizer_service
+
+            tokenizer = get_tokenizer_service(tokenizer)
         if not callable(tokenizer):
             raise ValueError("Tokenizer must be callable.")
-        tokens = tokenizer(text)
+        # A TokenizerService gives character offsets, so chunk text is cut
+        # from the source and the sliced ids are valid for it as they are.
+        offsets = None
+        if hasattr(tokenizer, "encode_with_offsets"):
+            tokens, offsets = tokenizer.encode_with_offsets(text)
+        else:
+            tokens = tokenizer(text)
         chunks = []
+        remembered_texts, remembered_ids = [], []
         start = 0
         idx = 0
         while start < len(tokens):
             end = min(start + chunk_size, len(tokens))
             chunk_tokens = tokens[start:end]
-            chunk_text = (
-                tokenizer.decode(chunk_tokens)
-                if hasattr(tokenizer, "decode")
-                else " ".join(chunk_tokens)
-            )
+            if offsets is not None:
+                chunk_text = text[offsets[start][0] : offsets[end - 1][1]]
+            elif hasattr(tokenizer, "decode"):
+                chunk_text = tokenizer.decode(chunk_tokens)
+            else:
+                chunk_text = " ".join(chunk_tokens)
             if len(chunk_tokens) >= min_length:
-                chunks.append(
-                    Chunk(
-                        text=chunk_text,
-                        doc_id=doc_id,
-                        chunk_index=idx,
-                        start_offset=start,
-                        end_offset=end,
-                    )
-                )
+                # Offsets count tokens, so the chunk text is carried as is.
+                chunks.append(ChunkSpan(None, doc_id, idx, start, end, text=chunk_text))
+                # A cut inside a word (no gap to the neighbouring token)
+                # tokenizes differently on its own, so those ids are not reused.
+                if offsets is not None and not (
+                    (start > 0 and offsets[start - 1][1] == offsets[start][0])
+                    or (end < len(tokens) and offsets[end - 1][1] == offsets[end][0])
+                ):
+                    remembered_texts.append(chunk_text)
+                    remembered_ids.append(chunk_tokens)
                 idx += 1
             start += chunk_size - overlap if chunk_size > overlap else chunk_size
+        if remembered_texts:
+            tokenizer.remember(remembered_texts, remembered_ids)
         return chunks
 
 
@@ -192,28 +465,33 @@ class SlidingWindowChunkingStrategy(ChunkingStrategy):
         window_size: int = 512,
         step_size: int = 256,
         min_length: int = 0,
-    ) -> List[Chunk]:
-        if not isinstance(text, str) or not text:
-            raise ValueError("Input text must be a non-empty string.")
-        chunks = []
-        idx = 0
-        for start in range(0, len(text), step_size):
-            end = min(start + window_size, len(text))
-            chunk_text = text[start:end]
-            if len(chunk_text) >= min_length:
-                chunks.append(
-                    Chunk(
-                        text=chunk_text,
-                        doc_id=doc_id,
-                        chunk_index=idx,
-                        start_offset=start,
-                        end_offset=end,
-                    )
-                )
-                idx += 1
-            if end == len(text):
-                break
-        return chunks
+    ) -> List[ChunkSpan]:
+        return SlidingWindowChunkingStrategy.plan(
+            text, doc_id, window_size, step_size, min_length
+        ).chunks(0)
+
+    @staticmethod
+    def plan(
+        texts,
+        doc_ids=None,
+        window_size: int = 512,
+        step_size: int = 256,
+        min_length: int = 0,
+    ) -> ChunkPlan:
+        """Offsets of chunk() for one text or a list of texts."""
+        texts, doc_ids, lengths = _plan_inputs(texts, doc_ids)
+        if step_size <= 0:
+            raise ValueError("step_size must be positive.")
+        # Windows stop at the first one that reaches the end of the text.
+        counts = np.minimum(
+            -(-lengths // step_size),
+            -(-np.maximum(lengths - window_size, 0) // step_size) + 1,
+        )
+        return ChunkPlan(
+            texts,
+            doc_ids,
+            *plan_windows(lengths, window_size, step_size, counts, min_length),
+        )
 
 
 # 7. Custom/Heuristic Chunking: split by custom delimiter or rule
@@ -225,39 +503,33 @@ class CustomHeuristicChunkingStrategy(ChunkingStrategy):
         delimiter: str = "\n---\n",
         min_length: int = 0,
         rules: dict = None,
-    ) -> List[Chunk]:
-        if not isinstance(text, str) or not text:
-            raise ValueError("Input text must be a non-empty string.")
+    ) -> List[ChunkSpan]:
+        return CustomHeuristicChunkingStrategy.plan(
+            text, doc_id, delimiter, min_length
+        ).chunks(0)
+
+    @staticmethod
+    def plan(
+        texts,
+        doc_ids=None,
+        delimiter: str = "\n---\n",
+        min_length: int = 0,
+        rules: dict = None,
+    ) -> ChunkPlan:
+        """Offsets of chunk() for one text or a list of texts."""
         # If delimiter is empty, treat the whole text as one chunk
         if delimiter == "":
-            if len(text) < min_length:
-                return []
-            return [
-                Chunk(
-                    text=text,
-                    doc_id=doc_id,
-                    chunk_index=0,
-                    start_offset=0,
-                    end_offset=len(text),
-                )
-            ]
-        parts = [p for p in text.split(delimiter) if p.strip()]
-        chunks = []
-        for idx, part in enumerate(parts):
-            if len(part) < min_length:
-                continue
-            start_offset = text.find(part)
-            end_offset = start_offset + len(part)
-            chunks.append(
-                Chunk(
-                    text=part,
-                    doc_id=doc_id,
-                    chunk_index=idx,
-                    start_offset=start_offset,
-                    end_offset=end_offset,
-                )
+            texts, doc_ids, lengths = _plan_inputs(texts, doc_ids)
+            return ChunkPlan(
+                texts,
+                doc_ids,
+                *plan_windows(
+                    lengths, lengths.max(), 1, np.ones_like(lengths), min_length
+                ),
             )
-        return chunks
+        return plan_delimited(
+            texts, doc_ids, re.compile(re.escape(delimiter)), min_length
+        )
 
 
 def get_chunking_strategy_from_config():
@@ -301,23 +573,237 @@ def get_chunking_strategy_from_config():
 
 
 import concurrent.futures
+import multiprocessing as mp
+
+BATCH_MODES = ("auto", "serial", "thread", "process")
+
+
+def _plan_group(strategy_class, params, texts, first_doc):
+    """Thread task: plan one group of documents, as offset arrays."""
+    return strategy_class.plan(texts, None, **params).arrays(first_doc)
+
+
+def _plan_shared(strategy_class, params, shm_name, byte_bounds, first_doc):
+    """Process task: plan documents stored UTF-8 encoded in shared memory."""
+    # Workers share the parent's resource tracker, which unlinks the segment.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        texts = [
+            str(shm.buf[lo:hi], "utf-8")
+            for lo, hi in zip(byte_bounds[:-1], byte_bounds[1:])
+        ]
+    finally:
+        shm.close()
+    return _plan_group(strategy_class, params, texts, first_doc)
+
+
+def _gil_enabled():
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _size_groups(lengths, count):
+    """Split document indexes into up to count contiguous groups of similar total size."""
+    cumulative = np.cumsum(lengths)
+    targets = cumulative[-1] * np.arange(1, count) / count
+    cuts = np.unique(np.searchsorted(cumulative, targets, side="right"))
+    bounds = [0] + [int(c) for c in cuts if 0 < c < len(lengths)] + [len(lengths)]
+    return list(zip(bounds[:-1], bounds[1:]))
 
 
 class Chunker:
-    def __init__(self):
+    def __init__(self, export_models: bool = None):
         self.strategy_class, self.params = get_chunking_strategy_from_config()
+        chunking_cfg = get_config_loader().get_section("chunking")
+        # export_models: return pydantic Chunks instead of ChunkSpans.
+        if export_models is None:
+            export_models = chunking_cfg.get("export_models", False)
+        self.export_models = export_models
+        self.batch_mode = chunking_cfg.get("batch_mode", "auto")
+        self.parallel_min_chars = chunking_cfg.get("parallel_min_chars", 1_000_000)
+        self.start_method = chunking_cfg.get("parallel_start_method", "spawn")
+        self.stream_read_chars = chunking_cfg.get("stream_read_chars", 1 << 20)
+        self.stream_max_part_chars = chunking_cfg.get("stream_max_part_chars", 1 << 24)
+        self._pool = None
+        self._pool_workers = 0
 
-    def chunk(self, text: str, doc_id: str = "") -> List[Chunk]:
+    def chunk(self, text: str, doc_id: str = "") -> List[ChunkSpan]:
         # Dynamically pass params to the static method
-        return self.strategy_class.chunk(text, doc_id=doc_id, **self.params)
+        chunks = self.strategy_class.chunk(text, doc_id=doc_id, **self.params)
+        return export_chunks(chunks) if self.export_models else chunks
+
+    def chunk_stream(self, source, doc_id: str = ""):
+        """
+        Chunks of a text stream, file object or mmap, read in bounded memory
+        (see ai_core.chunking.streaming); yields as chunk() would return.
+        """
+        from ai_core.chunking.streaming import stream_chunks
+
+        for chunk in stream_chunks(
+            source,
+            self.strategy_class,
+            doc_id,
+            read_chars=self.stream_read_chars,
+            max_part_chars=self.stream_max_part_chars,
+            **self.params,
+        ):
+            yield chunk.to_model() if self.export_models else chunk
+
+    def plan(self, texts: List[str], doc_ids: List[str] = None) -> ChunkPlan:
+        """Offsets for a batch without creating chunks (strategies with plan())."""
+        if not hasattr(self.strategy_class, "plan"):
+            raise NotImplementedError(
+                f"{self.strategy_class.__name__} has no offset planner."
+            )
+        return self.strategy_class.plan(texts, doc_ids, **self.params)
+
+    def select_mode(self, lengths, max_workers: int = 4) -> str:
+        """
+        serial, thread or process for a batch with these document lengths.
+        Parallelism pays only for at least parallel_min_chars of text spread
+        over documents (one dominant document stays serial) on more than one
+        CPU. Fixed and sliding-window planning is vectorized and always
+        serial. Where the GIL is held, pure-Python planners go to processes;
+        free-threaded builds and token-based chunking (tokenizers release
+        the GIL) use threads.
+        """
+        workers = min(max_workers, _available_cpus())
+        total = sum(lengths)
+        if (
+            workers < 2
+            or len(lengths) < 2
+            or total < self.parallel_min_chars
+            or max(lengths) * 2 > total
+            or self.strategy_class
+            in (FixedChunkingStrategy, SlidingWindowChunkingStrategy)
+        ):
+            return "serial"
+        if not _gil_enabled() or self.strategy_class is TokenBasedChunkingStrategy:
+            return "thread"
+        return "process" if hasattr(self.strategy_class, "plan") else "serial"
+
+    def plan_batch(
+        self,
+        texts: List[str],
+        doc_ids: List[str] = None,
+        max_workers: int = 4,
+        mode: str = None,
+    ) -> ChunkPlan:
+        """
+        plan() for a batch, run in mode (serial, thread, process, or auto:
+        batch_mode in config, else select_mode). Workers return offset
+        arrays, merged in document order.
+        """
+        texts, doc_ids, lengths = _plan_inputs(texts, doc_ids)
+        mode = self._resolve_mode(mode, lengths, max_workers)
+        if mode == "serial" or len(texts) < 2:
+            return self.plan(texts, doc_ids)
+        if not hasattr(self.strategy_class, "plan"):
+            raise NotImplementedError(
+                f"{self.strategy_class.__name__} has no offset planner."
+            )
+        groups = _size_groups(lengths, max_workers * 4)
+        if mode == "thread":
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        _plan_group,
+                        self.strategy_class,
+                        self.params,
+                        texts[lo:hi],
+                        lo,
+                    )
+                    for lo, hi in groups
+                ]
+                return ChunkPlan.merge(texts, doc_ids, [f.result() for f in futures])
+        return self._plan_processes(texts, doc_ids, groups, max_workers)
+
+    def _resolve_mode(self, mode, lengths, max_workers):
+        mode = mode or self.batch_mode
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown batch mode: {mode}")
+        if mode == "auto":
+            mode = self.select_mode(lengths, max_workers)
+        return mode
+
+    def _plan_processes(self, texts, doc_ids, groups, max_workers):
+        sizes = [len(t) if t.isascii() else len(t.encode("utf-8")) for t in texts]
+        byte_bounds = np.concatenate(([0], np.cumsum(sizes))).tolist()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, byte_bounds[-1]))
+        try:
+            for text, lo, hi in zip(texts, byte_bounds[:-1], byte_bounds[1:]):
+                shm.buf[lo:hi] = text.encode("utf-8")
+            pool = self._get_pool(max_workers)
+            futures = [
+                pool.submit(
+                    _plan_shared,
+                    self.strategy_class,
+                    self.params,
+                    shm.name,
+                    byte_bounds[lo : hi + 1],
+                    lo,
+                )
+                for lo, hi in groups
+            ]
+            parts = [f.result() for f in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+        return ChunkPlan.merge(texts, doc_ids, parts)
+
+    def _get_pool(self, max_workers):
+        # Kept across batches: worker start-up costs far more than one batch.
+        if self._pool is None or self._pool_workers != max_workers:
+            self.close()
+            # Started first so workers inherit it rather than start their own,
+            # which would unlink segments still in use when a worker exits.
+            resource_tracker.ensure_running()
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers, mp_context=mp.get_context(self.start_method)
+            )
+            self._pool_workers = max_workers
+            print(
+                f"[INFO] Chunking process pool started | Workers: {max_workers} | Start method: {self.start_method}"
+            )
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     def chunk_batch(
-        self, texts: List[str], doc_ids: List[str] = None, max_workers: int = 4
-    ) -> List[List[Chunk]]:
+        self,
+        texts: List[str],
+        doc_ids: List[str] = None,
+        max_workers: int = 4,
+        mode: str = None,
+    ) -> List[List[ChunkSpan]]:
         if doc_ids is None:
             doc_ids = ["" for _ in texts]
         if len(doc_ids) != len(texts):
             raise ValueError("Length of doc_ids must match texts.")
+        if not texts:
+            return []
+        if hasattr(self.strategy_class, "plan"):
+            batches = self.plan_batch(texts, doc_ids, max_workers, mode).chunks()
+            if self.export_models:
+                return [export_chunks(chunks) for chunks in batches]
+            return batches
+        # Strategies without a planner run whole chunk() calls.
+        lengths = [len(t) if isinstance(t, str) else 0 for t in texts]
+        mode = self._resolve_mode(mode, lengths, max_workers)
+        if mode == "process":
+            print(
+                f"[WARN] {self.strategy_class.__name__} has no offset planner; chunking batch serially."
+            )
+        if mode != "thread":
+            return [self.chunk(text, doc_id) for text, doc_id in zip(texts, doc_ids)]
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [
                 executor.submit(self.chunk, text, doc_id)
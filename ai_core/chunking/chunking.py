@@ -6,7 +6,8 @@ Extensible for different chunking strategies.
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field, ValidationError
 from ai_core.chunking.chunk import (
-    Chunk,
+    ChunkSpan,
+    export_chunks,
     FixedChunkingStrategy,
     SemanticChunkingStrategy,
     RecursiveChunkingStrategy,
@@ -38,6 +39,10 @@ class ChunkingConfig(BaseModel):
     max_chunk_size: int = Field(
         512, gt=0, description="Max chunk size for recursive chunking"
     )
+    # Output
+    export_models: bool = Field(
+        False, description="Return pydantic Chunks instead of ChunkSpans"
+    )
 
 
 class Chunker:
@@ -53,7 +58,7 @@ class Chunker:
             "custom_heuristic": CustomHeuristicChunkingStrategy,
         }
 
-    def chunk(self, text: str, doc_id: str = "", **kwargs) -> List[Chunk]:
+    def chunk(self, text: str, doc_id: str = "", **kwargs) -> List[ChunkSpan]:
         if not isinstance(text, str) or not text:
             raise ValueError("Input text must be a non-empty string.")
         strategy = self.config.strategy
@@ -64,7 +69,8 @@ class Chunker:
         # Build params for the strategy
         params = self._get_strategy_params(strategy)
         params.update(kwargs)
-        return self.strategy_map[strategy].chunk(text, doc_id=doc_id, **params)
+        chunks = self.strategy_map[strategy].chunk(text, doc_id=doc_id, **params)
+        return export_chunks(chunks) if self.config.export_models else chunks
 
     def _get_strategy_params(self, strategy: str) -> Dict[str, Any]:
         # Map config fields to strategy params
@@ -0,0 +1,224 @@
+"""
+ShieldCraft AI Core - Streaming Chunking
+
+Chunks a text stream (text or binary file object, mmap or other buffer)
+read_chars characters at a time, so multi-GB CloudTrail or flow log files
+never sit in memory whole. Between reads each strategy keeps only its
+unfinished tail: the start of the next fixed or sliding window, or the text
+after the last delimiter whose boundary can no longer change. Chunks carry
+their own text, since the buffer they were cut from is dropped, and their
+offsets count characters from the start of the stream, so they match what
+the whole-text strategy returns for the same content.
+
+Supported: fixed, sliding_window, semantic, sentence and custom_heuristic
+(non-empty delimiter).
+"""
+
+import codecs
+import mmap
+import re
+from ai_core.chunking.chunk import (
+    _PARAGRAPH,
+    _SENTENCE_END,
+    ChunkSpan,
+    CustomHeuristicChunkingStrategy,
+    FixedChunkingStrategy,
+    SemanticChunkingStrategy,
+    SentenceChunkingStrategy,
+    SlidingWindowChunkingStrategy,
+    delimiter_spans,
+    split_parts,
+)
+
+DEFAULT_READ_CHARS = 1 << 20
+DEFAULT_MAX_PART_CHARS = 1 << 24
+
+
+def read_blocks(source, read_chars: int = DEFAULT_READ_CHARS):
+    """
+    str blocks of up to read_chars characters (bytes, for binary input) from
+    a str, a text or binary file object (anything with read()), or a buffer
+    such as mmap or memoryview. Buffers are read from their first byte,
+    whatever an mmap's file position. Bytes are decoded as UTF-8,
+    incrementally, so a character split across reads is kept whole.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), read_chars):
+            yield source[start : start + read_chars]
+        return
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        with memoryview(source) as view:
+            for start in range(0, len(view), read_chars):
+                yield decoder.decode(view[start : start + read_chars])
+    else:
+        while True:
+            block = source.read(read_chars)
+            if not block:
+                break
+            yield block if isinstance(block, str) else decoder.decode(block)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def stream_windows(
+    source,
+    doc_id: str = "",
+    size: int = 512,
+    step: int = 256,
+    min_length: int = 0,
+    stop_at_end: bool = False,
+    read_chars: int = DEFAULT_READ_CHARS,
+):
+    """
+    ChunkSpans of windows of size characters starting every step characters.
+    Every start before the end of the stream gets a window (fixed), or with
+    stop_at_end the windows end at the first one reaching it (sliding
+    window). Only text from the next window's start onwards is kept.
+    """
+    if step <= 0:
+        raise ValueError("step must be positive.")
+    buf, buf_start, total = "", 0, 0  # buf holds [buf_start, max(total, buf_start))
+    next_start, idx, last_end = 0, 0, None
+    for block in read_blocks(source, read_chars):
+        # With step > size, the gap before the next window is never buffered.
+        buf += block[max(0, buf_start - total) :]
+        total += len(block)
+        while next_start + size <= total:
+            last_end = next_start + size
+            if size >= min_length:
+                local = next_start - buf_start
+                yield ChunkSpan(
+                    None,
+                    doc_id,
+                    idx,
+                    next_start,
+                    last_end,
+                    text=buf[local : local + size],
+                )
+                idx += 1
+            next_start += step
+        drop = next_start - buf_start
+        buf, buf_start = buf[drop:], next_start
+    if stop_at_end and last_end == total:
+        return
+    while next_start < total:
+        end = min(next_start + size, total)
+        if end - next_start >= min_length:
+            local = next_start - buf_start
+            yield ChunkSpan(
+                None,
+                doc_id,
+                idx,
+                next_start,
+                end,
+                text=buf[local : local + end - next_start],
+            )
+            idx += 1
+        if stop_at_end and end == total:
+            return
+        next_start += step
+
+
+def stream_delimited(
+    source,
+    pattern,
+    doc_id: str = "",
+    min_length: int = 0,
+    strip: bool = False,
+    read_chars: int = DEFAULT_READ_CHARS,
+    max_part_chars: int = DEFAULT_MAX_PART_CHARS,
+):
+    """
+    ChunkSpans of the parts between matches of pattern, numbered and
+    filtered as plan_delimited does. A part is emitted once the delimiter
+    after it is final: a match that reaches the end of the buffer could
+    still grow, so it waits for the next read. A part that grows past
+    max_part_chars without a delimiter is cut there to keep memory bounded.
+    """
+    buf, buf_start, idx = "", 0, 0
+
+    def emit(spans, end):
+        nonlocal idx
+        starts, ends, blank = split_parts(buf, end=end, strip=strip, spans=spans)
+        for start, stop, is_blank in zip(starts.tolist(), ends.tolist(), blank):
+            if is_blank:
+                continue
+            if stop - start >= min_length:
+                yield ChunkSpan(
+                    None,
+                    doc_id,
+                    idx,
+                    buf_start + start,
+                    buf_start + stop,
+                    text=buf[start:stop],
+                )
+            idx += 1
+
+    for block in read_blocks(source, read_chars):
+        buf += block
+        spans = delimiter_spans(buf, pattern)
+        if len(spans) and spans[-1, 1] == len(buf):
+            spans = spans[:-1]
+        if len(spans):
+            # Parts up to the last final delimiter; the rest is carried over.
+            yield from emit(spans[:-1], int(spans[-1, 0]))
+            cut = int(spans[-1, 1])
+        elif len(buf) > max_part_chars:
+            print(
+                f"[WARN] No delimiter in {len(buf)} characters at offset {buf_start}; cutting the part at max_part_chars."
+            )
+            yield from emit(spans, len(buf))
+            cut = len(buf)
+        else:
+            continue
+        buf, buf_start = buf[cut:], buf_start + cut
+    if buf:
+        yield from emit(delimiter_spans(buf, pattern), len(buf))
+
+
+def stream_chunks(
+    source,
+    strategy_class,
+    doc_id: str = "",
+    read_chars: int = DEFAULT_READ_CHARS,
+    max_part_chars: int = DEFAULT_MAX_PART_CHARS,
+    **params,
+):
+    """
+    Streaming counterpart of strategy_class.chunk(text, doc_id, **params)
+    over source (see read_blocks). Yields ChunkSpans with global offsets.
+    """
+    min_length = params.get("min_length", 0)
+    if strategy_class is FixedChunkingStrategy:
+        chunk_size = params.get("chunk_size", 512)
+        overlap = params.get("overlap", 0)
+        step = chunk_size - overlap if chunk_size > overlap else chunk_size
+        return stream_windows(
+            source, doc_id, chunk_size, step, min_length, False, read_chars
+        )
+    if strategy_class is SlidingWindowChunkingStrategy:
+        return stream_windows(
+            source,
+            doc_id,
+            params.get("window_size", 512),
+            params.get("step_size", 256),
+            min_length,
+            True,
+            read_chars,
+        )
+    if strategy_class is CustomHeuristicChunkingStrategy:
+        delimiter = params.get("delimiter", "\n---\n")
+        if delimiter == "":
+            raise ValueError("Streaming needs a non-empty delimiter.")
+        pattern, strip = re.compile(re.escape(delimiter)), False
+    elif strategy_class is SemanticChunkingStrategy:
+        pattern, strip = _PARAGRAPH, False
+    elif strategy_class is SentenceChunkingStrategy:
+        pattern, strip = _SENTENCE_END, True
+    else:
+        raise ValueError(f"{strategy_class.__name__} has no streaming variant.")
+    return stream_delimited(
+        source, pattern, doc_id, min_length, strip, read_chars, max_part_chars
+    )
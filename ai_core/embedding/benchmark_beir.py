@@ -6,14 +6,20 @@ This script runs the BEIR benchmark suite on your embedding model for retrieval
 import concurrent.futures
 import argparse
 import json
+import tempfile
+import time
 from datetime import datetime
 import logging
+import numpy as np
 from beir import util
 from beir.datasets.data_loader import GenericDataLoader
 from beir.retrieval.evaluation import EvaluateRetrieval
 from beir.retrieval.search.dense import DenseRetrievalExactSearch as DRES
 from sentence_transformers import SentenceTransformer
 from ai_core.embedding.embedding import EmbeddingModel
+from ai_core.model_registry import get_model
+from ai_core.embedding.benchmark_throughput import run_pooling_regression
+from ai_core.local_vector_store import LocalVectorStore
 from infra.utils.config_loader import get_config_loader
 
 
@@ -22,20 +28,39 @@ class ShieldCraftEmbeddingAdapter:
     Config-driven adapter for BEIR. Uses EmbeddingModel if embedding.use_custom is True, else SentenceTransformer.
     """
 
-    def __init__(self, batch_size=32):
+    def __init__(self, batch_size=32, config_overrides=None):
         config_loader = get_config_loader()
-        config = config_loader.get_section("embedding")
+        config = dict(
+            config_loader.get_section("embedding"), **(config_overrides or {})
+        )
         self.model_name = config.get(
             "model_name", "sentence-transformers/all-MiniLM-L6-v2"
         )
         self.use_custom = config.get("use_custom", False)
         self.batch_size = batch_size
+        # Encode throughput across all calls, reported as docs/sec.
+        self.encoded_docs = 0
+        self.encode_seconds = 0.0
         if self.use_custom:
             self.model = EmbeddingModel(config=config)
         else:
-            self.model = SentenceTransformer(self.model_name)
+            # One shared instance per process, however many adapters are built.
+            self.model = get_model(
+                ("sentence_transformer", self.model_name),
+                lambda: SentenceTransformer(self.model_name),
+            )
+
+    def docs_per_sec(self):
+        return self.encoded_docs / self.encode_seconds if self.encode_seconds else 0.0
 
     def encode(self, sentences, batch_size=None, **kwargs):
+        start = time.perf_counter()
+        embeddings = self._encode(sentences, batch_size=batch_size, **kwargs)
+        self.encode_seconds += time.perf_counter() - start
+        self.encoded_docs += len(sentences)
+        return embeddings
+
+    def _encode(self, sentences, batch_size=None, **kwargs):
         batch_size = batch_size if batch_size is not None else self.batch_size
         if batch_size is not None and (
             not isinstance(batch_size, int) or batch_size < 1
@@ -58,12 +83,81 @@ class ShieldCraftEmbeddingAdapter:
 
 logging.basicConfig(level=logging.INFO)
 
+RETRIEVAL_MODES = ("dense", "hybrid")
+
+
+def _rank_scores(rows, exclude=None, scores=None):
+    # BEIR ranks by score; plain rankings get descending 1/rank scores.
+    results = {}
+    for rank, row in enumerate(rows):
+        doc_id = row["doc_id"]
+        if doc_id != exclude and doc_id not in results:
+            results[doc_id] = scores[rank] if scores else 1.0 / (rank + 1)
+    return results
+
+
+def run_hybrid_retrieval(corpus, queries, adapter, top_k=100, batch_size=32):
+    """
+    Index the corpus in a throwaway local vector store and run
+    VectorStoreBackend.hybrid_query for every query. Returns BEIR-style
+    {qid: {doc_id: score}} results for the dense, lexical and fused
+    rankings, plus p50/p95 latency per stage.
+    """
+    doc_ids = list(corpus.keys())
+    texts = [
+        (corpus[d].get("title", "") + " " + corpus[d].get("text", "")).strip()
+        for d in doc_ids
+    ]
+    query_ids = list(queries.keys())
+    with tempfile.TemporaryDirectory() as index_dir:
+        store = LocalVectorStore(
+            config={
+                "local_path": index_dir,
+                "index_type": "none",
+                "metric": "cosine",
+                "upsert_key": "doc_chunk",
+            }
+        )
+        corpus_embeddings = np.asarray(
+            adapter.encode(texts, batch_size=batch_size), dtype=np.float32
+        )
+        store.upsert_embeddings(
+            texts, corpus_embeddings, doc_ids=doc_ids, chunk_indices=[0] * len(texts)
+        )
+        query_embeddings = np.asarray(
+            adapter.encode([queries[q] for q in query_ids], batch_size=batch_size),
+            dtype=np.float32,
+        )
+        # Warm-up builds the lexical index so it is not charged to one query.
+        store.hybrid_query(queries[query_ids[0]], query_embeddings[0], top_k=top_k)
+        results = {"dense": {}, "lexical": {}, "hybrid": {}}
+        timings = {"dense_ms": [], "lexical_ms": [], "fusion_ms": [], "total_ms": []}
+        for qid, embedding in zip(query_ids, query_embeddings):
+            hybrid = store.hybrid_query(queries[qid], embedding, top_k=top_k)
+            if isinstance(hybrid, str):
+                raise RuntimeError(hybrid)
+            results["dense"][qid] = _rank_scores(hybrid["dense"], qid)
+            results["lexical"][qid] = _rank_scores(hybrid["lexical"], qid)
+            results["hybrid"][qid] = _rank_scores(hybrid["rows"], qid, hybrid["scores"])
+            for stage, value in hybrid["timings"].items():
+                timings[stage].append(value)
+    latency = {
+        stage: {
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+        }
+        for stage, values in timings.items()
+    }
+    return results, latency
+
 
 def run_beir(
     datasets=["scifact"],
     data_path="./beir_datasets",
     output_path="beir_results.json",
     batch_size=32,
+    retrieval="dense",
+    embedding_overrides=None,
 ):
     """
     Run BEIR benchmark in parallel for the specified datasets.
@@ -71,7 +165,13 @@ def run_beir(
     :param data_path: Path to download/load BEIR datasets
     :param output_path: Where to save results
     :param batch_size: Batch size for encoding
+    :param retrieval: 'dense' (exact dense search) or 'hybrid' (dense, BM25
+        and RRF-fused metrics side by side, with per-stage latency)
+    :param embedding_overrides: Optional dict merged over the embedding config
+        (e.g. {"use_custom": True, "backend": "onnx"})
     """
+    if retrieval not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {retrieval}")
 
     def run_single_dataset(dataset):
         try:
@@ -80,7 +180,29 @@ def run_beir(
             dataset_path = util.download_and_unzip(url, data_path)
             corpus, queries, qrels = GenericDataLoader(dataset_path).load(split="test")
             logging.info("Loading embedding model via config for BEIR...")
-            adapter = ShieldCraftEmbeddingAdapter(batch_size=batch_size)
+            adapter = ShieldCraftEmbeddingAdapter(
+                batch_size=batch_size, config_overrides=embedding_overrides
+            )
+            if retrieval == "hybrid":
+                logging.info(f"Running hybrid retrieval benchmark on {dataset}")
+                runs, latency = run_hybrid_retrieval(
+                    corpus, queries, adapter, batch_size=batch_size
+                )
+                metrics = {
+                    "Latency": latency,
+                    "Throughput": {"docs_per_sec": adapter.docs_per_sec()},
+                }
+                for name, results in runs.items():
+                    ndcg, _map, recall, precision = EvaluateRetrieval.evaluate(
+                        qrels, results, [1, 3, 5, 10, 100]
+                    )
+                    metrics[name] = {
+                        "nDCG": ndcg,
+                        "MAP": _map,
+                        "Recall": recall,
+                        "Precision": precision,
+                    }
+                return {"dataset": dataset, "metrics": metrics, "success": True}
             model = DRES(adapter)
             retriever = EvaluateRetrieval(model, score_function="cos_sim")
             logging.info(f"Running BEIR retrieval benchmark on {dataset}")
@@ -93,6 +215,7 @@ def run_beir(
                 "MAP": _map,
                 "Recall": recall,
                 "Precision": precision,
+                "Throughput": {"docs_per_sec": adapter.docs_per_sec()},
             }
             return {"dataset": dataset, "metrics": metrics, "success": True}
         except Exception as e:
@@ -121,6 +244,7 @@ def run_beir(
         "results": results,
         "errors": errors,
         "datasets": datasets,
+        "retrieval": retrieval,
     }
     with open(output_path, "w") as f:
         json.dump(output, f, indent=2)
@@ -130,6 +254,80 @@ def run_beir(
     return output
 
 
+def run_backend_comparison(
+    datasets=["scifact"],
+    data_path="./beir_datasets",
+    output_path="beir_backends.json",
+    batch_size=32,
+    backends=("torch", "onnx"),
+):
+    """
+    Dense BEIR run once per EmbeddingModel backend; summarizes encode
+    docs/sec and nDCG@10 per dataset so speedups can be checked for quality.
+    """
+    stem = output_path.rsplit(".json", 1)[0]
+    summary = {}
+    for backend in backends:
+        output = run_beir(
+            datasets=datasets,
+            data_path=data_path,
+            output_path=f"{stem}.{backend}.json",
+            batch_size=batch_size,
+            embedding_overrides={"use_custom": True, "backend": backend},
+        )
+        summary[backend] = {
+            dataset: {
+                "docs_per_sec": metrics["Throughput"]["docs_per_sec"],
+                "ndcg@10": metrics["nDCG"].get("NDCG@10"),
+            }
+            for dataset, metrics in output["results"].items()
+        }
+        summary[backend]["errors"] = output["errors"]
+    output = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "results": summary,
+        "datasets": datasets,
+    }
+    with open(output_path, "w") as f:
+        json.dump(output, f, indent=2)
+    logging.info(f"Backend comparison complete. Results saved to {output_path}")
+    return output
+
+
+def run_pooling_benchmark(
+    datasets=["scifact"], data_path="./beir_datasets", output_path="beir_pooling.json"
+):
+    """
+    Pooling regression on BEIR data: batch invariance and nDCG@10 for legacy
+    unmasked mean vs masked mean/CLS/max (normalized), one dataset at a time.
+    """
+    results = {}
+    errors = {}
+    for dataset in datasets:
+        try:
+            url = f"https://public.ukp.informatik.tu-darmstadt.de/thakur/BEIR/datasets/{dataset}.zip"
+            dataset_path = util.download_and_unzip(url, data_path)
+            corpus, queries, qrels = GenericDataLoader(dataset_path).load(split="test")
+            corpus = {
+                doc_id: (doc.get("title", "") + " " + doc.get("text", "")).strip()
+                for doc_id, doc in corpus.items()
+            }
+            results[dataset] = run_pooling_regression(corpus, queries, qrels)
+        except Exception as e:
+            logging.error(f"Pooling regression on {dataset} failed: {e}")
+            errors[dataset] = str(e)
+    output = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "results": results,
+        "errors": errors,
+        "datasets": datasets,
+    }
+    with open(output_path, "w") as f:
+        json.dump(output, f, indent=2)
+    logging.info(f"Pooling regression complete. Results saved to {output_path}")
+    return output
+
+
 if __name__ == "__main__":
     config_loader = get_config_loader()
     beir_config = (
@@ -165,11 +363,45 @@ if __name__ == "__main__":
         default=beir_config.get("batch_size", 32),
         help="Batch size for encoding (default: from config)",
     )
+    parser.add_argument(
+        "--retrieval",
+        type=str,
+        choices=RETRIEVAL_MODES,
+        default=beir_config.get("retrieval", "dense"),
+        help="dense, or hybrid (dense + BM25 fused with RRF) (default: from config)",
+    )
+    parser.add_argument(
+        "--pooling-regression",
+        action="store_true",
+        help="Compare pooling strategies (batch invariance + nDCG@10) instead of the standard run",
+    )
+    parser.add_argument(
+        "--backends",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Compare EmbeddingModel backends (e.g. torch onnx): docs/sec and nDCG@10",
+    )
     args = parser.parse_args()
 
+    if args.backends:
+        run_backend_comparison(
+            datasets=args.datasets,
+            data_path=args.data_path,
+            output_path=args.output,
+            batch_size=args.batch_size,
+            backends=args.backends,
+        )
+        raise SystemExit(0)
+    if args.pooling_regression:
+        run_pooling_benchmark(
+            datasets=args.datasets, data_path=args.data_path, output_path=args.output
+        )
+        raise SystemExit(0)
     run_beir(
         datasets=args.datasets,
         data_path=args.data_path,
         output_path=args.output,
         batch_size=args.batch_size,
+        retrieval=args.retrieval,
     )
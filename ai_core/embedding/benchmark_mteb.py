@@ -13,6 +13,7 @@ import contextlib
 from mteb import MTEB
 from sentence_transformers import SentenceTransformer
 from ai_core.embedding.embedding import EmbeddingModel
+from ai_core.model_registry import get_model
 from infra.utils.config_loader import get_config_loader
 
 
@@ -34,7 +35,11 @@ class ShieldCraftEmbeddingAdapter:
         if self.use_custom:
             self.model = EmbeddingModel(config=config)
         else:
-            self.model = SentenceTransformer(self.model_name)
+            # One shared instance per process, however many adapters are built.
+            self.model = get_model(
+                ("sentence_transformer", self.model_name),
+                lambda: SentenceTransformer(self.model_name),
+            )
 
 
 def encode(self, sentences, batch_size=32, **kwargs):
@@ -5,6 +5,7 @@ config-driven, etc.) with the MTEB suite.
 """
 
 import sys
+import time
 import logging
 from mteb import MTEB
 from sentence_transformers import SentenceTransformer
@@ -21,12 +22,20 @@ class CustomSentenceTransformer:
 
     def __init__(self, model_name=None, config=None):
         self.model = EmbeddingModel(config=config)
+        self.encoded_docs = 0
+        self.encode_seconds = 0.0
+
+    def docs_per_sec(self):
+        return self.encoded_docs / self.encode_seconds if self.encode_seconds else 0.0
 
     def encode(self, sentences, batch_size=32, **kwargs):
         # MTEB expects a list of strings, returns np.ndarray (n_samples, dim)
+        start = time.perf_counter()
         result = self.model.encode(sentences)
+        self.encode_seconds += time.perf_counter() - start
         if not result["success"]:
             raise RuntimeError(f"Embedding failed: {result['error']}")
+        self.encoded_docs += len(sentences)
         return result["embeddings"]
 
 
@@ -42,10 +51,31 @@ def run_mteb_custom(tasks=None, output_path="mteb_results_custom.json", config=N
     suite = MTEB(tasks=tasks)
     logging.info(f"Running MTEB benchmark on custom model (tasks: {tasks or 'all'})")
     results = suite.run(model, output_folder=output_path)
-    logging.info(f"MTEB benchmark complete. Results saved to {output_path}")
+    logging.info(
+        f"MTEB benchmark complete. Results saved to {output_path} | {model.docs_per_sec():.1f} docs/s"
+    )
     return results
 
 
+def run_backend_comparison(
+    tasks=None,
+    output_path="mteb_results_custom",
+    config=None,
+    backends=("torch", "onnx"),
+):
+    """Run the same MTEB tasks once per EmbeddingModel backend; returns docs/sec per backend."""
+    from infra.utils.config_loader import get_config_loader
+
+    base = config or get_config_loader().get_section("embedding")
+    throughput = {}
+    for backend in backends:
+        model = CustomSentenceTransformer(config=dict(base, backend=backend))
+        MTEB(tasks=tasks).run(model, output_folder=f"{output_path}/{backend}")
+        throughput[backend] = model.docs_per_sec()
+        logging.info(f"Backend {backend}: {throughput[backend]:.1f} docs/s")
+    return throughput
+
+
 if __name__ == "__main__":
     import argparse
     import json
@@ -72,10 +102,26 @@ if __name__ == "__main__":
         default=None,
         help="Path to config JSON file for EmbeddingModel",
     )
+    parser.add_argument(
+        "--backends",
+        type=str,
+        nargs="*",
+        default=None,
+        help="Compare EmbeddingModel backends (e.g. torch onnx) on the same tasks",
+    )
     args = parser.parse_args()
 
     CONFIG = None
     if args.config:
         with open(args.config, "r") as f:
             CONFIG = json.load(f)
-    run_mteb_custom(tasks=args.tasks, output_path=args.output, config=CONFIG)
+    if args.backends:
+        throughput = run_backend_comparison(
+            tasks=args.tasks,
+            output_path=args.output,
+            config=CONFIG,
+            backends=args.backends,
+        )
+        print(json.dumps({"docs_per_sec": throughput}, indent=2))
+    else:
+        run_mteb_custom(tasks=args.tasks, output_path=args.output, config=CONFIG)
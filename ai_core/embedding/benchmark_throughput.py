@@ -0,0 +1,228 @@
+"""
+ShieldCraft AI - Embedding Throughput Benchmark
+
+Compares EmbeddingModel configurations (batching, pooling, backends) on a
+synthetic mixed-length security corpus: short log lines, mid-length alerts
+and long advisories, the length mix that dominates ingestion cost.
+"""
+
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+import numpy as np
+from ai_core.embedding.embedding import EmbeddingModel
+from infra.utils.config_loader import get_config_loader
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_VARIANTS = {
+    "fixed_batch": {"length_bucketing": False},
+    "length_bucketed": {"length_bucketing": True},
+}
+BACKEND_VARIANTS = {
+    "torch": {"backend": "torch"},
+    "onnx_fp32": {"backend": "onnx", "onnx_quantize": False},
+    "onnx_int8": {"backend": "onnx", "onnx_quantize": True},
+}
+POOLING_VARIANTS = {
+    "legacy_mean": {"pooling": "mean_unmasked"},
+    "mean": {"pooling": "mean", "normalize": True},
+    "cls": {"pooling": "cls", "normalize": True},
+    "max": {"pooling": "max", "normalize": True},
+}
+
+_LOG_LINES = [
+    "sshd[{n}]: Failed password for invalid user admin from 10.0.{a}.{b} port {p} ssh2",
+    "kernel: [UFW BLOCK] IN=eth0 SRC=192.168.{a}.{b} DST=10.0.0.{a} PROTO=TCP DPT={p}",
+    "CloudTrail ConsoleLogin failure for user svc-{n} from 203.0.113.{b}",
+    "GuardDuty finding Recon:EC2/PortProbeUnprotectedPort on i-{n:08x}",
+]
+_ALERT = (
+    "Alert {n}: multiple authentication failures followed by a successful login "
+    "for account svc-{a} from 10.0.{a}.{b}. The session created an access key and "
+    "called ListBuckets and GetObject on {p} objects within five minutes. "
+)
+_ADVISORY = (
+    "CVE-2024-{n:04d} affects the xz-utils compression library. A malicious "
+    "build-time script modifies liblzma so that sshd linked through systemd can be "
+    "abused for remote code execution by a holder of the attacker key. Upgrade to "
+    "a fixed release, rotate host keys and review outbound connections. "
+)
+
+
+def security_corpus(size=2000, seed=0):
+    """~70% log lines, ~20% alerts, ~10% long advisories, shuffled."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for n in range(size):
+        fields = {
+            "n": n,
+            "a": int(rng.integers(0, 255)),
+            "b": int(rng.integers(0, 255)),
+            "p": int(rng.integers(1, 65535)),
+        }
+        kind = rng.random()
+        if kind < 0.7:
+            texts.append(_LOG_LINES[n % len(_LOG_LINES)].format(**fields))
+        elif kind < 0.9:
+            texts.append(_ALERT.format(**fields) * int(rng.integers(1, 4)))
+        else:
+            texts.append(_ADVISORY.format(**fields) * int(rng.integers(4, 9)))
+    return texts
+
+
+def run_throughput(texts, variants=None, base_config=None, repeats=3):
+    """
+    Encode texts once per variant (after one warm-up call) and report
+    docs/sec, real vs padded tokens, and a max-abs-diff check of each
+    variant's output against the first variant.
+    """
+    if base_config is None:
+        base_config = get_config_loader().get_section("embedding")
+    variants = variants or DEFAULT_VARIANTS
+    report = {}
+    reference = None
+    for name, overrides in variants.items():
+        config = dict(base_config, cache_enabled=False, **overrides)
+        model = EmbeddingModel(config=config)
+        model.encode(texts[: min(len(texts), 64)])
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = model.encode(texts)
+            timings.append(time.perf_counter() - start)
+        if not result["success"]:
+            report[name] = {"error": result["error"]}
+            continue
+        seconds = float(np.median(timings))
+        batching = result.get("batching", {})
+        entry = {
+            "docs_per_sec": len(texts) / seconds,
+            "seconds": seconds,
+            "batches": batching.get("batches"),
+            "tokens": batching.get("tokens"),
+            "padded_tokens": batching.get("padded_tokens"),
+        }
+        if batching.get("padded_tokens"):
+            entry["padding_efficiency"] = batching["tokens"] / batching["padded_tokens"]
+        embeddings = result["embeddings"].astype(np.float32)
+        if reference is None:
+            reference = embeddings
+        else:
+            entry["max_abs_diff_vs_first"] = float(np.abs(embeddings - reference).max())
+        report[name] = entry
+        logging.info(
+            f"{name}: {entry['docs_per_sec']:.1f} docs/s | padding efficiency: {entry.get('padding_efficiency', 0):.2f}"
+        )
+    return report
+
+
+def ndcg_at_k(run, qrels, k=10):
+    """Mean nDCG@k; run and qrels are {query_id: {doc_id: score/relevance}}."""
+    values = []
+    for qid, relevant in qrels.items():
+        ranked = sorted(run.get(qid, {}).items(), key=lambda kv: -kv[1])[:k]
+        dcg = sum(
+            relevant.get(doc_id, 0) / np.log2(rank + 2)
+            for rank, (doc_id, _) in enumerate(ranked)
+        )
+        ideal = sorted(relevant.values(), reverse=True)[:k]
+        idcg = sum(rel / np.log2(rank + 2) for rank, rel in enumerate(ideal))
+        values.append(dcg / idcg if idcg > 0 else 0.0)
+    return float(np.mean(values)) if values else 0.0
+
+
+def run_pooling_regression(
+    corpus, queries, qrels, variants=None, base_config=None, top_k=10
+):
+    """
+    Pooling regression check. For each variant, encode the corpus twice:
+    once in length-bucketed batches and once one row per batch (no padding);
+    'batch_max_abs_diff' must be ~0 for mask-aware pooling. Retrieval quality
+    is exact cosine search scored as nDCG@top_k against qrels.
+    corpus: {doc_id: text}, queries: {query_id: text}.
+    """
+    if base_config is None:
+        base_config = get_config_loader().get_section("embedding")
+    variants = variants or POOLING_VARIANTS
+    doc_ids = list(corpus)
+    doc_texts = [corpus[d] for d in doc_ids]
+    query_ids = list(queries)
+    report = {}
+    for name, overrides in variants.items():
+        config = dict(base_config, cache_enabled=False, **overrides)
+        batched = EmbeddingModel(config=config).encode(doc_texts)
+        single = EmbeddingModel(config=dict(config, max_batch_rows=1)).encode(doc_texts)
+        encoded_queries = EmbeddingModel(config=config).encode(
+            [queries[q] for q in query_ids]
+        )
+        if not (
+            batched["success"] and single["success"] and encoded_queries["success"]
+        ):
+            report[name] = {
+                "error": batched["error"] or single["error"] or encoded_queries["error"]
+            }
+            continue
+        docs = batched["embeddings"].astype(np.float32)
+        docs /= np.maximum(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12)
+        q = encoded_queries["embeddings"].astype(np.float32)
+        q /= np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+        scores = q @ docs.T
+        run = {}
+        for row, qid in enumerate(query_ids):
+            best = np.argsort(-scores[row])[:top_k]
+            run[qid] = {doc_ids[i]: float(scores[row, i]) for i in best}
+        report[name] = {
+            "batch_max_abs_diff": float(
+                np.abs(
+                    batched["embeddings"].astype(np.float32)
+                    - single["embeddings"].astype(np.float32)
+                ).max()
+            ),
+            f"ndcg@{top_k}": ndcg_at_k(run, qrels, top_k),
+        }
+        logging.info(
+            f"{name}: nDCG@{top_k} {report[name][f'ndcg@{top_k}']:.4f} | batch diff {report[name]['batch_max_abs_diff']:.2e}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Embedding throughput benchmark on a mixed-length security corpus."
+    )
+    parser.add_argument("--size", type=int, default=2000, help="Corpus size")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--variants",
+        type=str,
+        default=None,
+        help="JSON dict of variant name -> embedding config overrides (default: fixed vs length-bucketed batching)",
+    )
+    parser.add_argument(
+        "--backends",
+        action="store_true",
+        help="Compare torch vs ONNX Runtime (fp32, int8) backends instead of batching modes",
+    )
+    parser.add_argument("--output", type=str, default="throughput_results.json")
+    args = parser.parse_args()
+
+    report = run_throughput(
+        security_corpus(args.size),
+        variants=(
+            json.loads(args.variants)
+            if args.variants
+            else BACKEND_VARIANTS if args.backends else None
+        ),
+        repeats=args.repeats,
+    )
+    output = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "corpus_size": args.size,
+        "results": report,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    logging.info(f"Throughput benchmark complete. Results saved to {args.output}")
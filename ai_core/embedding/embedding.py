@@ -1,14 +1,44 @@
 """
 ShieldCraft AI Core - Embedding Pipeline Scaffold
+
+torch and transformers are imported on first model load, not at import time;
+the model itself comes from the process-wide registry (ai_core.model_registry).
 """
 
-import torch
+import queue
+import threading
 import numpy as np
-from transformers import AutoTokenizer, AutoModel
 from infra.utils.config_loader import get_config_loader
+from ai_core.embedding.embedding_cache import EmbeddingCache, cache_namespace
+from ai_core.embedding.embedding_pool import EmbeddingPool
+from ai_core.embedding.stub_backend import STUB_DIMENSION, StubEncoder
+from ai_core.model_registry import from_pretrained, get_model
+from ai_core.tokenizer_service import get_tokenizer_service
 
 
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "stub": hash-seeded vectors, no model or tokenizer (load tests, profiling).
+EMBEDDING_BACKENDS = ("torch", "onnx", "stub")
+# "mean_unmasked" is the pre-masking behaviour (averages padding positions);
+# it is only kept so benchmarks can compare against it.
+POOLING_STRATEGIES = ("mean", "cls", "max", "mean_unmasked")
+
+
+def pool_hidden_states(hidden, attention_mask, strategy="mean"):
+    """
+    Reduce token states (batch, seq, dim) to one vector per row, ignoring
+    padding positions so a text's embedding does not depend on its batch.
+    """
+    import torch
+
+    if strategy == "cls":
+        return hidden[:, 0]
+    if strategy == "mean_unmasked":
+        return hidden.mean(dim=1)
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    if strategy == "max":
+        return hidden.masked_fill(mask == 0, torch.finfo(hidden.dtype).min).amax(dim=1)
+    return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
 
 
 class EmbeddingModel:
@@ -16,66 +46,413 @@ class EmbeddingModel:
         config_loader = get_config_loader()
         if config is None:
             config = config_loader.get_section("embedding")
+        self.config = config
         self.model_name = config.get("model_name", EMBEDDING_MODEL_NAME)
-        self.device = config.get("device") or (
-            "cuda" if torch.cuda.is_available() else "cpu"
-        )
+        self.backend = config.get("backend", "torch")
+        if self.backend not in EMBEDDING_BACKENDS:
+            print(f"[WARN] Unknown embedding backend: {self.backend}, using 'torch'.")
+            self.backend = "torch"
+        self.device = config.get("device") or self._default_device()
         self.quantize = config.get("quantize", False)
         self.quantization_type = config.get(
             "quantization_type", "float16"
         )  # float16, int8, bitsandbytes
         self.batch_size = config.get("batch_size", 32)
-        self.model = None
-        self.tokenizer = None
+        # Length-aware scheduling: sort by token length and cut batches by a
+        # padded-token budget (rows * longest row) instead of a fixed count.
+        self.length_bucketing = config.get("length_bucketing", True)
+        self.max_batch_tokens = config.get("max_batch_tokens", 8192)
+        self.max_batch_rows = config.get("max_batch_rows", 256)
+        # encode_stream: rows per yielded batch and batches tokenized ahead.
+        self.stream_batch_rows = config.get("stream_batch_rows", 1024)
+        self.stream_prefetch = config.get("stream_prefetch", 2)
+        self.pooling = config.get("pooling", "mean")
+        # Unit-length outputs: cosine similarity becomes a plain inner product.
+        self.normalize = config.get("normalize", False)
+        if self.pooling not in POOLING_STRATEGIES:
+            print(f"[WARN] Unknown pooling: {self.pooling}, using 'mean'.")
+            self.pooling = "mean"
+        # Weights load on first use (encode, .model, ...) unless lazy_load is off.
+        self.lazy_load = config.get("lazy_load", True)
+        self.warm_start = config.get("model_warm_start", False)
+        self._model = None
+        self._tokenizer = None
+        self._tokenizer_service = None
+        self._dimension = None
+        self._cache = None
+        self._loaded = False
+        self._loading = False
+        self._load_lock = threading.RLock()
+        self._pool = None
         self._init_error = None
+        self.quant_status = "none"
+        self._quant_kwargs = self._resolve_quantization()
+        if not self.lazy_load:
+            self._ensure_loaded()
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self._ensure_loaded()
+        return self._tokenizer
+
+    @property
+    def tokenizer_service(self):
+        self._ensure_loaded()
+        return self._tokenizer_service
+
+    @property
+    def dimension(self):
+        self._ensure_loaded()
+        return self._dimension
+
+    @property
+    def cache(self):
+        self._ensure_loaded()
+        return self._cache
+
+    def _ensure_loaded(self):
+        """Load once; a failure is recorded in _init_error and not retried."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            # _loading: _load itself reads these properties (cache_namespace).
+            if self._loaded or self._loading:
+                return
+            self._loading = True
+            try:
+                self._load()
+            finally:
+                self._loaded = True
+                self._loading = False
+
+    def _default_device(self):
+        if self.backend == "stub":
+            return "cpu"
+        import torch
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _load(self):
+        config = self.config
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            quant_kwargs = {}
-            quant_status = "none"
-            if self.quantize:
-                if self.quantization_type == "float16":
-                    quant_kwargs["torch_dtype"] = torch.float16
-                    quant_status = "float16"
-                elif self.quantization_type == "int8":
-                    quant_kwargs["torch_dtype"] = torch.qint8
-                    quant_status = "int8"
-                elif self.quantization_type == "bitsandbytes":
-                    try:
-                        import bitsandbytes as bnb
-
-                        quant_kwargs["load_in_8bit"] = True
-                        quant_status = "bitsandbytes-8bit"
-                    except ImportError:
-                        print(
-                            "[WARN] bitsandbytes not installed, falling back to float16."
-                        )
-                        quant_kwargs["torch_dtype"] = torch.float16
-                        quant_status = "float16-fallback"
-                else:
+            if self.backend == "stub":
+                dimension = config.get("stub_dimension", STUB_DIMENSION)
+                self._model = get_model(
+                    ("embedding", "stub", "cpu", dimension),
+                    lambda: StubEncoder(dimension),
+                )
+                self.quant_status = "stub"
+            else:
+                # Shared with TokenBasedChunkingStrategy: chunk token ids are reused here.
+                self._tokenizer_service = get_tokenizer_service(self.model_name, config)
+                self._tokenizer = self._tokenizer_service.tokenizer
+            if self.backend == "onnx":
+                try:
+                    self._model = get_model(
+                        (
+                            "embedding",
+                            self.model_name,
+                            "onnx",
+                            "cpu",
+                            "int8" if config.get("onnx_quantize", True) else "fp32",
+                        ),
+                        self._load_onnx_model,
+                    )
+                    self.device = "cpu"
+                    self.quant_status = (
+                        "onnx-int8" if self._model.quantize else "onnx-fp32"
+                    )
+                except ImportError as e:
                     print(
-                        f"[WARN] Unknown quantization_type: {self.quantization_type}, using float16."
+                        f"[WARN] ONNX backend unavailable ({e}; install the 'onnx' extra), falling back to torch."
                     )
-                    quant_kwargs["torch_dtype"] = torch.float16
-                    quant_status = "float16-fallback"
-            self.model = AutoModel.from_pretrained(self.model_name, **quant_kwargs)
-            self.model.to(self.device)
-            env = config_loader.get_section("app").get("env", "unknown")
+                    self.backend = "torch"
+                    self._quant_kwargs = self._resolve_quantization()
+            if self.backend == "torch":
+                self._model = get_model(
+                    (
+                        "embedding",
+                        self.model_name,
+                        "torch",
+                        self.device,
+                        self.quant_status,
+                    ),
+                    self._load_torch_model,
+                )
+            self._dimension = self._model.config.hidden_size
+            env = get_config_loader().get_section("app").get("env", "unknown")
             print(
-                f"[INFO] Loaded embedding model: {self.model_name} | Env: {env} | Device: {self.device} | Quantized: {self.quantize} | Type: {quant_status}"
+                f"[INFO] Loaded embedding model: {self.model_name} | Env: {env} | Device: {self.device} | Backend: {self.backend} | Quantized: {self.quantize} | Type: {self.quant_status}"
             )
+            if config.get("cache_enabled", False):
+                self._cache = EmbeddingCache(self.cache_namespace(), config)
         except Exception as e:
             print(f"[ERROR] Embedding model or tokenizer loading failed: {e}")
-            self.model = None
-            self.tokenizer = None
+            self._model = None
+            self._tokenizer = None
             self._init_error = str(e)
 
+    def _resolve_quantization(self):
+        """from_pretrained kwargs for the configured quantization; sets quant_status."""
+        quant_kwargs = {}
+        self.quant_status = "none"
+        if self.backend != "torch" or not self.quantize:
+            return quant_kwargs
+        import torch
+
+        if self.quantization_type == "float16":
+            quant_kwargs["torch_dtype"] = torch.float16
+            self.quant_status = "float16"
+        elif self.quantization_type == "int8":
+            # Applied after loading: dynamic int8 Linear layers (CPU).
+            self.quant_status = "int8"
+            if self.device != "cpu":
+                print("[WARN] Dynamic int8 quantization is CPU-only; using cpu.")
+                self.device = "cpu"
+        elif self.quantization_type == "bitsandbytes":
+            try:
+                import bitsandbytes as bnb
+
+                quant_kwargs["load_in_8bit"] = True
+                self.quant_status = "bitsandbytes-8bit"
+            except ImportError:
+                print("[WARN] bitsandbytes not installed, falling back to float16.")
+                quant_kwargs["torch_dtype"] = torch.float16
+                self.quant_status = "float16-fallback"
+        else:
+            print(
+                f"[WARN] Unknown quantization_type: {self.quantization_type}, using float16."
+            )
+            quant_kwargs["torch_dtype"] = torch.float16
+            self.quant_status = "float16-fallback"
+        return quant_kwargs
+
+    def _load_onnx_model(self):
+        from transformers import AutoConfig
+        from ai_core.embedding.onnx_backend import OnnxEncoder
+
+        return OnnxEncoder(
+            self.model_name, AutoConfig.from_pretrained(self.model_name), self.config
+        )
+
+    def _load_torch_model(self):
+        """Eager HF model, with the configured quantization applied."""
+        import torch
+        from transformers import AutoModel
+
+        model = from_pretrained(
+            AutoModel, self.model_name, self.warm_start, **self._quant_kwargs
+        )
+        if self.quant_status == "int8":
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model.to(self.device)
+
+    def cache_fingerprint(self):
+        """Everything that changes the output vectors; the cache namespace is derived from it."""
+        return {
+            "model_name": self.model_name,
+            "revision": getattr(self.model.config, "_commit_hash", None),
+            "backend": self.backend,
+            "quantization": self.quant_status,
+            "pooling": self.pooling,
+            "masked_pooling": True,
+            "normalize": self.normalize,
+            "max_length": (
+                self.tokenizer.model_max_length if self.tokenizer is not None else None
+            ),
+        }
+
+    def cache_namespace(self):
+        return cache_namespace(self.cache_fingerprint())
+
+    def _plan_batches(self, lengths, batch_size):
+        """
+        Group row indices into model batches. With length_bucketing, rows are
+        sorted by token length and a batch closes when its padded size would
+        exceed max_batch_tokens (or max_batch_rows); otherwise rows keep input
+        order in fixed batch_size slices.
+        """
+        if not self.length_bucketing:
+            return [
+                list(range(i, min(i + batch_size, len(lengths))))
+                for i in range(0, len(lengths), batch_size)
+            ]
+        batches = []
+        current = []
+        for i in np.argsort(lengths, kind="stable"):
+            # Sorted ascending, so the row being added is the batch's longest.
+            if current and (
+                len(current) >= self.max_batch_rows
+                or (len(current) + 1) * lengths[i] > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            current.append(int(i))
+        if current:
+            batches.append(current)
+        return batches
+
     def encode(self, texts, batch_size=None):
         """
         Encode a batch of texts into embeddings. Returns dict with 'success', 'embeddings', 'error'.
-        Supports dynamic batch sizing for benchmarking and inference.
+        Supports dynamic batch sizing for benchmarking and inference. With
+        length_bucketing (default), batch_size is superseded by the
+        max_batch_tokens / max_batch_rows budget; output order always matches
+        the input.
+        """
+        return self._encode(texts, batch_size, self._compute)
+
+    def encode_parallel(self, texts, workers=None):
+        """
+        Like encode(), but uncached texts are encoded by a pool of worker
+        processes (EmbeddingPool), each a pinned model replica writing into
+        shared memory. The pool starts on first use and is kept until
+        close_pool().
+        """
+
+        def compute(missing, batch_size, batching):
+            if self._pool is None:
+                self._pool = EmbeddingPool(self.config, workers=workers)
+            return dict(zip(missing, self._pool.encode(missing)))
+
+        return self._encode(texts, None, compute)
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def encode_stream(self, iterable, batch_size=None, prefetch=None):
+        """
+        Generator over an iterable of texts or (id, text) pairs, yielding
+        (ids, embeddings) per batch of batch_size rows (default
+        stream_batch_rows). Plain texts get their running index as id. A
+        background thread reads and tokenizes up to `prefetch` batches ahead,
+        so memory stays bounded by (prefetch + 1) batches. Failures raise
+        RuntimeError, since a generator cannot return an error dict.
         """
+        if self.model is None:
+            raise RuntimeError(
+                f"Embedding model not loaded: {self._init_error or 'Embedding model not loaded.'}"
+            )
+        batch_size = batch_size or self.stream_batch_rows
+        prefetch = prefetch or self.stream_prefetch
+        ready = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                ids, texts = [], []
+                for position, item in enumerate(iterable):
+                    if isinstance(item, str):
+                        ids.append(position)
+                        texts.append(item)
+                    else:
+                        ids.append(item[0])
+                        texts.append(item[1])
+                    if len(texts) == batch_size:
+                        if not put(("batch", ids, texts, self._tokenize(texts))):
+                            return
+                        ids, texts = [], []
+                if texts and not put(("batch", ids, texts, self._tokenize(texts))):
+                    return
+                put(("end", None, None, None))
+            except Exception as e:
+                put(("error", None, None, e))
+
+        producer = threading.Thread(
+            target=produce, name="embedding-prefetch", daemon=True
+        )
+        producer.start()
+        try:
+            while True:
+                kind, ids, texts, payload = ready.get()
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise RuntimeError(f"Embedding stream input failed: {payload}")
+                rows = {text: i for i, text in enumerate(texts)}
+
+                def compute(missing, batch_size, batching):
+                    # Reuse the prefetched tokens for the rows the cache missed.
+                    encodings = payload and {
+                        k: [v[rows[t]] for t in missing] for k, v in payload.items()
+                    }
+                    return self._compute(missing, batch_size, batching, encodings)
+
+                result = self._encode(texts, None, compute)
+                if not result["success"]:
+                    raise RuntimeError(result["error"])
+                yield ids, result["embeddings"]
+        finally:
+            stop.set()
+            producer.join(timeout=5)
+
+    def _tokenize(self, texts):
+        """Unpadded, truncated token features for texts (lists, not tensors); None for stub."""
+        if self.backend == "stub":
+            return None
+        return self.tokenizer_service.features(texts)
+
+    def _compute(self, missing, batch_size, batching, encodings=None):
+        """
+        Encode distinct texts in this process; returns {text: vector}.
+        encodings, if given, are unpadded features already aligned with missing.
+        """
+        if self.backend == "stub":
+            vectors = self.model.encode(missing)
+            if self.normalize:
+                vectors /= np.maximum(
+                    np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12
+                )
+            batching["batches"] += 1
+            return dict(zip(missing, vectors))
+        import torch
+
+        computed = {}
+        # Tokenize once unpadded; each planned batch is padded to its own longest row.
+        if encodings is None:
+            encodings = self._tokenize(missing)
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        for rows in self._plan_batches(lengths, batch_size):
+            features = {k: [v[i] for i in rows] for k, v in encodings.items()}
+            inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+                embeddings = pool_hidden_states(
+                    outputs.last_hidden_state,
+                    inputs["attention_mask"],
+                    self.pooling,
+                )
+                if self.normalize:
+                    embeddings = torch.nn.functional.normalize(
+                        embeddings.float(), p=2, dim=1
+                    )
+            computed.update(zip((missing[i] for i in rows), embeddings.cpu().numpy()))
+            batching["batches"] += 1
+            batching["tokens"] += sum(lengths[i] for i in rows)
+            batching["padded_tokens"] += len(rows) * max(lengths[i] for i in rows)
+        return computed
+
+    def _encode(self, texts, batch_size, compute):
         result = {"success": False, "embeddings": None, "error": None}
-        if self.model is None or self.tokenizer is None:
+        if self.model is None:
             err_msg = self._init_error or "Embedding model not loaded."
             result["error"] = f"Embedding model not loaded: {err_msg}"
             return result
@@ -97,18 +474,29 @@ class EmbeddingModel:
             ):
                 result["error"] = f"Invalid batch_size: {effective_batch_size}"
                 return result
-            all_embeddings = []
-            for i in range(0, len(texts), effective_batch_size):
-                batch = texts[i : i + effective_batch_size]
-                inputs = self.tokenizer(
-                    batch, padding=True, truncation=True, return_tensors="pt"
-                ).to(self.device)
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    embeddings = outputs.last_hidden_state.mean(dim=1)
-                all_embeddings.append(embeddings.cpu().numpy())
-
-            embeddings = np.vstack(all_embeddings)
+            cached = (
+                self.cache.get_many(texts)
+                if self.cache is not None
+                else [None] * len(texts)
+            )
+            # Each distinct uncached text is encoded once, even if repeated.
+            missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+            batching = {"batches": 0, "tokens": 0, "padded_tokens": 0}
+            computed = (
+                compute(missing, effective_batch_size, batching) if missing else {}
+            )
+
+            if self.cache is not None and computed:
+                self.cache.put_many(list(computed), list(computed.values()))
+            embeddings = np.stack(
+                [v if v is not None else computed[t] for t, v in zip(texts, cached)]
+            )
+            result["batching"] = batching
+            if self.cache is not None:
+                result["cache"] = {
+                    "hits": len(texts) - sum(v is None for v in cached),
+                    "computed": len(missing),
+                }
             result["success"] = True
             result["embeddings"] = embeddings
             result["shape"] = embeddings.shape
@@ -0,0 +1,254 @@
+"""
+ShieldCraft AI Core - Content-Addressed Embedding Cache
+
+Two-tier cache in front of EmbeddingModel.encode: an in-memory LRU of recent
+vectors and a size-bounded SQLite file on disk. Entries are keyed by the
+normalized text hash within a namespace derived from everything that changes
+the vector (model, revision, quantization, pooling, truncation), so switching
+any of those misses cleanly. Several namespaces can share one file; rows of
+unused namespaces age out through the LRU size budget or purge_namespaces().
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from ai_core.vector_backend import content_hash
+
+
+def cache_namespace(fingerprint):
+    """Stable short id for a dict describing how embeddings were produced."""
+    payload = json.dumps(fingerprint, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class EmbeddingCache:
+    def __init__(self, namespace, config=None):
+        config = config or {}
+        self.namespace = namespace
+        self.path = config.get("cache_path", "./embedding_cache/embeddings.sqlite")
+        self.memory_items = config.get("cache_memory_items", 10000)
+        self.max_disk_bytes = int(config.get("cache_max_disk_mb", 1024) * 2**20)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+        self.conn = None
+        self._disk_bytes = 0
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            primary_key = [
+                row[1]
+                for row in self.conn.execute("PRAGMA table_info(embeddings)")
+                if row[5]
+            ]
+            if primary_key == ["key"]:
+                # Files from before per-namespace keys: rebuild, it is a cache.
+                print("[WARN] Rebuilding embedding cache with per-namespace keys.")
+                self.conn.execute("DROP TABLE embeddings")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    dtype TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access_idx ON embeddings (last_access)"
+            )
+            self.conn.commit()
+            self._disk_bytes = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            print(
+                f"[INFO] Embedding cache ready: {self.path} | Namespace: {namespace} | {self._disk_bytes / 2**20:.1f} MB on disk"
+            )
+        except sqlite3.Error as e:
+            print(f"[WARN] Embedding disk cache unavailable, using memory only: {e}")
+            self.conn = None
+
+    def _key(self, text):
+        return content_hash(text)
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts):
+        """Return a list aligned with texts: cached vector or None."""
+        keys = [self._key(t) for t in texts]
+        found = [None] * len(texts)
+        with self._lock:
+            pending = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                    self.metrics["memory_hits"] += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+            if pending and self.conn is not None:
+                disk_keys = list(pending)
+                now = time.time()
+                try:
+                    for start in range(0, len(disk_keys), 500):
+                        batch = disk_keys[start : start + 500]
+                        rows = self.conn.execute(
+                            f"SELECT key, dtype, vector FROM embeddings WHERE namespace = ? AND key IN ({','.join('?' * len(batch))})",
+                            [self.namespace] + batch,
+                        ).fetchall()
+                        for key, dtype, blob in rows:
+                            vector = np.frombuffer(blob, dtype=dtype)
+                            self._remember(key, vector)
+                            for i in pending.pop(key):
+                                found[i] = vector
+                                self.metrics["disk_hits"] += 1
+                        self.conn.executemany(
+                            "UPDATE embeddings SET last_access = ? WHERE namespace = ? AND key = ?",
+                            [(now, self.namespace, key) for key, _, _ in rows],
+                        )
+                    self.conn.commit()
+                except sqlite3.Error as e:
+                    print(f"[WARN] Embedding cache read failed: {e}")
+            self.metrics["misses"] += sum(len(v) for v in pending.values())
+        return found
+
+    def put_many(self, texts, embeddings):
+        embeddings = np.asarray(embeddings)
+        now = time.time()
+        rows = {}
+        with self._lock:
+            for text, vector in zip(texts, embeddings):
+                key = self._key(text)
+                vector = np.array(vector, copy=True)
+                self._remember(key, vector)
+                rows[key] = (
+                    self.namespace,
+                    key,
+                    vector.dtype.str,
+                    vector.tobytes(),
+                    now,
+                )
+            if self.conn is None or not rows:
+                return
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (namespace, key, dtype, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                    list(rows.values()),
+                )
+                self.conn.commit()
+                self.metrics["writes"] += len(rows)
+                self._disk_bytes += sum(len(r[3]) for r in rows.values())
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict()
+            except sqlite3.Error as e:
+                print(f"[WARN] Embedding cache write failed: {e}")
+
+    def _evict(self):
+        """
+        Drop least-recently-used rows, of any namespace, until the file is
+        under 90% of its budget.
+        """
+        self._disk_bytes = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+        while self._disk_bytes > target:
+            rows = self.conn.execute(
+                "SELECT namespace, key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            for namespace, key, size in rows:
+                if self._disk_bytes <= target:
+                    break
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                )
+                if namespace == self.namespace:
+                    self._memory.pop(key, None)
+                self._disk_bytes -= size
+                evicted += 1
+        self.conn.commit()
+        self.metrics["evictions"] += evicted
+
+    def stats(self):
+        lookups = (
+            self.metrics["memory_hits"]
+            + self.metrics["disk_hits"]
+            + self.metrics["misses"]
+        )
+        hits = self.metrics["memory_hits"] + self.metrics["disk_hits"]
+        return dict(
+            self.metrics,
+            hit_rate=hits / lookups if lookups else 0.0,
+            memory_items=len(self._memory),
+            disk_mb=self._disk_bytes / 2**20,
+        )
+
+    def purge_namespaces(self, keep=None):
+        """
+        Delete rows of every namespace not in keep (default: only this
+        cache's own), e.g. after retiring a model. Returns the rows deleted.
+        """
+        keep = list(keep) if keep is not None else [self.namespace]
+        with self._lock:
+            if self.conn is None:
+                return 0
+            if keep:
+                purged = self.conn.execute(
+                    f"DELETE FROM embeddings WHERE namespace NOT IN ({','.join('?' * len(keep))})",
+                    keep,
+                ).rowcount
+            else:
+                purged = self.conn.execute("DELETE FROM embeddings").rowcount
+            self.conn.commit()
+            if self.namespace not in keep:
+                self._memory.clear()
+            self._disk_bytes = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            print(f"[INFO] Purged {purged} embedding cache rows from other namespaces.")
+            return purged
+
+    def clear(self):
+        """Drop this namespace's vectors; other namespaces are left alone."""
+        with self._lock:
+            self._memory.clear()
+            if self.conn is not None:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE namespace = ?", (self.namespace,)
+                )
+                self.conn.commit()
+                self._disk_bytes = self.conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+                ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,241 @@
+"""
+ShieldCraft AI Core - Multi-Process Embedding Pool
+
+Runs N EmbeddingModel replicas in worker processes, each pinned to its own
+CPU subset with matching torch thread count, which scales far better on
+many-core ingestion hosts than one process with wide intra-op threading.
+Workers write vectors straight into a multiprocessing.shared_memory array
+owned by the parent, so only texts and row offsets cross process boundaries.
+A worker that dies or stalls is restarted and its chunk re-queued.
+"""
+
+import os
+import queue
+import time
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+
+def _cpu_subsets(workers, threads_per_worker):
+    """Split the CPUs this process may use into one disjoint block per worker."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    subsets = []
+    for i in range(workers):
+        block = cpus[i * threads_per_worker : (i + 1) * threads_per_worker]
+        # More replicas than CPU blocks: wrap around rather than leave unpinned.
+        subsets.append(block or cpus[(i * threads_per_worker) % len(cpus) :][:1])
+    return subsets
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # The parent owns the segment; stop this process's tracker from unlinking it.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _worker_main(worker_id, config, cpus, tasks, results):
+    """Worker loop: load one replica, then encode chunks into shared memory."""
+    try:
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        import torch
+
+        torch.set_num_threads(max(1, len(cpus)))
+        from ai_core.embedding.embedding import EmbeddingModel
+
+        model = EmbeddingModel(config=dict(config, cache_enabled=False))
+        if model.model is None:
+            results.put(("init_error", worker_id, None, model._init_error))
+            return
+        results.put(("ready", worker_id, None, model.dimension))
+    except Exception as e:
+        results.put(("init_error", worker_id, None, str(e)))
+        return
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, shm_name, shape, start, texts = task
+        try:
+            result = model.encode(texts)
+            if not result["success"]:
+                results.put(("error", worker_id, task_id, result["error"]))
+                continue
+            shm = _attach(shm_name)
+            try:
+                out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+                out[start : start + len(texts)] = result["embeddings"]
+                del out
+            finally:
+                shm.close()
+            results.put(("done", worker_id, task_id, None))
+        except Exception as e:
+            results.put(("error", worker_id, task_id, str(e)))
+
+
+class EmbeddingPool:
+    """
+    Pool of EmbeddingModel worker processes. Config keys (embedding section):
+    parallel_workers (0 = one per CPU block), parallel_threads_per_worker,
+    parallel_chunk_rows, parallel_max_restarts, parallel_task_timeout_s,
+    parallel_start_method.
+    """
+
+    def __init__(self, config, workers=None):
+        self.config = dict(config)
+        self.threads_per_worker = max(
+            1, int(self.config.get("parallel_threads_per_worker", 4))
+        )
+        workers = workers or self.config.get("parallel_workers", 0)
+        if not workers:
+            workers = max(1, (os.cpu_count() or 1) // self.threads_per_worker)
+        self.workers = int(workers)
+        self.chunk_rows = self.config.get("parallel_chunk_rows", 512)
+        self.max_restarts = self.config.get("parallel_max_restarts", 3)
+        self.task_timeout = self.config.get("parallel_task_timeout_s", 300)
+        self._ctx = mp.get_context(self.config.get("parallel_start_method", "spawn"))
+        self._cpus = _cpu_subsets(self.workers, self.threads_per_worker)
+        self._results = self._ctx.Queue()
+        self._procs = {}
+        self._tasks = {}
+        self.dimension = None
+        self.restarts = 0
+        for worker_id in range(self.workers):
+            self._start_worker(worker_id)
+        ready = 0
+        deadline = time.monotonic() + self.task_timeout
+        while ready < self.workers:
+            kind, worker_id, _, payload = self._next_message(deadline)
+            if kind in ("init_error", "died"):
+                self.close()
+                raise RuntimeError(
+                    f"Embedding worker {worker_id} failed to start: {payload or 'process exited'}"
+                )
+            if kind == "ready":
+                self.dimension = payload
+                ready += 1
+        print(
+            f"[INFO] Embedding pool ready: {self.workers} workers x {self.threads_per_worker} threads | Dimension: {self.dimension}"
+        )
+
+    def _start_worker(self, worker_id):
+        tasks = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.config, self._cpus[worker_id], tasks, self._results),
+            daemon=True,
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+        self._tasks[worker_id] = tasks
+
+    def _restart_worker(self, worker_id):
+        if self.restarts >= self.max_restarts:
+            raise RuntimeError(
+                f"Embedding pool exceeded {self.max_restarts} worker restarts"
+            )
+        self.restarts += 1
+        proc = self._procs[worker_id]
+        if proc.is_alive():
+            proc.terminate()
+        proc.join(timeout=5)
+        print(
+            f"[WARN] Restarting embedding worker {worker_id} (exit code {proc.exitcode}) | Restarts: {self.restarts}"
+        )
+        self._start_worker(worker_id)
+
+    def _next_message(self, deadline):
+        while True:
+            try:
+                return self._results.get(timeout=0.5)
+            except queue.Empty:
+                dead = [w for w, p in self._procs.items() if not p.is_alive()]
+                if dead:
+                    return ("died", dead[0], None, None)
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Embedding pool timed out waiting for workers")
+
+    def encode(self, texts):
+        """Encode texts across workers; returns a float32 (len(texts), dim) array."""
+        shape = (len(texts), self.dimension)
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(1, len(texts) * self.dimension * 4)
+        )
+        try:
+            pending = [
+                (task_id, start)
+                for task_id, start in enumerate(range(0, len(texts), self.chunk_rows))
+            ]
+            pending.reverse()
+            in_flight = {}  # worker_id -> (task_id, start, deadline)
+            idle = set(self._procs)
+            while pending or in_flight:
+                while pending and idle:
+                    worker_id = idle.pop()
+                    task_id, start = pending.pop()
+                    self._tasks[worker_id].put(
+                        (
+                            task_id,
+                            shm.name,
+                            shape,
+                            start,
+                            texts[start : start + self.chunk_rows],
+                        )
+                    )
+                    in_flight[worker_id] = (
+                        task_id,
+                        start,
+                        time.monotonic() + self.task_timeout,
+                    )
+                deadline = min(
+                    (d for _, _, d in in_flight.values()),
+                    default=time.monotonic() + self.task_timeout,
+                )
+                try:
+                    kind, worker_id, task_id, payload = self._next_message(deadline)
+                except TimeoutError:
+                    if not in_flight:
+                        raise
+                    # A stalled worker is treated like a dead one.
+                    worker_id = min(in_flight, key=lambda w: in_flight[w][2])
+                    kind, payload = "died", None
+                if kind == "done":
+                    in_flight.pop(worker_id, None)
+                    idle.add(worker_id)
+                elif kind == "error":
+                    raise RuntimeError(f"Embedding worker {worker_id}: {payload}")
+                elif kind == "died":
+                    lost = in_flight.pop(worker_id, None)
+                    if lost is not None:
+                        pending.append(lost[:2])
+                    idle.discard(worker_id)
+                    self._restart_worker(worker_id)
+                elif kind == "ready":
+                    idle.add(worker_id)
+                elif kind == "init_error":
+                    raise RuntimeError(
+                        f"Embedding worker {worker_id} failed on restart: {payload}"
+                    )
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        for worker_id, proc in self._procs.items():
+            if proc.is_alive():
+                self._tasks[worker_id].put(None)
+        for proc in self._procs.values():
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = {}
+        self._tasks = {}
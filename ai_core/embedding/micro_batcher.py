@@ -0,0 +1,163 @@
+"""
+ShieldCraft AI Core - Asyncio Embedding Micro-Batcher
+
+Coalesces concurrent single-text embedding requests into one
+EmbeddingModel.encode() call. A batch is flushed when it reaches
+microbatch_max_size requests or when the oldest request has waited
+microbatch_max_wait_ms. encode() is blocking, so it runs on a one-thread
+executor while the next batch gathers on the event loop.
+
+Backpressure: the queue is bounded (microbatch_max_queue); when it is full,
+requests are rejected immediately instead of queueing without limit.
+Each request also has its own deadline (microbatch_timeout_s).
+"""
+
+import asyncio
+import concurrent.futures
+import time
+from collections import deque
+import numpy as np
+
+
+class EmbeddingMicroBatcher:
+    """
+    embed(text) returns {"success", "embedding", "error", "error_type",
+    "latency_ms"}. error_type is "overloaded", "timeout" or "failed".
+    """
+
+    def __init__(self, embedder, config=None):
+        config = config or {}
+        self.embedder = embedder
+        self.max_batch_size = config.get("microbatch_max_size", 64)
+        self.max_wait = config.get("microbatch_max_wait_ms", 5) / 1000.0
+        self.max_queue = config.get("microbatch_max_queue", 1024)
+        self.timeout = config.get("microbatch_timeout_s", 2.0)
+        self._latencies = deque(maxlen=config.get("microbatch_latency_window", 10000))
+        self._queue = None
+        self._worker = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="embedding-batcher"
+        )
+        self.metrics = {
+            "requests": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "batches": 0,
+            "batched_requests": 0,
+        }
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher closed."))
+        self._executor.shutdown(wait=False)
+
+    async def embed(self, text, timeout=None):
+        await self.start()
+        result = {
+            "success": False,
+            "embedding": None,
+            "error": None,
+            "error_type": None,
+            "latency_ms": None,
+        }
+        self.metrics["requests"] += 1
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future, start))
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            result["error"] = (
+                f"Embedding queue full ({self.max_queue} pending); retry later."
+            )
+            result["error_type"] = "overloaded"
+            return result
+        try:
+            # shield: a timed-out request leaves its future for the worker to skip.
+            result["embedding"] = await asyncio.wait_for(
+                asyncio.shield(future), timeout or self.timeout
+            )
+            result["success"] = True
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.metrics["timeouts"] += 1
+            result["error"] = f"Embedding timed out after {timeout or self.timeout}s."
+            result["error_type"] = "timeout"
+        except Exception as e:
+            result["error"] = str(e)
+            result["error_type"] = "failed"
+        result["latency_ms"] = (time.perf_counter() - start) * 1000
+        if result["success"]:
+            self._latencies.append(result["latency_ms"])
+        return result
+
+    async def _collect(self):
+        """Wait for one request, then gather more until full or max_wait passes."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Requests that already timed out are dropped before the forward pass.
+        return [item for item in batch if not item[1].done()]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            texts = [text for text, _, _ in batch]
+            try:
+                result = await loop.run_in_executor(
+                    self._executor, self.embedder.encode, texts
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            self.metrics["batches"] += 1
+            self.metrics["batched_requests"] += len(batch)
+            for i, (_, future, _) in enumerate(batch):
+                if future.done():
+                    continue
+                if result.get("success"):
+                    future.set_result(result["embeddings"][i])
+                else:
+                    self.metrics["errors"] += 1
+                    future.set_exception(
+                        RuntimeError(result.get("error") or "Embedding failed.")
+                    )
+
+    def stats(self):
+        latencies = np.asarray(self._latencies, dtype=np.float64)
+        return dict(
+            self.metrics,
+            queue_depth=self._queue.qsize() if self._queue is not None else 0,
+            mean_batch_size=(
+                self.metrics["batched_requests"] / self.metrics["batches"]
+                if self.metrics["batches"]
+                else 0.0
+            ),
+            p50_ms=float(np.percentile(latencies, 50)) if len(latencies) else None,
+            p99_ms=float(np.percentile(latencies, 99)) if len(latencies) else None,
+        )
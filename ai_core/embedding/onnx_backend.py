@@ -0,0 +1,134 @@
+"""
+ShieldCraft AI Core - ONNX Runtime Embedding Backend
+
+CPU inference for EmbeddingModel through ONNX Runtime. The transformer is
+exported once to ONNX (optionally dynamic-int8 quantized) and cached on disk
+per model revision, so later starts load the graph directly. OnnxEncoder
+mimics the HF model call surface (model(**inputs).last_hidden_state), so
+EmbeddingModel's batching and pooling are shared across backends.
+"""
+
+import os
+import re
+import time
+import numpy as np
+import torch
+
+ONNX_OPSET = 17
+
+
+def onnx_cache_dir(cache_root, model_name, revision, quantize):
+    """Directory holding the exported graph for one model revision."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    variant = "int8" if quantize else "fp32"
+    return os.path.join(
+        cache_root, f"{safe_name}-{(revision or 'local')[:12]}", variant
+    )
+
+
+def export_onnx(model, path, opset=ONNX_OPSET):
+    """Export an HF encoder to ONNX with dynamic batch and sequence axes."""
+    model = model.to("cpu").float().eval()
+    dummy = {
+        "input_ids": torch.ones((2, 8), dtype=torch.long),
+        "attention_mask": torch.ones((2, 8), dtype=torch.long),
+    }
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (),
+            path,
+            kwargs=dummy,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "last_hidden_state": dynamic,
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime session over an exported encoder. Config keys:
+    onnx_cache_dir, onnx_quantize (dynamic int8 weights for MatMul/Gemm),
+    onnx_intra_op_threads, onnx_inter_op_threads (0 = runtime default).
+    """
+
+    def __init__(self, model_name, model_config, config=None):
+        import onnxruntime as ort
+
+        config = config or {}
+        # HF config of the source model: hidden_size and the revision that
+        # keys the on-disk graph.
+        self.config = model_config
+        self.quantize = config.get("onnx_quantize", True)
+        self.intra_op_threads = config.get("onnx_intra_op_threads", 0)
+        self.inter_op_threads = config.get("onnx_inter_op_threads", 1)
+        directory = onnx_cache_dir(
+            config.get("onnx_cache_dir", "./embedding_cache/onnx"),
+            model_name,
+            getattr(model_config, "_commit_hash", None),
+            self.quantize,
+        )
+        self.path = os.path.join(directory, "model.onnx")
+        if not os.path.exists(self.path):
+            self._export(model_name, directory)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(
+            self.path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        print(
+            f"[INFO] ONNX Runtime session ready: {self.path} | Int8: {self.quantize} | Threads: intra={self.intra_op_threads} inter={self.inter_op_threads}"
+        )
+
+    def _export(self, model_name, directory):
+        from transformers import AutoModel
+
+        start = time.perf_counter()
+        os.makedirs(directory, exist_ok=True)
+        model = AutoModel.from_pretrained(model_name)
+        float_path = os.path.join(directory, "model.fp32.onnx")
+        # Write to temp names and rename last, so an interrupted export
+        # never leaves a half-written graph that later starts would load.
+        export_onnx(model, float_path + ".tmp")
+        os.replace(float_path + ".tmp", float_path)
+        if self.quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(
+                float_path, self.path + ".tmp", weight_type=QuantType.QInt8
+            )
+            os.replace(self.path + ".tmp", self.path)
+            os.remove(float_path)
+        else:
+            os.replace(float_path, self.path)
+        print(
+            f"[INFO] Exported {model_name} to ONNX in {time.perf_counter() - start:.1f}s | {self.path}"
+        )
+
+    def to(self, device):
+        if device != "cpu":
+            print(f"[WARN] ONNX backend runs on CPU; ignoring device '{device}'.")
+        return self
+
+    def eval(self):
+        return self
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        feeds = {
+            "input_ids": input_ids.cpu().numpy().astype(np.int64),
+            "attention_mask": attention_mask.cpu().numpy().astype(np.int64),
+        }
+        feeds = {k: v for k, v in feeds.items() if k in self.input_names}
+        (hidden,) = self.session.run(["last_hidden_state"], feeds)
+        return type("OnnxOutput", (), {"last_hidden_state": torch.from_numpy(hidden)})()
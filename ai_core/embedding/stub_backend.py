@@ -0,0 +1,84 @@
+"""
+ShieldCraft AI Core - Stub Embedding Backend
+
+Zero-cost counterpart of ShieldCraftAICore's 'stub' model for load tests and
+profiling: no download, no tokenizer, no torch. Each text maps to a fixed
+pseudo-random vector derived from a hash of its content, so the same text
+always embeds identically (cache and dedup behaviour stay realistic) and
+throughput is bounded by memory bandwidth rather than inference.
+"""
+
+import hashlib
+import numpy as np
+
+STUB_DIMENSION = 384
+
+# splitmix64 constants: a counter-based generator, so every element is an
+# independent function of (text hash, position) with no per-row RNG state.
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def text_seeds(texts):
+    """64-bit content hash per text."""
+    return np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little"
+            )
+            for t in texts
+        ),
+        dtype=np.uint64,
+        count=len(texts),
+    )
+
+
+def stub_vectors(seeds, dimension):
+    """float32 (len(seeds), dimension) array, uniform in [-1, 1), one row per seed."""
+    counters = np.arange(dimension, dtype=np.uint64) * _GOLDEN
+    z = seeds[:, None] * _MIX2 + counters[None, :]
+    z ^= z >> np.uint64(30)
+    z *= _MIX1
+    z ^= z >> np.uint64(27)
+    z *= _MIX2
+    z ^= z >> np.uint64(31)
+    # Top 24 bits -> exact float32 in [0, 1), then shift to [-1, 1).
+    out = (z >> np.uint64(40)).astype(np.float32)
+    out *= np.float32(2.0 / (1 << 24))
+    out -= np.float32(1.0)
+    return out
+
+
+class StubEncoder:
+    """
+    Stands in for the HF model: config.hidden_size and a direct encode().
+    A text's vector is the sum of eight rows, one from each of eight fixed
+    256-row tables, picked by the bytes of its 64-bit hash, so encoding is a
+    few cache-resident gathers per block of rows.
+    """
+
+    block_rows = 4096
+
+    def __init__(self, dimension):
+        self.dimension = int(dimension)
+        self.tables = stub_vectors(
+            np.arange(8 * 256, dtype=np.uint64), self.dimension
+        ).reshape(8, 256, self.dimension)
+        # Revision feeds the embedding cache namespace, so it tracks dimension.
+        self.config = type(
+            "StubConfig",
+            (),
+            {"hidden_size": self.dimension, "_commit_hash": f"stub-{self.dimension}"},
+        )()
+
+    def encode(self, texts):
+        picks = text_seeds(texts).view(np.uint8).reshape(-1, 8)
+        out = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), self.block_rows):
+            rows = picks[start : start + self.block_rows]
+            block = out[start : start + self.block_rows]
+            np.take(self.tables[0], rows[:, 0], axis=0, out=block)
+            for k in range(1, 8):
+                block += self.tables[k][rows[:, k]]
+        return out
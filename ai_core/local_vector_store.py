@@ -0,0 +1,1048 @@
+"""
+ShieldCraft AI Core - Local In-Process Vector Store (NumPy, mmap-persisted)
+
+Drop-in VectorStore backend for dev, CI and edge deployments without Postgres.
+Vectors live in a float32/float16 matrix saved as .npy and memory-mapped on
+load; queries use exact (flat) search or an IVF index trained with k-means.
+Quantized storage modes (int8, binary, pq) keep compact codes in RAM for
+pre-ranking and re-rank the survivors against the mmap'd float32 vectors.
+"""
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from infra.utils.config_loader import get_config_loader
+from ai_core.vector_backend import (
+    INDEX_TYPES,
+    METRICS,
+    RRF_K,
+    UPSERT_KEYS,
+    VectorStoreBackend,
+    content_hash,
+    lexical_tokens,
+    normalize_filters,
+    split_metadata,
+)
+from ai_core.vector_quantization import QUANTIZED_MODES, get_quantizer, kmeans
+
+STORAGE_MODES = ("float32", "float16") + QUANTIZED_MODES
+_MANIFEST = "manifest.json"
+_FORMAT_VERSION = 2
+_SEARCH_BLOCK_ROWS = 65536
+_QUANTIZER_TRAIN_ROWS = 65536
+
+
+def _save_array(path, array):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _load_array(path):
+    return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+
+def _load_column(path, count, fill, dtype):
+    # Columns added after format version 1 default to "unset" for old stores.
+    array = _load_array(path)
+    return array if array is not None else np.full(count, fill, dtype=dtype)
+
+
+def _json_contains(doc, pattern):
+    """Python equivalent of jsonb's @> containment operator."""
+    if isinstance(pattern, dict):
+        return isinstance(doc, dict) and all(
+            k in doc and _json_contains(doc[k], v) for k, v in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(doc, list) and all(
+            any(_json_contains(d, p) for d in doc) for p in pattern
+        )
+    if isinstance(doc, list):
+        return any(_json_contains(d, pattern) for d in doc)
+    return doc == pattern
+
+
+def _grow(array, count, needed, dtype, width=None):
+    """Return a writable in-RAM array with room for `needed` rows (doubling)."""
+    capacity = 0 if array is None else array.shape[0]
+    writable = array is not None and not isinstance(array, np.memmap)
+    if writable and capacity >= needed:
+        return array
+    new_capacity = max(needed, 2 * capacity, 1024)
+    shape = (new_capacity,) if width is None else (new_capacity, width)
+    grown = np.zeros(shape, dtype=dtype)
+    if count:
+        grown[:count] = array[:count]
+    return grown
+
+
+class _StringColumn:
+    """
+    String column persisted as one UTF-8 blob plus int64 offsets. Loaded
+    columns decode lazily from the mmap; the first write materializes a list.
+    """
+
+    def __init__(self, values=None):
+        self._values = list(values) if values is not None else []
+        self._blob = None
+        self._offsets = None
+
+    @classmethod
+    def load(cls, path, name):
+        column = cls()
+        offsets = _load_array(os.path.join(path, f"{name}_offsets.npy"))
+        if offsets is None:
+            return column
+        column._values = None
+        column._offsets = offsets
+        blob_path = os.path.join(path, f"{name}.bin")
+        column._blob = (
+            np.memmap(blob_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(blob_path) > 0
+            else np.zeros(0, dtype=np.uint8)
+        )
+        return column
+
+    def __len__(self):
+        if self._values is not None:
+            return len(self._values)
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if self._values is not None:
+            return self._values[i]
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def _materialize(self):
+        if self._values is None:
+            self._values = [self[i] for i in range(len(self))]
+            self._blob = None
+            self._offsets = None
+
+    def __setitem__(self, i, value):
+        self._materialize()
+        self._values[i] = value
+
+    def append(self, value):
+        self._materialize()
+        self._values.append(value)
+
+    def pop(self):
+        self._materialize()
+        return self._values.pop()
+
+    def save(self, path, name):
+        if self._values is None:
+            return
+        encoded = [v.encode("utf-8") for v in self._values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob_path = os.path.join(path, f"{name}.bin")
+        with open(blob_path + ".tmp", "wb") as f:
+            f.write(b"".join(encoded))
+        os.replace(blob_path + ".tmp", blob_path)
+        _save_array(os.path.join(path, f"{name}_offsets.npy"), offsets)
+
+
+class _LexicalIndex:
+    """
+    In-process BM25 inverted index: term -> {row: term frequency}. Rows are
+    re-indexed in place on upsert, so replaced chunks drop their old terms.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.row_terms = {}
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.total_length = 0.0
+
+    def remove_row(self, row):
+        for term in self.row_terms.pop(row, ()):
+            posting = self.postings[term]
+            del posting[row]
+            if not posting:
+                del self.postings[term]
+        if row < len(self.lengths):
+            self.total_length -= float(self.lengths[row])
+            self.lengths[row] = 0
+
+    def set_row(self, row, text):
+        self.remove_row(row)
+        terms = lexical_tokens(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[row] = tf
+        self.row_terms[row] = tuple(counts)
+        if row >= len(self.lengths):
+            self.lengths = _grow(self.lengths, len(self.lengths), row + 1, np.float32)
+        self.lengths[row] = len(terms)
+        self.total_length += len(terms)
+
+    def scores(self, query_text, count):
+        """BM25 score per row (0 for rows sharing no term with the query)."""
+        scores = np.zeros(count, dtype=np.float32)
+        n_docs = len(self.row_terms)
+        if n_docs == 0:
+            return scores
+        avg_length = max(self.total_length / n_docs, 1e-9)
+        for term in set(lexical_tokens(query_text)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            rows = np.fromiter(posting.keys(), dtype=np.int64, count=df)
+            tf = np.fromiter(posting.values(), dtype=np.float32, count=df)
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+            norm = tf + self.k1 * (
+                1 - self.b + self.b * self.lengths[rows] / avg_length
+            )
+            scores[rows] += idf * tf * (self.k1 + 1) / norm
+        return scores
+
+
+class LocalVectorStore(VectorStoreBackend):
+    def __init__(self, config=None, dimension=None):
+        config_loader = get_config_loader()
+        if config is None:
+            config = config_loader.get_section("vector_store")
+        self.path = config.get("local_path", "./vector_index")
+        self.table_name = config.get("table_name", "embeddings")
+        self.batch_size = config.get("batch_size", 100)
+        self.dimension = dimension or config.get("dimension")
+        self.metric = config.get("metric", "cosine")
+        self.index_type = config.get("index_type", "hnsw")
+        self.storage_mode = config.get("storage_mode", "float32")
+        self.upsert_key = config.get("upsert_key", "content_hash")
+        self.ivf_lists = config.get("ivf_lists", 100)
+        self.probes = config.get("probes", 1)
+        self.kmeans_iters = config.get("kmeans_iters", 10)
+        self.prefilter_max_rows = config.get("prefilter_max_rows", 50000)
+        self.pq_m = config.get("pq_m", 48)
+        # Quantized modes pre-rank top_k * rerank_factor rows before re-ranking.
+        self.rerank_factor = config.get("rerank_factor", 10)
+        self.bm25_k1 = config.get("bm25_k1", 1.2)
+        self.bm25_b = config.get("bm25_b", 0.75)
+        self.rrf_k = config.get("rrf_k", RRF_K)
+        self.hybrid_weights = config.get("hybrid_weights")
+        self.hybrid_candidates = config.get("hybrid_candidates")
+        if self.metric not in METRICS:
+            print(f"[WARN] Unknown metric: {self.metric}, using 'cosine'.")
+            self.metric = "cosine"
+        if self.index_type not in INDEX_TYPES:
+            print(f"[WARN] Unknown index_type: {self.index_type}, using 'ivfflat'.")
+            self.index_type = "ivfflat"
+        elif self.index_type == "hnsw":
+            # Graph construction is inherently per-node Python work; IVF trains
+            # and searches with vectorized NumPy, so it is the local ANN engine.
+            print("[INFO] Local vector store uses IVF for index_type 'hnsw'.")
+            self.index_type = "ivfflat"
+        if self.storage_mode not in STORAGE_MODES:
+            print(f"[WARN] Unknown storage_mode: {self.storage_mode}, using 'float32'.")
+            self.storage_mode = "float32"
+        if self.upsert_key not in UPSERT_KEYS:
+            print(
+                f"[WARN] Unknown upsert_key: {self.upsert_key}, using 'content_hash'."
+            )
+            self.upsert_key = "content_hash"
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self._count = 0
+        self._vectors = None
+        self._norms = None
+        self._hashes = None
+        self._chunk_indices = None
+        self._doc_ids = _StringColumn()
+        self._texts = _StringColumn()
+        self._source_codes = None
+        self._source_vocab = []
+        self._event_times = None
+        self._severities = None
+        self._metadata = _StringColumn()
+        self._centroids = None
+        self._assignments = None
+        self._list_order = None
+        self._list_bounds = None
+        self._key_rows = None
+        self._lexical = None
+        self._quantizer = None
+        self._codes = None
+        self._dirty = False
+
+    def _load(self):
+        manifest_path = os.path.join(self.path, _MANIFEST)
+        if not os.path.exists(manifest_path):
+            print(f"[INFO] Local vector store initialized (empty) at {self.path}")
+            return
+        start = time.perf_counter()
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("storage_mode", "float32") != self.storage_mode:
+            print(
+                f"[WARN] Index at {self.path} was written with storage_mode={manifest.get('storage_mode')}; using that."
+            )
+            self.storage_mode = manifest.get("storage_mode", "float32")
+        self._count = manifest["count"]
+        self.dimension = manifest["dimension"]
+        self.metric = manifest.get("metric", self.metric)
+        self._vectors = _load_array(os.path.join(self.path, "vectors.npy"))
+        self._norms = _load_array(os.path.join(self.path, "norms.npy"))
+        self._hashes = _load_array(os.path.join(self.path, "hashes.npy"))
+        self._chunk_indices = _load_array(os.path.join(self.path, "chunk_indices.npy"))
+        self._doc_ids = _StringColumn.load(self.path, "doc_ids")
+        self._texts = _StringColumn.load(self.path, "texts")
+        n = self._count
+        self._source_vocab = manifest.get("source_vocab", [])
+        self._source_codes = _load_column(
+            os.path.join(self.path, "source_codes.npy"), n, -1, np.int32
+        )
+        self._event_times = _load_column(
+            os.path.join(self.path, "event_times.npy"), n, np.nan, np.float64
+        )
+        self._severities = _load_column(
+            os.path.join(self.path, "severities.npy"), n, -1, np.int16
+        )
+        self._metadata = _StringColumn.load(self.path, "metadata")
+        if len(self._metadata) < n:
+            self._metadata = _StringColumn([""] * n)
+        self._centroids = _load_array(os.path.join(self.path, "centroids.npy"))
+        self._assignments = _load_array(os.path.join(self.path, "assignments.npy"))
+        quantizer_path = os.path.join(self.path, "quantizer.npz")
+        if self.storage_mode in QUANTIZED_MODES and os.path.exists(quantizer_path):
+            self._quantizer = self._new_quantizer()
+            with np.load(quantizer_path) as state:
+                self._quantizer.load_state(dict(state))
+            # Codes are the hot, scanned data: load them resident, not mmap'd.
+            self._codes = np.load(os.path.join(self.path, "codes.npy"))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"[INFO] Loaded local vector store: {self._count} vectors | dim: {self.dimension} | {elapsed_ms:.1f}ms | Path: {self.path}"
+        )
+
+    def save(self):
+        """Persist the store atomically per file; loads back via mmap."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            n = self._count
+            if n:
+                _save_array(os.path.join(self.path, "vectors.npy"), self._vectors[:n])
+                _save_array(os.path.join(self.path, "norms.npy"), self._norms[:n])
+                _save_array(os.path.join(self.path, "hashes.npy"), self._hashes[:n])
+                _save_array(
+                    os.path.join(self.path, "chunk_indices.npy"),
+                    self._chunk_indices[:n],
+                )
+                self._doc_ids.save(self.path, "doc_ids")
+                self._texts.save(self.path, "texts")
+                _save_array(
+                    os.path.join(self.path, "source_codes.npy"), self._source_codes[:n]
+                )
+                _save_array(
+                    os.path.join(self.path, "event_times.npy"), self._event_times[:n]
+                )
+                _save_array(
+                    os.path.join(self.path, "severities.npy"), self._severities[:n]
+                )
+                self._metadata.save(self.path, "metadata")
+            if self._codes is not None:
+                _save_array(os.path.join(self.path, "codes.npy"), self._codes[:n])
+                quantizer_path = os.path.join(self.path, "quantizer.npz")
+                with open(quantizer_path + ".tmp", "wb") as f:
+                    np.savez(f, **self._quantizer.state())
+                os.replace(quantizer_path + ".tmp", quantizer_path)
+            if self._centroids is not None:
+                _save_array(os.path.join(self.path, "centroids.npy"), self._centroids)
+                _save_array(
+                    os.path.join(self.path, "assignments.npy"), self._assignments[:n]
+                )
+            manifest = {
+                "version": _FORMAT_VERSION,
+                "count": n,
+                "dimension": self.dimension,
+                "metric": self.metric,
+                "storage_mode": self.storage_mode,
+                "index_type": self.index_type,
+                "source_vocab": self._source_vocab,
+                "ivf_lists": (
+                    None if self._centroids is None else len(self._centroids)
+                ),
+            }
+            manifest_path = os.path.join(self.path, _MANIFEST)
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(manifest_path + ".tmp", manifest_path)
+            self._dirty = False
+            print(f"[INFO] Saved local vector store: {n} vectors | Path: {self.path}")
+
+    def close(self):
+        if self._dirty:
+            self.save()
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, row):
+        if self.upsert_key == "content_hash":
+            return self._hashes[row].decode("ascii")
+        return (self._doc_ids[row], int(self._chunk_indices[row]))
+
+    def _ensure_key_rows(self):
+        if self._key_rows is None:
+            self._key_rows = {self._key(i): i for i in range(self._count)}
+
+    def _prepare_space(self, needed):
+        # Quantized modes keep float32 as the full-precision re-rank copy.
+        dtype = np.float16 if self.storage_mode == "float16" else np.float32
+        count = self._count
+        self._vectors = _grow(self._vectors, count, needed, dtype, self.dimension)
+        self._norms = _grow(self._norms, count, needed, np.float32)
+        self._hashes = _grow(self._hashes, count, needed, "S64")
+        self._chunk_indices = _grow(self._chunk_indices, count, needed, np.int32)
+        self._source_codes = _grow(self._source_codes, count, needed, np.int32)
+        self._event_times = _grow(self._event_times, count, needed, np.float64)
+        self._severities = _grow(self._severities, count, needed, np.int16)
+        if self._centroids is not None:
+            self._assignments = _grow(self._assignments, count, needed, np.int32)
+        if self._codes is not None:
+            (width,), code_dtype = self._quantizer.code_shape
+            self._codes = _grow(self._codes, count, needed, code_dtype, width)
+
+    def _source_code(self, source):
+        if source is None:
+            return -1
+        try:
+            return self._source_vocab.index(source)
+        except ValueError:
+            self._source_vocab.append(source)
+            return len(self._source_vocab) - 1
+
+    def upsert_embeddings(
+        self,
+        texts,
+        embeddings,
+        doc_ids=None,
+        chunk_indices=None,
+        mode=None,
+        metadata=None,
+    ):
+        if len(texts) != len(embeddings):
+            return "[ERROR] texts and embeddings must have the same length."
+        if doc_ids is None:
+            doc_ids = ["" for _ in texts]
+        if chunk_indices is None:
+            chunk_indices = list(range(len(texts)))
+        if metadata is None:
+            metadata = [None for _ in texts]
+        if (
+            len(doc_ids) != len(texts)
+            or len(chunk_indices) != len(texts)
+            or len(metadata) != len(texts)
+        ):
+            return "[ERROR] doc_ids, chunk_indices and metadata must match texts."
+        try:
+            promoted = [split_metadata(m) for m in metadata]
+        except ValueError as e:
+            return f"[ERROR] Invalid chunk metadata: {e}"
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(texts) == 0:
+            return {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0, "mode": "local"}
+        if embeddings.ndim != 2:
+            return "[ERROR] embeddings must be a 2D array."
+        if self.dimension is None:
+            self.dimension = int(embeddings.shape[1])
+        if embeddings.shape[1] != self.dimension:
+            return f"[ERROR] Embedding dimension {embeddings.shape[1]} does not match store dimension {self.dimension}."
+        start = time.perf_counter()
+        hashes = [content_hash(t) for t in texts]
+        with self._lock:
+            self._ensure_key_rows()
+            self._prepare_space(self._count + len(texts))
+            rows = np.empty(len(texts), dtype=np.int64)
+            for i, (text, doc_id, chunk_index, digest, meta) in enumerate(
+                zip(texts, doc_ids, chunk_indices, hashes, metadata)
+            ):
+                meta_json = json.dumps(promoted[i][3]) if meta is not None else ""
+                key = (
+                    digest
+                    if self.upsert_key == "content_hash"
+                    else (doc_id, int(chunk_index))
+                )
+                row = self._key_rows.get(key)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._key_rows[key] = row
+                    self._texts.append(text)
+                    self._doc_ids.append(doc_id)
+                    self._metadata.append(meta_json)
+                else:
+                    self._texts[row] = text
+                    self._doc_ids[row] = doc_id
+                    self._metadata[row] = meta_json
+                if self._lexical is not None:
+                    self._lexical.set_row(row, text)
+                rows[i] = row
+            # Duplicate keys within one call resolve to the last occurrence.
+            self._vectors[rows] = embeddings.astype(self._vectors.dtype)
+            self._norms[rows] = np.linalg.norm(embeddings, axis=1)
+            self._hashes[rows] = np.array(hashes, dtype="S64")
+            self._chunk_indices[rows] = np.asarray(chunk_indices, dtype=np.int32)
+            self._source_codes[rows] = [self._source_code(m[0]) for m in promoted]
+            self._event_times[rows] = [
+                np.nan if m[1] is None else m[1].timestamp() for m in promoted
+            ]
+            self._severities[rows] = [-1 if m[2] is None else m[2] for m in promoted]
+            if self._centroids is not None:
+                self._assignments[rows] = self._nearest_centroids(embeddings)
+                self._list_order = None
+            if self._codes is not None:
+                self._codes[rows] = self._quantizer.encode(
+                    self._clustering_space(embeddings)
+                )
+            self._dirty = True
+        elapsed = time.perf_counter() - start
+        rows_per_sec = len(texts) / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"[INFO] Upserted {len(texts)} embeddings in {elapsed:.3f}s | {rows_per_sec:.0f} rows/s | Mode: local"
+        )
+        return {
+            "rows": len(texts),
+            "seconds": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "mode": "local",
+        }
+
+    def delete_texts(self, texts):
+        """
+        Delete the rows holding texts (by content hash); returns the count
+        deleted. Each row is swap-removed with the last row, so row ids past
+        the deleted ones change.
+        """
+        hashes = np.array([content_hash(t) for t in texts], dtype="S64")
+        with self._lock:
+            if self._count == 0 or len(hashes) == 0:
+                return 0
+            rows = np.flatnonzero(np.isin(self._hashes[: self._count], hashes))
+            if len(rows) == 0:
+                return 0
+            self._ensure_key_rows()
+            self._prepare_space(self._count)  # writable copies of mmap'd columns
+            columns = [
+                self._vectors,
+                self._norms,
+                self._hashes,
+                self._chunk_indices,
+                self._source_codes,
+                self._event_times,
+                self._severities,
+            ]
+            if self._centroids is not None:
+                columns.append(self._assignments)
+            if self._codes is not None:
+                columns.append(self._codes)
+            # Highest first, so a row moved into a hole is never one still to delete.
+            for row in sorted(rows.tolist(), reverse=True):
+                last = self._count - 1
+                del self._key_rows[self._key(row)]
+                if self._lexical is not None:
+                    self._lexical.remove_row(row)
+                if row != last:
+                    self._key_rows[self._key(last)] = row
+                    for column in columns:
+                        column[row] = column[last]
+                    for strings in (self._texts, self._doc_ids, self._metadata):
+                        strings[row] = strings[last]
+                    if self._lexical is not None:
+                        self._lexical.remove_row(last)
+                        self._lexical.set_row(row, self._texts[row])
+                for strings in (self._texts, self._doc_ids, self._metadata):
+                    strings.pop()
+                self._count -= 1
+            self._list_order = None
+            self._dirty = True
+        print(f"[INFO] Deleted {len(rows)} rows from local vector store.")
+        return len(rows)
+
+    def _clustering_space(self, x):
+        # Cosine clusters on the unit sphere; l2/ip cluster on raw vectors.
+        if self.metric != "cosine":
+            return x
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        return x / np.maximum(norms, 1e-12)
+
+    def _nearest_centroids(self, x):
+        x = self._clustering_space(np.asarray(x, dtype=np.float32))
+        c = self._centroids
+        distances = (c * c).sum(axis=1) - 2.0 * (x @ c.T)
+        return distances.argmin(axis=1).astype(np.int32)
+
+    def build_index(self, rebuild=False, concurrently=False):
+        """
+        Train the IVF index: k-means over a sample (<= 256 rows per list), then
+        assign every stored vector to its nearest list.
+        """
+        if self.index_type == "none":
+            return "[ERROR] index_type is 'none'; nothing to build."
+        if self._count == 0:
+            return "[ERROR] Vector store is empty; load data before building the index."
+        if self._centroids is not None and not rebuild:
+            return {"index": "ivfflat", "seconds": 0.0, "lists": len(self._centroids)}
+        start = time.perf_counter()
+        with self._lock:
+            n = self._count
+            lists = int(min(self.ivf_lists, n))
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(
+                rng.choice(n, size=min(n, lists * 256), replace=False)
+            )
+            sample = self._clustering_space(
+                np.asarray(self._vectors[sample_rows], dtype=np.float32)
+            )
+            self._centroids = kmeans(sample, lists, self.kmeans_iters)
+            assignments = np.empty(n, dtype=np.int32)
+            for block in range(0, n, _SEARCH_BLOCK_ROWS):
+                rows = slice(block, min(block + _SEARCH_BLOCK_ROWS, n))
+                assignments[rows] = self._nearest_centroids(self._vectors[rows])
+            self._assignments = assignments
+            self._list_order = None
+            if self.storage_mode in QUANTIZED_MODES and (
+                rebuild or self._codes is None
+            ):
+                self._train_quantizer()
+            self._dirty = True
+        elapsed = time.perf_counter() - start
+        print(
+            f"[INFO] Built local IVF index in {elapsed:.2f}s | lists: {lists} | vectors: {n}"
+        )
+        return {"index": "ivfflat", "seconds": elapsed, "lists": lists}
+
+    def _candidate_rows(self, query, probes):
+        if self._centroids is None or self.index_type == "none":
+            return None
+        if self._list_order is None:
+            assignments = np.asarray(self._assignments[: self._count])
+            self._list_order = np.argsort(assignments, kind="stable")
+            self._list_bounds = np.searchsorted(
+                assignments[self._list_order], np.arange(len(self._centroids) + 1)
+            )
+        probes = int(min(max(1, probes), len(self._centroids)))
+        distances = self._nearest_list_distances(query)
+        nearest = np.argpartition(distances, probes - 1)[:probes]
+        return np.concatenate(
+            [
+                self._list_order[
+                    self._list_bounds[list_id] : self._list_bounds[list_id + 1]
+                ]
+                for list_id in nearest
+            ]
+        )
+
+    def _nearest_list_distances(self, query):
+        q = self._clustering_space(query[None, :])[0]
+        c = self._centroids
+        return (c * c).sum(axis=1) - 2.0 * (c @ q)
+
+    def _distances(self, vectors, norms, query, query_norm):
+        # Same semantics as the pgvector operators: smaller is closer.
+        dots = np.asarray(vectors, dtype=np.float32) @ query
+        if self.metric == "ip":
+            return -dots
+        if self.metric == "cosine":
+            return 1.0 - dots / np.maximum(norms * query_norm, 1e-12)
+        squared = norms * norms - 2.0 * dots + query_norm * query_norm
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def _scan(self, rows, top_k, score):
+        """
+        Blockwise top-k over rows (None = all); score(selector) returns
+        distances for a slice or index array of rows.
+        """
+        total = self._count if rows is None else len(rows)
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_dist = np.zeros(0, dtype=np.float32)
+        for block in range(0, total, _SEARCH_BLOCK_ROWS):
+            end = min(block + _SEARCH_BLOCK_ROWS, total)
+            if rows is None:
+                block_rows, selector = np.arange(block, end), slice(block, end)
+            else:
+                block_rows = selector = np.sort(rows[block:end])
+            dist = score(selector)
+            best_rows = np.concatenate([best_rows, block_rows])
+            best_dist = np.concatenate([best_dist, dist])
+            if len(best_dist) > top_k:
+                keep = np.argpartition(best_dist, top_k - 1)[:top_k]
+                best_rows, best_dist = best_rows[keep], best_dist[keep]
+        order = np.argsort(best_dist, kind="stable")[:top_k]
+        return best_rows[order], best_dist[order]
+
+    def _top_k(self, query, top_k, rows=None, vectors=None):
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        query_norm = float(np.linalg.norm(query))
+        vectors = self._vectors if vectors is None else vectors
+        return self._scan(
+            rows,
+            top_k,
+            lambda selector: self._distances(
+                vectors[selector], self._norms[selector], query, query_norm
+            ),
+        )
+
+    def _new_quantizer(self):
+        return get_quantizer(
+            self.storage_mode,
+            self.dimension,
+            pq_m=self.pq_m,
+            kmeans_iters=self.kmeans_iters,
+        )
+
+    def _encode_rows(self, quantizer):
+        """Train quantizer on a sample of stored vectors, then encode every row."""
+        n = self._count
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(
+            rng.choice(n, size=min(n, _QUANTIZER_TRAIN_ROWS), replace=False)
+        )
+        quantizer.train(
+            self._clustering_space(
+                np.asarray(self._vectors[sample_rows], dtype=np.float32)
+            )
+        )
+        (width,), code_dtype = quantizer.code_shape
+        codes = np.empty((n, width), dtype=code_dtype)
+        for block in range(0, n, _SEARCH_BLOCK_ROWS):
+            rows = slice(block, min(block + _SEARCH_BLOCK_ROWS, n))
+            codes[rows] = quantizer.encode(
+                self._clustering_space(np.asarray(self._vectors[rows], np.float32))
+            )
+        return codes
+
+    def _train_quantizer(self):
+        start = time.perf_counter()
+        quantizer = self._new_quantizer()
+        self._codes = self._encode_rows(quantizer)
+        self._quantizer = quantizer
+        self._dirty = True
+        print(
+            f"[INFO] Trained {self.storage_mode} quantizer in {time.perf_counter() - start:.2f}s | vectors: {self._count}"
+        )
+
+    def _ensure_codes(self):
+        # Quantizers train lazily once enough rows exist (PQ needs 256).
+        if self.storage_mode not in QUANTIZED_MODES:
+            return False
+        if self._codes is None:
+            if self._count < self._new_quantizer().min_train_rows:
+                return False
+            self._train_quantizer()
+        return True
+
+    def _quantized_top_k(self, query, top_k, rows, quantizer, codes, rerank=True):
+        """Pre-rank rows on the codes, then re-rank the best with full-precision vectors."""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        q = self._clustering_space(query[None, :])[0]
+        candidates = max(top_k, top_k * self.rerank_factor) if rerank else top_k
+        prerank_rows, prerank_dist = self._scan(
+            rows,
+            candidates,
+            lambda selector: quantizer.prerank(
+                codes[selector], q, self._norms[selector], self.metric
+            ),
+        )
+        if not rerank:
+            return prerank_rows, prerank_dist
+        return self._top_k(query, top_k, prerank_rows)
+
+    def _rank(self, query, top_k, rows=None):
+        if self._ensure_codes():
+            return self._quantized_top_k(
+                query, top_k, rows, self._quantizer, self._codes
+            )
+        return self._top_k(query, top_k, rows)
+
+    def _filter_rows(self, filters):
+        """
+        Row ids matching normalized filters. Column predicates are vectorized
+        masks; JSON containment only runs on rows that survive them.
+        """
+        n = self._count
+        mask = np.ones(n, dtype=bool)
+        if "source" in filters:
+            wanted = filters["source"]
+            wanted = wanted if isinstance(wanted, list) else [wanted]
+            codes = [
+                self._source_vocab.index(s) for s in wanted if s in self._source_vocab
+            ]
+            mask &= np.isin(self._source_codes[:n], codes)
+        if "severity" in filters:
+            wanted = filters["severity"]
+            wanted = wanted if isinstance(wanted, list) else [wanted]
+            mask &= np.isin(self._severities[:n], wanted)
+        if "min_severity" in filters:
+            mask &= self._severities[:n] >= filters["min_severity"]
+        if "start" in filters:
+            mask &= self._event_times[:n] >= filters["start"].timestamp()
+        if "end" in filters:
+            mask &= self._event_times[:n] < filters["end"].timestamp()
+        rows = np.flatnonzero(mask)
+        if "doc_id" in filters:
+            wanted = filters["doc_id"]
+            wanted = set(wanted if isinstance(wanted, list) else [wanted])
+            rows = rows[[self._doc_ids[r] in wanted for r in rows]]
+        if "metadata" in filters:
+            pattern = filters["metadata"]
+            rows = rows[
+                [
+                    bool(self._metadata[r])
+                    and _json_contains(json.loads(self._metadata[r]), pattern)
+                    for r in rows
+                ]
+            ]
+        return rows.astype(np.int64)
+
+    def search(self, query_embedding, top_k=5, probes=None, exact=False, filters=None):
+        """
+        Return (row ids, distances) nearest first. With filters, small match
+        sets are ranked exactly; large ones intersect the IVF candidates and
+        fall back to exact ranking if fewer than top_k survive.
+        """
+        with self._lock:
+            if self._count == 0 or top_k < 1:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            probes = probes if probes is not None else self.probes
+            if filters:
+                allowed = self._filter_rows(filters)
+                if exact:
+                    return self._top_k(query, top_k, allowed)
+                if len(allowed) <= self.prefilter_max_rows:
+                    return self._rank(query, top_k, allowed)
+                candidates = self._candidate_rows(query, probes)
+                if candidates is not None:
+                    candidates = np.intersect1d(candidates, allowed)
+                    if len(candidates) >= top_k:
+                        return self._rank(query, top_k, candidates)
+                return self._rank(query, top_k, allowed)
+            if exact:
+                return self._top_k(query, top_k)
+            return self._rank(query, top_k, self._candidate_rows(query, probes))
+
+    def _row_dicts(self, rows):
+        return [
+            {
+                "id": int(row),
+                "text": self._texts[row],
+                "embedding": np.asarray(self._vectors[row], dtype=np.float32),
+                "doc_id": self._doc_ids[row],
+                "chunk_index": int(self._chunk_indices[row]),
+                "metadata": (
+                    json.loads(self._metadata[row]) if self._metadata[row] else None
+                ),
+            }
+            for row in rows
+        ]
+
+    def query(
+        self, query_embedding, top_k=5, ef_search=None, probes=None, filters=None
+    ):
+        """
+        Top-k nearest neighbours as (text, embedding) tuples, matching the
+        pgvector backend. ef_search is accepted for signature parity only.
+        """
+        rows = self.query_rows(
+            query_embedding, top_k=top_k, probes=probes, filters=filters
+        )
+        if isinstance(rows, str):
+            return rows
+        return [(row["text"], row["embedding"]) for row in rows]
+
+    def query_rows(
+        self, query_embedding, top_k=5, ef_search=None, probes=None, filters=None
+    ):
+        """query() as row dicts; the id is the row number at query time."""
+        try:
+            filters = normalize_filters(filters)
+        except ValueError as e:
+            return f"[ERROR] Invalid filters: {e}"
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.dimension is not None and query.shape[0] != self.dimension:
+            return f"[ERROR] Query dimension {query.shape[0]} does not match store dimension {self.dimension}."
+        with self._lock:
+            rows, _ = self.search(query, top_k=top_k, probes=probes, filters=filters)
+            return self._row_dicts(rows)
+
+    def _ensure_lexical(self):
+        # Built lazily from the texts column (not persisted), then kept
+        # current by upsert_embeddings.
+        if self._lexical is None:
+            start = time.perf_counter()
+            lexical = _LexicalIndex(self.bm25_k1, self.bm25_b)
+            for row in range(self._count):
+                lexical.set_row(row, self._texts[row])
+            self._lexical = lexical
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"[INFO] Built lexical index: {len(lexical.postings)} terms | {self._count} rows | {elapsed_ms:.1f}ms"
+            )
+        return self._lexical
+
+    def lexical_search(self, query_text, top_k=5, filters=None):
+        """Return (row ids, BM25 scores) best first; rows without a matching term are skipped."""
+        with self._lock:
+            scores = self._ensure_lexical().scores(query_text, self._count)
+            rows = (
+                self._filter_rows(filters)
+                if filters
+                else np.arange(self._count, dtype=np.int64)
+            )
+            rows = rows[scores[rows] > 0]
+            if len(rows) > top_k:
+                rows = rows[np.argpartition(-scores[rows], top_k - 1)[:top_k]]
+            order = np.lexsort((rows, -scores[rows]))
+            return rows[order], scores[rows[order]]
+
+    def lexical_query(self, query_text, top_k=5, filters=None):
+        """Top-k rows by BM25 as (text, embedding) tuples."""
+        rows = self.lexical_rows(query_text, top_k=top_k, filters=filters)
+        if isinstance(rows, str):
+            return rows
+        return [(row["text"], row["embedding"]) for row in rows]
+
+    def lexical_rows(self, query_text, top_k=5, filters=None):
+        """Top-k rows by BM25 as row dicts (see query_rows)."""
+        try:
+            filters = normalize_filters(filters)
+        except ValueError as e:
+            return f"[ERROR] Invalid filters: {e}"
+        if top_k < 1:
+            return []
+        with self._lock:
+            rows, _ = self.lexical_search(query_text, top_k=top_k, filters=filters)
+            return self._row_dicts(rows)
+
+    def storage_report(self, sample_size=100, top_k=10, modes=None):
+        """
+        Memory footprint and recall@k of each storage mode on this store's data,
+        measured against exact search over the stored vectors. Quantized modes
+        report recall before (prerank) and after full-precision re-ranking;
+        their resident bytes are the codes plus one float32 norm per vector,
+        with the float32 vectors staying on disk.
+        """
+        if self._count == 0:
+            return "[ERROR] Vector store is empty."
+        with self._lock:
+            n, d = self._count, self.dimension
+            rng = np.random.default_rng(0)
+            sample = rng.choice(n, size=min(sample_size, n), replace=False)
+            queries = np.asarray(self._vectors[np.sort(sample)], dtype=np.float32)
+            truth = [set(self._top_k(q, top_k)[0].tolist()) for q in queries]
+            report = []
+            for mode in modes or STORAGE_MODES:
+                start = time.perf_counter()
+                if mode in QUANTIZED_MODES:
+                    quantizer = get_quantizer(
+                        mode, d, pq_m=self.pq_m, kmeans_iters=self.kmeans_iters
+                    )
+                    if n < quantizer.min_train_rows:
+                        print(
+                            f"[WARN] Skipping {mode}: needs {quantizer.min_train_rows} rows."
+                        )
+                        continue
+                    codes = self._encode_rows(quantizer)
+                    resident = codes.shape[1] * codes.itemsize + 4
+                    disk = resident + 4 * d
+
+                    def prerank(q):
+                        return self._quantized_top_k(
+                            q, top_k, None, quantizer, codes, rerank=False
+                        )[0]
+
+                    def rank(q):
+                        return self._quantized_top_k(q, top_k, None, quantizer, codes)[
+                            0
+                        ]
+
+                else:
+                    resident = disk = d * np.dtype(mode).itemsize + 4
+                    vectors = np.asarray(self._vectors[:n], dtype=mode)
+
+                    def rank(q):
+                        return self._top_k(q, top_k, vectors=vectors)[0]
+
+                    prerank = rank
+                train_seconds = time.perf_counter() - start
+                prerank_hits = sum(
+                    len(t.intersection(prerank(q).tolist()))
+                    for q, t in zip(queries, truth)
+                )
+                latencies = []
+                hits = 0
+                for q, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    rows = rank(q)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += len(expected.intersection(rows.tolist()))
+                denom = sum(len(t) for t in truth) or 1
+                entry = {
+                    "storage_mode": mode,
+                    "bytes_per_vector": resident,
+                    "resident_mb": n * resident / 2**20,
+                    "disk_mb": n * disk / 2**20,
+                    "compression": (4 * d + 4) / resident,
+                    f"recall@{top_k}_prerank": prerank_hits / denom,
+                    f"recall@{top_k}": hits / denom,
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                    "train_seconds": train_seconds,
+                }
+                report.append(entry)
+                print(
+                    f"[INFO] {mode} | {resident} B/vector ({entry['compression']:.1f}x) | recall@{top_k}: {entry[f'recall@{top_k}']:.3f} (prerank {entry[f'recall@{top_k}_prerank']:.3f}) | p50: {entry['p50_ms']:.2f}ms"
+                )
+            return report
+
+    def recall_latency_report(
+        self, sample_size=100, top_k=10, ef_search_values=None, probes_values=None
+    ):
+        """Recall@k against exact search and p50/p95 latency per probes value."""
+        if self._centroids is None:
+            return "[ERROR] IVF index not built; run build_index() first."
+        rng = np.random.default_rng(0)
+        sample = rng.choice(
+            self._count, size=min(sample_size, self._count), replace=False
+        )
+        queries = np.asarray(self._vectors[np.sort(sample)], dtype=np.float32)
+        truth = [set(self.search(q, top_k, exact=True)[0].tolist()) for q in queries]
+        report = []
+        for value in probes_values or [1, 2, 4, 8, 16, 32]:
+            latencies = []
+            hits = 0
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                rows, _ = self.search(q, top_k, probes=value)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected.intersection(rows.tolist()))
+            recall = hits / (sum(len(t) for t in truth) or 1)
+            report.append(
+                {
+                    "probes": value,
+                    f"recall@{top_k}": recall,
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                    "queries": len(queries),
+                }
+            )
+            print(
+                f"[INFO] probes={value} | recall@{top_k}: {recall:.3f} | p50: {report[-1]['p50_ms']:.2f}ms | p95: {report[-1]['p95_ms']:.2f}ms"
+            )
+        return report
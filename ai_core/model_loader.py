@@ -2,70 +2,339 @@
 ShieldCraft AI Core - Model Loader
 
 Supports cost-free 'stub' model for dev, and Hugging Face models for higher envs.
+
+generate() answers one prompt; generate_batch() runs many prompts through
+length-sorted, left-padded batches; generate_stream() yields text as tokens
+are produced and reports time-to-first-token and tokens/sec when done.
+generate() and generate_stream() reuse the KV cache of any prefix registered
+with register_prefix() (see ai_core.prefix_cache); generate() can also answer
+from the semantic response cache (see ai_core.response_cache).
 """
 
+import queue
+import threading
 import time
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
-from huggingface_hub.errors import HFValidationError
+import numpy as np
+from ai_core.model_registry import from_pretrained, get_model
+from ai_core.prefix_cache import PrefixKVCache
 
 MODEL_NAME = "mistralai/Mistral-7B-v0.1"
 
 
+class _QueueStreamer:
+    """transformers streamer (put/end) forwarding generated token ids to a queue."""
+
+    def __init__(self, events):
+        self.events = events
+        self.prompt_seen = False
+
+    def put(self, value):
+        # generate() first passes the prompt ids, then each new token.
+        if not self.prompt_seen:
+            self.prompt_seen = True
+            return
+        self.events.put(("tokens", value.reshape(-1).tolist()))
+
+    def end(self):
+        self.events.put(("end", None))
+
+
+class GenerationStream:
+    """
+    Iterator of text deltas for one prompt, generated on a background thread.
+    Once exhausted, result holds {"text", "generated_tokens", "ttft_ms",
+    "total_ms", "tokens_per_sec"}. A generation failure raises RuntimeError.
+    """
+
+    def __init__(self, target, decode):
+        self.result = None
+        self._decode = decode
+        self._events = queue.Queue()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(target,), name="llm-stream", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, target):
+        try:
+            target(_QueueStreamer(self._events))
+        except Exception as e:
+            self._events.put(("error", e))
+
+    def __iter__(self):
+        ids = []
+        text = ""
+        first = None
+        while True:
+            kind, payload = self._events.get()
+            if kind == "error":
+                raise RuntimeError(f"Generation failed: {payload}")
+            if kind == "end":
+                break
+            if first is None:
+                first = time.perf_counter()
+            ids.extend(payload)
+            # Decode the whole suffix so multi-token characters come out whole.
+            decoded = self._decode(ids)
+            delta = decoded[len(text) :]
+            text = decoded
+            if delta:
+                yield delta
+        total = time.perf_counter() - self._start
+        decode_seconds = total - (first - self._start) if first is not None else 0.0
+        self.result = {
+            "text": text,
+            "generated_tokens": len(ids),
+            "ttft_ms": (first - self._start) * 1000 if first is not None else None,
+            "total_ms": total * 1000,
+            # Steady-state rate, after the first token.
+            "tokens_per_sec": (
+                (len(ids) - 1) / decode_seconds
+                if len(ids) > 1 and decode_seconds > 0
+                else 0.0
+            ),
+        }
+        print(
+            f"[INFO] Stream complete | Tokens: {len(ids)} | TTFT: {self.result['ttft_ms'] or 0:.1f}ms | {self.result['tokens_per_sec']:.1f} tok/s"
+        )
+
+
 class ShieldCraftAICore:
-    def __init__(self, config_section: str = "ai_core"):
+    def __init__(self, config_section: str = "ai_core", config: dict = None):
         from infra.utils.config_loader import get_config_loader
 
         config_loader = get_config_loader()
         # Always load config from config_loader, prefer section override if provided
-        config = config_loader.get_section(config_section)
+        if config is None:
+            config = config_loader.get_section(config_section)
         self.model_name = config.get("model_name", MODEL_NAME)
-        self.device = config.get("device") or (
-            "cuda" if torch.cuda.is_available() else "cpu"
-        )
         self.quantize = config.get("quantize", False)
+        self.warm_start = config.get("model_warm_start", False)
+        # generate_batch: a batch closes at this many rows or padded
+        # (prompt + new) tokens, whichever comes first.
+        self.max_batch_rows = config.get("generation_max_batch_rows", 16)
+        self.max_batch_tokens = config.get("generation_max_batch_tokens", 8192)
+        self.prefix_cache_enabled = config.get("prefix_cache_enabled", True)
+        self.response_cache_enabled = config.get("response_cache_enabled", False)
+        self.response_cache = None
+        self.config = config
+        self._prefix_cache = None
+        self._model = None
+        self._tokenizer = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
         # Zero-cost stub backend for dev
         if self.model_name.strip().lower() == "stub":
-            self.model = None
-            self.tokenizer = None
+            self.device = config.get("device") or "cpu"
+            self._loaded = True
             env = config_loader.get_section("app").get("env", "unknown")
             print(
                 f"[INFO] Using stub LLM backend | Env: {env} | Device: {self.device} | Quantized: {self.quantize}"
             )
-        else:
+            return
+        import torch
+
+        self.device = config.get("device") or (
+            "cuda" if torch.cuda.is_available() else "cpu"
+        )
+        # Weights load on first generate() (or .model access) unless lazy_load is off.
+        if not config.get("lazy_load", True):
+            self._ensure_loaded()
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self._ensure_loaded()
+        return self._tokenizer
+
+    def _ensure_loaded(self):
+        """Load once from the model registry; a failure leaves model as None."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        from huggingface_hub.errors import HFValidationError
+        from infra.utils.config_loader import get_config_loader
+
+        try:
+            self._tokenizer = get_model(
+                ("tokenizer", self.model_name), self._load_tokenizer
+            )
+            # Decoder-only batches pad on the left so new tokens line up.
+            self._tokenizer.padding_side = "left"
+            if self._tokenizer.pad_token is None:
+                self._tokenizer.pad_token = self._tokenizer.eos_token
+            self._model = get_model(
+                (
+                    "causal_lm",
+                    self.model_name,
+                    self.device,
+                    "4bit" if self.quantize else "none",
+                ),
+                self._load_model,
+            )
+            env = get_config_loader().get_section("app").get("env", "unknown")
+            print(
+                f"[INFO] Loaded model: {self.model_name} | Env: {env} | Device: {self.device} | Quantized: {self.quantize}"
+            )
+        except HFValidationError as e:
+            print(f"[ERROR] Model loading failed: {e}")
+            self._model = None
+        except Exception as e:
+            print(f"[ERROR] Model loading failed: {e}")
+            self._model = None
+
+    @property
+    def prefix_cache(self):
+        """PrefixKVCache shared by every instance over the same loaded model."""
+        if self._prefix_cache is None and self.model is not None:
+            self._prefix_cache = get_model(
+                (
+                    "prefix_cache",
+                    self.model_name,
+                    self.device,
+                    "4bit" if self.quantize else "none",
+                ),
+                lambda: PrefixKVCache(self._model, self.device, self.config),
+            )
+        return self._prefix_cache
+
+    def register_prefix(self, prefix: str):
+        """
+        Precompute the KV cache for a shared prompt prefix. Prompts match on
+        token ids, so end the prefix where the tokenizer would split anyway
+        (e.g. after a newline). Returns dict with 'success', 'tokens',
+        'bytes', 'error'.
+        """
+        result = {"success": False, "tokens": 0, "bytes": 0, "error": None}
+        if self._is_stub() or not self.prefix_cache_enabled:
+            result["success"] = True
+            return result
+        if self.model is None:
+            result["error"] = "Model not loaded."
+            return result
+        try:
+            ids = self.tokenizer(prefix, return_token_type_ids=False)["input_ids"]
+            result["bytes"] = self.prefix_cache.register(ids)
+            result["tokens"] = len(ids)
+            result["success"] = True
+        except Exception as e:
+            result["error"] = f"Prefix caching failed: {e}"
+            print(f"[ERROR] Prefix caching failed: {e}")
+        return result
+
+    def _prompt_inputs(self, prompt, use_prefix_cache=True):
+        """Model inputs for one prompt, plus past_key_values if a registered prefix matches."""
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", return_token_type_ids=False
+        ).to(self.device)
+        if not (use_prefix_cache and self.prefix_cache_enabled):
+            return inputs, {}
+        _, cache = self.prefix_cache.lookup(inputs["input_ids"][0].tolist())
+        return inputs, ({"past_key_values": cache} if cache is not None else {})
+
+    def _load_tokenizer(self):
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(self.model_name)
+
+    def _load_model(self):
+        from transformers import AutoModelForCausalLM, BitsAndBytesConfig
+
+        model_kwargs = {}
+        if self.quantize:
+            model_kwargs["quantization_config"] = BitsAndBytesConfig(load_in_4bit=True)
+        model = from_pretrained(
+            AutoModelForCausalLM, self.model_name, self.warm_start, **model_kwargs
+        )
+        model.to(self.device)
+        return model
+
+    def _is_stub(self):
+        return self.model_name.strip().lower() == "stub"
+
+    def _stub_reply(self, prompt, max_new_tokens):
+        prompt_preview = (prompt or "").strip().replace("\n", " ")[:60]
+        return f"[STUB] echo: {prompt_preview} | max_new_tokens={max_new_tokens}"
+
+    def _get_response_cache(self):
+        """The SemanticResponseCache, created on first use; None if disabled."""
+        if not self.response_cache_enabled:
+            return None
+        if self.response_cache is None:
+            from ai_core.response_cache import SemanticResponseCache
+
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                model_kwargs = {}
-                if self.quantize:
-                    model_kwargs["quantization_config"] = BitsAndBytesConfig(
-                        load_in_4bit=True
-                    )
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    self.model_name, **model_kwargs
-                )
-                self.model.to(self.device)
-                env = config_loader.get_section("app").get("env", "unknown")
-                print(
-                    f"[INFO] Loaded model: {self.model_name} | Env: {env} | Device: {self.device} | Quantized: {self.quantize}"
-                )
-            except HFValidationError as e:
-                print(f"[ERROR] Model loading failed: {e}")
-                self.model = None
+                self.response_cache = SemanticResponseCache(config=self.config)
             except Exception as e:
-                print(f"[ERROR] Model loading failed: {e}")
-                self.model = None
+                print(f"[WARN] Response cache unavailable, disabling it: {e}")
+                self.response_cache_enabled = False
+                return None
+        return self.response_cache
 
-    def generate(self, prompt: str, max_new_tokens: int = 64) -> str:
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 64,
+        use_prefix_cache: bool = True,
+        context: str = None,
+        bypass_cache: bool = False,
+    ) -> str:
+        """
+        Answer prompt (after context, if given). With the response cache
+        enabled, a semantically equivalent (prompt, context) answered before
+        returns the cached answer; bypass_cache forces a fresh generation.
+        """
         # Stub path: deterministic, free, no downloads
-        if self.model_name.strip().lower() == "stub":
-            prompt_preview = (prompt or "").strip().replace("\n", " ")[:60]
-            return f"[STUB] echo: {prompt_preview} | max_new_tokens={max_new_tokens}"
+        if self._is_stub():
+            return self._stub_reply(prompt, max_new_tokens)
+        from ai_core.response_cache import SemanticResponseCache, response_scope
+
+        cache = self._get_response_cache()
+        scope = response_scope(model=self.model_name, max_new_tokens=max_new_tokens)
+        vector = None
+        if cache is not None and bypass_cache:
+            cache.record_bypass()
+        elif cache is not None:
+            try:
+                response, similarity, vector = cache.lookup(prompt, context, scope)
+                if response is not None:
+                    print(f"[INFO] Response cache hit | Similarity: {similarity:.3f}")
+                    return response
+            except Exception as e:
+                print(f"[WARN] Response cache lookup failed: {e}")
+        result = self._generate(
+            SemanticResponseCache.key_text(prompt, context),
+            max_new_tokens,
+            use_prefix_cache,
+        )
+        if vector is not None and not result.startswith("[ERROR]"):
+            cache.put(prompt, result, context, scope, vector=vector)
+        return result
+
+    def _generate(self, prompt, max_new_tokens, use_prefix_cache):
         if self.model is None:
             return "[ERROR] Model not loaded."
+        from huggingface_hub.errors import HFValidationError
+
         try:
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
             start = time.time()
-            outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+            inputs, cached = self._prompt_inputs(prompt, use_prefix_cache)
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **cached,
+            )
             latency = time.time() - start
             result = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
             print(
@@ -87,6 +356,138 @@ class ShieldCraftAICore:
             print(f"[ERROR] Unexpected error: {e}")
             return "[ERROR] Unexpected error."
 
+    def _plan_batches(self, lengths, max_new_tokens):
+        """
+        Row indices grouped into generation batches: sorted by prompt length,
+        a batch closes when rows * (longest prompt + max_new_tokens) would
+        exceed max_batch_tokens, or at max_batch_rows.
+        """
+        batches = []
+        current = []
+        for i in np.argsort(lengths, kind="stable"):
+            if current and (
+                len(current) >= self.max_batch_rows
+                or (len(current) + 1) * (lengths[i] + max_new_tokens)
+                > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            current.append(int(i))
+        if current:
+            batches.append(current)
+        return batches
+
+    def generate_batch(self, prompts, max_new_tokens: int = 64):
+        """
+        Completions for many prompts with dynamic, left-padded batching.
+        Returns dict with 'success', 'outputs' (generated text only, in input
+        order), 'error' and 'timings' ({"total_ms", "generated_tokens",
+        "tokens_per_sec", "batches"}).
+        """
+        result = {"success": False, "outputs": None, "error": None, "timings": None}
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        if not isinstance(prompts, list) or not all(
+            isinstance(p, str) for p in prompts
+        ):
+            result["error"] = "Input must be a string or list of strings."
+            return result
+        if len(prompts) == 0:
+            result["error"] = "Input prompt list is empty."
+            return result
+        start = time.perf_counter()
+        if self._is_stub():
+            result["outputs"] = [self._stub_reply(p, max_new_tokens) for p in prompts]
+            result["success"] = True
+            result["timings"] = {
+                "total_ms": (time.perf_counter() - start) * 1000,
+                "generated_tokens": 0,
+                "tokens_per_sec": 0.0,
+                "batches": 1,
+            }
+            return result
+        if self.model is None:
+            result["error"] = "Model not loaded."
+            return result
+        try:
+            import torch
+
+            encoded = self.tokenizer(prompts)["input_ids"]
+            lengths = [len(ids) for ids in encoded]
+            pad_id = self.tokenizer.pad_token_id
+            outputs = [None] * len(prompts)
+            generated = 0
+            batches = self._plan_batches(lengths, max_new_tokens)
+            for rows in batches:
+                inputs = self.tokenizer.pad(
+                    {"input_ids": [encoded[i] for i in rows]}, return_tensors="pt"
+                ).to(self.device)
+                with torch.no_grad():
+                    out = self.model.generate(
+                        **inputs, max_new_tokens=max_new_tokens, pad_token_id=pad_id
+                    )
+                new_tokens = out[:, inputs["input_ids"].shape[1] :]
+                for i, ids in zip(rows, new_tokens):
+                    # Rows that finish early are filled with pad_id.
+                    generated += int((ids != pad_id).sum())
+                    outputs[i] = self.tokenizer.decode(ids, skip_special_tokens=True)
+            total = time.perf_counter() - start
+            result["outputs"] = outputs
+            result["timings"] = {
+                "total_ms": total * 1000,
+                "generated_tokens": generated,
+                "tokens_per_sec": generated / total if total > 0 else 0.0,
+                "batches": len(batches),
+            }
+            result["success"] = True
+            print(
+                f"[INFO] Batch generation complete | Prompts: {len(prompts)} | Batches: {len(batches)} | {result['timings']['tokens_per_sec']:.1f} tok/s | Device: {self.device}"
+            )
+            return result
+        except Exception as e:
+            result["error"] = f"Generation failed: {e}"
+            print(f"[ERROR] Batch generation failed: {e}")
+            return result
+
+    def generate_stream(
+        self, prompt: str, max_new_tokens: int = 64, use_prefix_cache: bool = True
+    ):
+        """
+        GenerationStream for prompt: iterate it for text deltas as tokens are
+        produced; its .result then has TTFT and tokens/sec. Raises
+        RuntimeError if the model is not loaded.
+        """
+        if self._is_stub():
+            words = self._stub_reply(prompt, max_new_tokens).split(" ")
+
+            def stub(streamer):
+                streamer.put(None)  # stands in for the prompt
+                for i in range(len(words)):
+                    streamer.put(np.array([i]))
+                streamer.end()
+
+            return GenerationStream(stub, lambda ids: " ".join(words[i] for i in ids))
+        if self.model is None:
+            raise RuntimeError("Model not loaded.")
+
+        def run(streamer):
+            import torch
+
+            # Inside the stream so prefix lookup counts towards TTFT.
+            inputs, cached = self._prompt_inputs(prompt, use_prefix_cache)
+            with torch.no_grad():
+                self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    streamer=streamer,
+                    **cached,
+                )
+
+        return GenerationStream(
+            run, lambda ids: self.tokenizer.decode(ids, skip_special_tokens=True)
+        )
+
 
 if __name__ == "__main__":
     ai_core = ShieldCraftAICore()
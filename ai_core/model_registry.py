@@ -0,0 +1,111 @@
+"""
+ShieldCraft AI Core - Process-Wide Model Registry
+
+Models are loaded on first use and shared: one instance per key, e.g.
+("embedding", model_name, backend, device, quantization), within a process.
+Every EmbeddingModel, ShieldCraftAICore and benchmark adapter built with the
+same settings therefore reuses the same weights instead of loading its own
+copy. This module does not import torch or transformers.
+
+Warm start (model_warm_start): weights are loaded from the local snapshot's
+.safetensors files, which safetensors memory-maps instead of reading into
+fresh buffers, and the hub round-trip is skipped once the snapshot is cached.
+Processes on one host then page in the same file rather than each paying the
+full load.
+"""
+
+import glob
+import os
+import threading
+import time
+
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+# Hub files a warm start needs: config, tokenizer and safetensors weights.
+_SNAPSHOT_PATTERNS = ["*.json", "*.safetensors", "*.txt", "*.model"]
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.load_seconds = None
+        self.hits = 0
+
+
+def get_model(key, loader):
+    """
+    Shared instance for key, created by loader() on the first request.
+    Concurrent first requests wait for one load; a failed load raises and
+    is not cached, so the next request retries.
+    """
+    with _MODELS_LOCK:
+        entry = _MODELS.setdefault(key, _Entry())
+    with entry.lock:
+        if entry.value is None:
+            start = time.perf_counter()
+            entry.value = loader()
+            entry.load_seconds = time.perf_counter() - start
+            print(f"[INFO] Model registry loaded {key} in {entry.load_seconds:.2f}s")
+        else:
+            entry.hits += 1
+        return entry.value
+
+
+def release_model(key):
+    """Drop the registry's reference to key (in-use instances stay alive)."""
+    with _MODELS_LOCK:
+        return _MODELS.pop(key, None) is not None
+
+
+def clear_models():
+    with _MODELS_LOCK:
+        _MODELS.clear()
+
+
+def registry_stats():
+    """{key: {"load_seconds", "hits"}} for every loaded model."""
+    with _MODELS_LOCK:
+        return {
+            key: {"load_seconds": entry.load_seconds, "hits": entry.hits}
+            for key, entry in _MODELS.items()
+            if entry.value is not None
+        }
+
+
+def local_snapshot(model_name):
+    """
+    Local directory for model_name: the path itself, or the cached hub
+    snapshot (downloaded once, weights as safetensors only).
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    from huggingface_hub import snapshot_download
+
+    try:
+        return snapshot_download(
+            model_name, allow_patterns=_SNAPSHOT_PATTERNS, local_files_only=True
+        )
+    except Exception:
+        return snapshot_download(model_name, allow_patterns=_SNAPSHOT_PATTERNS)
+
+
+def from_pretrained(model_cls, model_name, warm_start=False, **kwargs):
+    """
+    model_cls.from_pretrained(model_name, **kwargs). With warm_start, loads
+    from the local safetensors snapshot (memory-mapped, no hub lookups) and
+    falls back to the normal load if there are no safetensors weights.
+    """
+    if warm_start:
+        try:
+            path = local_snapshot(model_name)
+            if not glob.glob(os.path.join(path, "*.safetensors")):
+                raise FileNotFoundError(f"no .safetensors weights in {path}")
+            return model_cls.from_pretrained(
+                path, use_safetensors=True, low_cpu_mem_usage=True, **kwargs
+            )
+        except Exception as e:
+            print(
+                f"[WARN] Warm start unavailable for {model_name} ({e}); loading normally."
+            )
+    return model_cls.from_pretrained(model_name, **kwargs)
@@ -0,0 +1,106 @@
+"""
+ShieldCraft AI Core - KV-Cache Prefix Reuse
+
+Most LLM calls share a long fixed instruction prefix (triage template,
+summarization preamble). PrefixKVCache runs the model once over each
+registered prefix and keeps its past_key_values; a prompt whose token ids
+start with a registered prefix gets a copy of that cache, so generate() only
+prefills the remaining tokens. Prefixes are matched on token ids, so a hit
+never changes the output. Entries are evicted least-recently-used once their
+total size exceeds the memory budget.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+
+
+def cache_nbytes(cache):
+    """Bytes held by a transformers Cache (or legacy tuple of (key, value) pairs)."""
+    if hasattr(cache, "layers"):
+        pairs = [(layer.keys, layer.values) for layer in cache.layers]
+    else:
+        pairs = list(cache)
+    return sum(
+        t.numel() * t.element_size() for pair in pairs for t in pair if t is not None
+    )
+
+
+class PrefixKVCache:
+    """
+    Config keys (ai_core section): prefix_cache_max_mb (memory budget for
+    all cached prefixes).
+    """
+
+    def __init__(self, model, device, config=None):
+        config = config or {}
+        self.model = model
+        self.device = device
+        self.max_bytes = int(config.get("prefix_cache_max_mb", 512) * 1024 * 1024)
+        self._entries = OrderedDict()  # tuple(prefix ids) -> (cache, nbytes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "reused_tokens": 0}
+
+    def register(self, ids):
+        """Compute and keep past_key_values for prefix ids; returns its size in bytes."""
+        import torch
+
+        key = tuple(int(i) for i in ids)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][1]
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor([key], device=self.device), use_cache=True
+            )
+        cache = outputs.past_key_values
+        nbytes = cache_nbytes(cache)
+        if nbytes > self.max_bytes:
+            print(
+                f"[WARN] Prefix of {len(key)} tokens needs {nbytes / 2**20:.1f}MB, over the {self.max_bytes / 2**20:.1f}MB budget; not cached."
+            )
+            return nbytes
+        with self._lock:
+            self._entries[key] = (cache, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.metrics["evictions"] += 1
+        print(
+            f"[INFO] Cached prefix: {len(key)} tokens | {nbytes / 2**20:.2f}MB | Total: {self.bytes / 2**20:.2f}MB"
+        )
+        return nbytes
+
+    def lookup(self, ids):
+        """
+        (prefix_length, cache copy) for the longest registered prefix of ids,
+        or (0, None). The prefix must leave at least one token to prefill.
+        """
+        ids = tuple(int(i) for i in ids)
+        with self._lock:
+            best = None
+            for key in self._entries:
+                if len(key) < len(ids) and ids[: len(key)] == key:
+                    if best is None or len(key) > len(best):
+                        best = key
+            if best is None:
+                self.metrics["misses"] += 1
+                return 0, None
+            self._entries.move_to_end(best)
+            self.metrics["hits"] += 1
+            self.metrics["reused_tokens"] += len(best)
+            cache = self._entries[best][0]
+        # generate() extends the cache in place, so each request gets its own copy.
+        return len(best), copy.deepcopy(cache)
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return dict(
+            self.metrics,
+            hit_rate=self.metrics["hits"] / lookups if lookups else 0.0,
+            prefixes=len(self._entries),
+            bytes=self.bytes,
+        )
@@ -0,0 +1,187 @@
+"""
+ShieldCraft AI Core - Semantic LLM Response Cache
+
+Analysts ask near-identical questions about the same alerts, so answers are
+cached by meaning rather than exact text. The (context, prompt) pair is
+embedded with EmbeddingModel and looked up in a vector store backend; the
+nearest cached answer is returned if its cosine similarity reaches the
+threshold and it is younger than the TTL. Generation settings that change the
+answer (model, max_new_tokens) form a scope that must match exactly, through
+the store's doc_id filter.
+
+Answers themselves are held in this process (LRU, response_cache_max_entries);
+the vector store only resolves which cached question is nearest. Evicted and
+expired entries are deleted from the store as well, and lookups rank several
+candidates so a row without a live answer cannot shadow one that has it.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from ai_core.vector_backend import get_vector_store, to_vector
+
+
+def response_scope(**settings):
+    """Exact-match part of the cache key: a digest of the generation settings."""
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class SemanticResponseCache:
+    """
+    Config keys (ai_core section): response_cache_threshold (cosine
+    similarity), response_cache_ttl_s, response_cache_max_entries,
+    response_cache_backend (vector store backend), response_cache_path,
+    response_cache_candidates (nearest rows checked per lookup).
+    """
+
+    def __init__(self, embedder=None, store=None, config=None):
+        config = config or {}
+        self.threshold = config.get("response_cache_threshold", 0.95)
+        self.ttl = config.get("response_cache_ttl_s", 3600)
+        self.max_entries = config.get("response_cache_max_entries", 10000)
+        self.candidates = max(1, config.get("response_cache_candidates", 5))
+        if embedder is None:
+            from ai_core.embedding.embedding import EmbeddingModel
+
+            embedder = EmbeddingModel()
+        self.embedder = embedder
+        if store is None:
+            from infra.utils.config_loader import get_config_loader
+
+            store = get_vector_store(
+                dict(
+                    get_config_loader().get_section("vector_store"),
+                    backend=config.get("response_cache_backend", "local"),
+                    local_path=config.get(
+                        "response_cache_path", "./vector_index/response_cache"
+                    ),
+                    table_name="llm_response_cache",
+                    upsert_key="content_hash",
+                    index_type="none",
+                )
+            )
+        self.store = store
+        self._responses = OrderedDict()  # stored key text -> (response, created_at)
+        self._lock = threading.Lock()
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "errors": 0,
+            "hit_ms_total": 0.0,
+        }
+
+    @staticmethod
+    def key_text(prompt, context=None):
+        return f"{context}\n\n{prompt}" if context else prompt
+
+    def embed(self, prompt, context=None):
+        result = self.embedder.encode([self.key_text(prompt, context)])
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return np.asarray(result["embeddings"][0], dtype=np.float32)
+
+    def lookup(self, prompt, context=None, scope=""):
+        """
+        Returns (response or None, similarity or None, query vector). The
+        vector can be passed to put() so a miss is not embedded twice.
+        similarity is that of the returned answer, or on a miss of the
+        nearest stored question.
+        """
+        start = time.perf_counter()
+        vector = self.embed(prompt, context)
+        rows = self.store.query(
+            vector, top_k=self.candidates, filters={"doc_id": scope}
+        )
+        if isinstance(rows, str):
+            print(f"[WARN] Response cache lookup failed: {rows}")
+            with self._lock:
+                self.metrics["errors"] += 1
+                self.metrics["misses"] += 1
+            return None, None, vector
+        scored = []
+        for text, embedding in rows:
+            embedding = to_vector(embedding)
+            denominator = np.linalg.norm(vector) * np.linalg.norm(embedding)
+            similarity = (
+                float(np.dot(vector, embedding) / denominator) if denominator else 0.0
+            )
+            scored.append((similarity, text))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        expired = []
+        try:
+            with self._lock:
+                for similarity, text in scored:
+                    if similarity < self.threshold:
+                        break
+                    entry = self._responses.get(text)
+                    if entry is None:
+                        continue  # not cached by this process
+                    response, created_at = entry
+                    if time.time() - created_at > self.ttl:
+                        del self._responses[text]
+                        expired.append(text)
+                        self.metrics["expired"] += 1
+                        continue
+                    self._responses.move_to_end(text)
+                    self.metrics["hits"] += 1
+                    self.metrics["hit_ms_total"] += (time.perf_counter() - start) * 1000
+                    return response, similarity, vector
+                self.metrics["misses"] += 1
+        finally:
+            self._forget(expired)
+        return None, (scored[0][0] if scored else None), vector
+
+    def put(self, prompt, response, context=None, scope="", vector=None):
+        if vector is None:
+            vector = self.embed(prompt, context)
+        text = f"{scope}:{self.key_text(prompt, context)}"
+        stats = self.store.upsert_embeddings([text], [vector], doc_ids=[scope])
+        if isinstance(stats, str):
+            print(f"[WARN] Response cache store failed: {stats}")
+            with self._lock:
+                self.metrics["errors"] += 1
+            return False
+        evicted = []
+        with self._lock:
+            self._responses[text] = (response, time.time())
+            self._responses.move_to_end(text)
+            while len(self._responses) > self.max_entries:
+                evicted.append(self._responses.popitem(last=False)[0])
+            self.metrics["stores"] += 1
+        self._forget(evicted)
+        return True
+
+    def _forget(self, texts):
+        # Drop store rows whose answers were evicted or expired, so they
+        # neither pile up nor crowd live entries out of the candidates.
+        if not texts:
+            return
+        deleted = self.store.delete_texts(texts)
+        if isinstance(deleted, str):
+            print(f"[WARN] Response cache delete failed: {deleted}")
+            with self._lock:
+                self.metrics["errors"] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.metrics["bypassed"] += 1
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return dict(
+            self.metrics,
+            hit_rate=self.metrics["hits"] / lookups if lookups else 0.0,
+            mean_hit_ms=(
+                self.metrics["hit_ms_total"] / self.metrics["hits"]
+                if self.metrics["hits"]
+                else None
+            ),
+            entries=len(self._responses),
+        )
@@ -0,0 +1,159 @@
+"""
+ShieldCraft AI Core - Shared Tokenizer Service
+
+One Rust ("fast") HF tokenizer per model, shared by TokenBasedChunkingStrategy
+and EmbeddingModel, with an LRU cache of token ids keyed by exact text. The
+chunker tokenizes a document once with character offsets, takes each chunk's
+text from the source span its tokens cover, and caches the sliced ids under
+that text, so embedding the chunk does not tokenize it again. Chunks cut
+inside a word are not cached (their ids would differ from a fresh encode).
+
+Cached ids exclude special tokens; features() adds them (and truncates to
+the model length) the same way the tokenizer's own __call__ would.
+"""
+
+import threading
+from collections import OrderedDict
+
+_SERVICES = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_tokenizer_service(model_name=None, config=None):
+    """
+    Process-wide TokenizerService for model_name (default: the configured
+    embedding model), so chunking and embedding share one tokenizer and cache.
+    """
+    if model_name is None or model_name == "embedding":
+        from infra.utils.config_loader import get_config_loader
+
+        config = config or get_config_loader().get_section("embedding")
+        from ai_core.embedding.embedding import EMBEDDING_MODEL_NAME
+
+        model_name = config.get("model_name", EMBEDDING_MODEL_NAME)
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(model_name)
+        if service is None:
+            service = TokenizerService(model_name, config)
+            _SERVICES[model_name] = service
+        return service
+
+
+class TokenizerService:
+    """
+    Config keys: tokenizer_cache_items (LRU size, 0 disables caching).
+    Raises ValueError if only a slow (pure Python) tokenizer is available.
+    """
+
+    def __init__(self, model_name, config=None):
+        from transformers import AutoTokenizer
+
+        config = config or {}
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        if not getattr(self.tokenizer, "is_fast", False):
+            raise ValueError(
+                f"No fast (Rust) tokenizer available for {model_name}; refusing the slow fallback."
+            )
+        self.cache_items = config.get("tokenizer_cache_items", 100000)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._num_special = self.tokenizer.num_special_tokens_to_add(pair=False)
+        self.metrics = {"hits": 0, "misses": 0, "remembered": 0}
+
+    @property
+    def model_max_length(self):
+        return self.tokenizer.model_max_length
+
+    def _store(self, text, ids):
+        if self.cache_items <= 0:
+            return
+        self._cache[text] = ids
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_items:
+            self._cache.popitem(last=False)
+
+    def encode_with_offsets(self, text):
+        """Token ids (no special tokens) of text and each token's (start, end) character span."""
+        encoded = self.tokenizer(
+            [text],
+            add_special_tokens=False,
+            truncation=False,
+            verbose=False,
+            return_offsets_mapping=True,
+        )
+        return encoded["input_ids"][0], encoded["offset_mapping"][0]
+
+    def remember(self, texts, ids):
+        """
+        Cache ids already produced for texts: chunks cut from a document's
+        token list, each text being the source span its tokens cover.
+        """
+        if self.cache_items <= 0:
+            return
+        with self._lock:
+            for text, chunk_ids in zip(texts, ids):
+                self._store(text, list(chunk_ids))
+                self.metrics["remembered"] += 1
+
+    def encode_batch(self, texts):
+        """Token ids (no special tokens) for each text; cache misses go through one batched call."""
+        found = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                ids = self._cache.get(text)
+                if ids is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    found[i] = ids
+            self.metrics["hits"] += len(texts) - sum(len(v) for v in missing.values())
+            self.metrics["misses"] += sum(len(v) for v in missing.values())
+        if missing:
+            batch = list(missing)
+            encoded = self.tokenizer(
+                batch, add_special_tokens=False, truncation=False, verbose=False
+            )["input_ids"]
+            with self._lock:
+                for text, ids in zip(batch, encoded):
+                    self._store(text, ids)
+                    for i in missing[text]:
+                        found[i] = ids
+        return found
+
+    def __call__(self, text):
+        """Single-text form used by TokenBasedChunkingStrategy."""
+        return self.encode_batch([text])[0]
+
+    def decode(self, ids):
+        return self.tokenizer.decode(ids)
+
+    def features(self, texts):
+        """
+        Unpadded model inputs for texts, truncated to model_max_length with
+        special tokens added: {"input_ids", "attention_mask"[, "token_type_ids"]}.
+        """
+        limit = max(1, self.model_max_length - self._num_special)
+        input_ids = [
+            self.tokenizer.build_inputs_with_special_tokens(ids[:limit])
+            for ids in self.encode_batch(texts)
+        ]
+        features = {
+            "input_ids": input_ids,
+            "attention_mask": [[1] * len(ids) for ids in input_ids],
+        }
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            features["token_type_ids"] = [[0] * len(ids) for ids in input_ids]
+        return features
+
+    def pad(self, features, return_tensors=None):
+        return self.tokenizer.pad(features, return_tensors=return_tensors)
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return dict(
+            self.metrics,
+            hit_rate=self.metrics["hits"] / lookups if lookups else 0.0,
+            cached=len(self._cache),
+        )
@@ -0,0 +1,348 @@
+"""
+ShieldCraft AI Core - Vector Store Backend Interface
+
+Shared surface for the pgvector store and the local in-process engine, plus a
+config-driven factory. Deliberately free of psycopg2 so the local backend can
+run where Postgres is not available.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+import numpy as np
+from infra.utils.config_loader import get_config_loader
+
+BACKENDS = ("pgvector", "local")
+UPSERT_KEYS = {
+    "content_hash": ("content_hash",),
+    "doc_chunk": ("doc_id", "chunk_index"),
+}
+INDEX_TYPES = ("none", "hnsw", "ivfflat")
+# metric -> (distance operator, operator class)
+METRICS = {
+    "l2": ("<->", "vector_l2_ops"),
+    "cosine": ("<=>", "vector_cosine_ops"),
+    "ip": ("<#>", "vector_ip_ops"),
+}
+FILTER_STRATEGIES = ("auto", "prefilter", "iterative")
+SEVERITY_LEVELS = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+FILTER_KEYS = (
+    "source",
+    "doc_id",
+    "start",
+    "end",
+    "severity",
+    "min_severity",
+    "metadata",
+)
+RRF_K = 60
+# Keeps security identifiers whole: CVE-2024-3094, 10.0.0.12, host.corp.local,
+# sha256 digests, user@domain, C:\\Windows\\paths.
+_LEXICAL_TOKEN = re.compile(r"[0-9a-z](?:[0-9a-z._:@/\\-]*[0-9a-z])?")
+
+
+def content_hash(text):
+    """Stable content key for a chunk: sha256 of the whitespace-normalized text."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def severity_level(value):
+    """Map a severity name ('high') or number to its integer level."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    level = SEVERITY_LEVELS.get(str(value).strip().lower())
+    if level is None:
+        raise ValueError(f"Unknown severity: {value}")
+    return level
+
+
+def to_timestamp(value):
+    """Coerce a datetime, epoch seconds or ISO-8601 string to an aware UTC datetime."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def split_metadata(metadata):
+    """
+    Promote the filterable fields of a chunk's metadata dict to columns:
+    returns (source, event_time, severity, metadata).
+    """
+    metadata = dict(metadata or {})
+    event_time = metadata.get("timestamp", metadata.get("event_time"))
+    return (
+        metadata.get("source"),
+        to_timestamp(event_time),
+        severity_level(metadata.get("severity")),
+        metadata,
+    )
+
+
+def to_vector(value):
+    """
+    Embedding from a query row as float32. Without the pgvector adapter
+    registered, psycopg2 returns vectors in their '[1,2,3]' text form.
+    """
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def lexical_tokens(text):
+    """Lowercased lexical terms for the sparse index."""
+    return _LEXICAL_TOKEN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K, weights=None):
+    """
+    Fuse ranked key lists: score(d) = sum_i w_i / (k + rank_i(d)), rank from 1.
+    Returns [(key, score)] best first; ties keep first-seen order.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def normalize_filters(filters):
+    """Validate a query filter dict and coerce times/severities; ValueError on bad input."""
+    if not filters:
+        return {}
+    unknown = [k for k in filters if k not in FILTER_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {unknown}")
+    normalized = {}
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key in ("source", "doc_id", "severity") and isinstance(
+            value, (list, tuple, set)
+        ):
+            value = list(value)
+        if key in ("start", "end"):
+            value = to_timestamp(value)
+        elif key == "severity":
+            value = (
+                [severity_level(v) for v in value]
+                if isinstance(value, list)
+                else severity_level(value)
+            )
+        elif key == "min_severity":
+            value = severity_level(value)
+        elif key == "metadata" and not isinstance(value, dict):
+            raise ValueError("metadata filter must be a dict.")
+        normalized[key] = value
+    return normalized
+
+
+class VectorStoreBackend(ABC):
+    """
+    upsert_embeddings returns a stats dict (rows, seconds, rows_per_sec, mode)
+    or an '[ERROR] ...' string; query returns a list of (text, embedding)
+    tuples ordered nearest first, or an '[ERROR] ...' string.
+
+    metadata (one dict per chunk) may carry source, timestamp and severity,
+    which are promoted to filterable columns. query filters accept source,
+    doc_id, start/end (time range), severity, min_severity and metadata
+    (JSON containment).
+    """
+
+    pool_max = 1
+    rrf_k = RRF_K
+    hybrid_weights = None  # [dense, lexical]
+    hybrid_candidates = None
+
+    @abstractmethod
+    def upsert_embeddings(
+        self,
+        texts,
+        embeddings,
+        doc_ids=None,
+        chunk_indices=None,
+        mode=None,
+        metadata=None,
+    ):
+        pass
+
+    def upsert_stream(self, batches, mode=None):
+        """
+        Bulk-upsert an iterable of (records, embeddings) batches, e.g. the
+        output of EmbeddingModel.encode_stream(). Each record is the chunk
+        text, or a dict with "text" and optional "doc_id", "chunk_index" and
+        "metadata". Batches are written as they arrive, so only one is held
+        at a time. Returns summed stats (rows, seconds, rows_per_sec,
+        batches, mode) or the first '[ERROR] ...' string.
+        """
+        totals = {"rows": 0, "seconds": 0.0, "batches": 0, "mode": mode}
+        start = time.perf_counter()
+        for records, embeddings in batches:
+            records = [r if isinstance(r, dict) else {"text": r} for r in records]
+            if not all(isinstance(r.get("text"), str) for r in records):
+                return "[ERROR] upsert_stream records must be texts or dicts with a 'text' key."
+            # Unkeyed rows continue the stream's running index, so batches do
+            # not overwrite each other under the doc_chunk upsert key.
+            stats = self.upsert_embeddings(
+                [r["text"] for r in records],
+                embeddings,
+                doc_ids=[r.get("doc_id", "") for r in records],
+                chunk_indices=[
+                    r.get("chunk_index", totals["rows"] + i)
+                    for i, r in enumerate(records)
+                ],
+                mode=mode,
+                metadata=(
+                    [r.get("metadata") or {} for r in records]
+                    if any("metadata" in r for r in records)
+                    else None
+                ),
+            )
+            if isinstance(stats, str):
+                return stats
+            totals["rows"] += stats["rows"]
+            totals["batches"] += 1
+            totals["mode"] = stats.get("mode", mode)
+        totals["seconds"] = time.perf_counter() - start
+        totals["rows_per_sec"] = (
+            totals["rows"] / totals["seconds"] if totals["seconds"] > 0 else 0.0
+        )
+        print(
+            f"[INFO] Streamed {totals['rows']} embeddings in {totals['batches']} batches | {totals['rows_per_sec']:.0f} rows/s"
+        )
+        return totals
+
+    @abstractmethod
+    def query(self, query_embedding, top_k=5, filters=None):
+        pass
+
+    def delete_texts(self, texts):
+        """Delete the rows holding texts (by content hash); returns the count deleted."""
+        return "[ERROR] Deletes not supported by this backend."
+
+    def query_many(self, query_embeddings, top_k=5, filters=None):
+        return [self.query(q, top_k=top_k, filters=filters) for q in query_embeddings]
+
+    def lexical_query(self, query_text, top_k=5, filters=None):
+        return "[ERROR] Lexical search not supported by this backend."
+
+    def query_rows(self, query_embedding, top_k=5, filters=None):
+        """
+        query() as row dicts (id, text, embedding, doc_id, chunk_index,
+        metadata), so rows with identical text stay distinct.
+        """
+        return "[ERROR] Row queries not supported by this backend."
+
+    def lexical_rows(self, query_text, top_k=5, filters=None):
+        """lexical_query() as row dicts, like query_rows()."""
+        return "[ERROR] Lexical search not supported by this backend."
+
+    def hybrid_query(
+        self,
+        query_text,
+        query_embedding,
+        top_k=5,
+        filters=None,
+        candidates=None,
+        rrf_k=None,
+        weights=None,
+    ):
+        """
+        Run dense and lexical retrieval and fuse them with reciprocal rank
+        fusion over row ids, so distinct chunks with identical text (repeated
+        log lines) stay separate results. Each stage fetches `candidates`
+        rows (default hybrid_candidates, else 4 * top_k). Returns
+        {"results": [(text, embedding)], "rows", "scores", "dense",
+        "lexical", "timings"} or an '[ERROR] ...' string. rows holds the
+        fused row dicts (see query_rows) aligned with results; dense and
+        lexical are each stage's ranked row dicts. Timings are per-stage
+        milliseconds; with a connection pool (pool_max > 1) the stages run
+        in parallel, so total_ms is close to max(dense_ms, lexical_ms) +
+        fusion_ms, otherwise they run one after the other.
+        """
+        candidates = max(top_k, candidates or self.hybrid_candidates or 4 * top_k)
+        rrf_k = rrf_k or self.rrf_k
+        weights = weights or self.hybrid_weights
+
+        def timed(fn, query):
+            start = time.perf_counter()
+            result = fn(query, top_k=candidates, filters=filters)
+            return result, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        if self.pool_max > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                dense_future = executor.submit(timed, self.query_rows, query_embedding)
+                lexical_future = executor.submit(timed, self.lexical_rows, query_text)
+                dense, dense_ms = dense_future.result()
+                lexical, lexical_ms = lexical_future.result()
+        else:
+            dense, dense_ms = timed(self.query_rows, query_embedding)
+            lexical, lexical_ms = timed(self.lexical_rows, query_text)
+        if isinstance(dense, str):
+            return dense
+        if isinstance(lexical, str):
+            return lexical
+        fusion_start = time.perf_counter()
+        rows = {}
+        for row in lexical + dense:
+            rows.setdefault(row["id"], row)
+        fused = reciprocal_rank_fusion(
+            [[row["id"] for row in dense], [row["id"] for row in lexical]],
+            k=rrf_k,
+            weights=weights,
+        )[:top_k]
+        end = time.perf_counter()
+        return {
+            "results": [(rows[i]["text"], rows[i]["embedding"]) for i, _ in fused],
+            "rows": [rows[i] for i, _ in fused],
+            "scores": [score for _, score in fused],
+            "dense": dense,
+            "lexical": lexical,
+            "timings": {
+                "dense_ms": dense_ms,
+                "lexical_ms": lexical_ms,
+                "fusion_ms": (end - fusion_start) * 1000,
+                "total_ms": (end - start) * 1000,
+            },
+        }
+
+    def build_index(self, rebuild=False, **kwargs):
+        return "[ERROR] Index management not supported by this backend."
+
+    def storage_report(self, sample_size=100, top_k=10, modes=None):
+        return "[ERROR] Storage mode report not supported by this backend."
+
+    def close(self):
+        pass
+
+
+def get_vector_store(config=None):
+    """Instantiate the vector store backend selected by vector_store.backend."""
+    if config is None:
+        config = get_config_loader().get_section("vector_store")
+    backend = config.get("backend", "pgvector")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    if backend == "local":
+        from ai_core.local_vector_store import LocalVectorStore
+
+        return LocalVectorStore(config)
+    from ai_core.vector_store import VectorStore
+
+    return VectorStore(config)
@@ -0,0 +1,184 @@
+"""
+ShieldCraft AI Core - Vector Quantization
+
+Compact in-RAM codes for the local vector store: scalar int8 with a
+per-dimension scale, binary sign codes ranked by Hamming distance, and product
+quantization with asymmetric (query-side float) distance tables. Codes only
+pre-rank candidates; the store re-ranks them against full-precision vectors.
+
+Vectors arrive in the store's search space (unit-normalized for cosine), so
+prerank() scores are "smaller is closer" like the pgvector operators.
+"""
+
+import numpy as np
+
+QUANTIZED_MODES = ("int8", "binary", "pq")
+_PQ_CENTROIDS = 256
+# Popcount of every byte value, for Hamming distance over packed sign bits.
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(
+    axis=1, dtype=np.uint16
+)
+
+
+def kmeans(x, k, iters=10, seed=0):
+    """Plain Lloyd's k-means; returns float32 centroids of shape (k, d)."""
+    x = np.asarray(x, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    k = int(min(k, len(x)))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        distances = (centroids * centroids).sum(axis=1) - 2.0 * (x @ centroids.T)
+        labels = distances.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        counts = np.bincount(labels, minlength=k)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+    return centroids
+
+
+def _dot_distances(dots, norms, metric):
+    # Approximate dot products -> pgvector-style distances (up to a constant).
+    if metric == "l2":
+        return norms * norms - 2.0 * dots
+    return -dots
+
+
+class ScalarInt8Quantizer:
+    """One signed byte per dimension; scale/offset learned per dimension."""
+
+    mode = "int8"
+    min_train_rows = 1
+
+    def __init__(self, dimension, **kwargs):
+        self.dimension = dimension
+        self.scale = None
+        self.offset = None
+
+    @property
+    def code_shape(self):
+        return (self.dimension,), np.int8
+
+    def train(self, x):
+        lo = x.min(axis=0)
+        hi = x.max(axis=0)
+        self.scale = np.where(hi > lo, (hi - lo) / 255.0, 1.0).astype(np.float32)
+        self.offset = lo.astype(np.float32)
+
+    def encode(self, x):
+        codes = np.rint((x - self.offset) / self.scale)
+        return (np.clip(codes, 0, 255) - 128).astype(np.int8)
+
+    def prerank(self, codes, query, norms, metric):
+        # x ~= (code + 128) * scale + offset, folded into the query side.
+        bias = float(query @ (self.offset + 128.0 * self.scale))
+        dots = codes.astype(np.float32) @ (query * self.scale) + bias
+        return _dot_distances(dots, norms, metric)
+
+    def state(self):
+        return {"scale": self.scale, "offset": self.offset}
+
+    def load_state(self, state):
+        self.scale = state["scale"]
+        self.offset = state["offset"]
+
+
+class BinaryQuantizer:
+    """One bit per dimension: sign of the mean-centered vector."""
+
+    mode = "binary"
+    min_train_rows = 1
+
+    def __init__(self, dimension, **kwargs):
+        self.dimension = dimension
+        self.center = None
+
+    @property
+    def code_shape(self):
+        return ((self.dimension + 7) // 8,), np.uint8
+
+    def train(self, x):
+        self.center = x.mean(axis=0).astype(np.float32)
+
+    def encode(self, x):
+        return np.packbits(x > self.center, axis=-1)
+
+    def prerank(self, codes, query, norms, metric):
+        query_code = self.encode(query[None, :])
+        return _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1)
+
+    def state(self):
+        return {"center": self.center}
+
+    def load_state(self, state):
+        self.center = state["center"]
+
+
+class ProductQuantizer:
+    """
+    pq_m sub-vectors per vector, each coded as one of 256 k-means centroids
+    (one byte). Distances use per-query lookup tables (ADC).
+    """
+
+    mode = "pq"
+    min_train_rows = _PQ_CENTROIDS
+
+    def __init__(self, dimension, pq_m=48, kmeans_iters=10, **kwargs):
+        self.dimension = dimension
+        # Largest sub-vector count <= pq_m that divides the dimension.
+        self.m = next(
+            m for m in range(min(pq_m, dimension), 0, -1) if dimension % m == 0
+        )
+        self.kmeans_iters = kmeans_iters
+        self.codebooks = None
+
+    @property
+    def code_shape(self):
+        return (self.m,), np.uint8
+
+    def _split(self, x):
+        return x.reshape(len(x), self.m, self.dimension // self.m)
+
+    def train(self, x):
+        sub = self._split(np.asarray(x, dtype=np.float32))
+        self.codebooks = np.stack(
+            [
+                kmeans(sub[:, j], _PQ_CENTROIDS, self.kmeans_iters, seed=j)
+                for j in range(self.m)
+            ]
+        )
+
+    def encode(self, x):
+        sub = self._split(np.asarray(x, dtype=np.float32))
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            c = self.codebooks[j]
+            distances = (c * c).sum(axis=1) - 2.0 * (sub[:, j] @ c.T)
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def prerank(self, codes, query, norms, metric):
+        table = np.einsum("mkd,md->mk", self.codebooks, self._split(query[None, :])[0])
+        dots = table[np.arange(self.m), codes].sum(axis=1)
+        return _dot_distances(dots, norms, metric)
+
+    def state(self):
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state):
+        self.codebooks = state["codebooks"]
+        self.m = self.codebooks.shape[0]
+
+
+_QUANTIZERS = {
+    "int8": ScalarInt8Quantizer,
+    "binary": BinaryQuantizer,
+    "pq": ProductQuantizer,
+}
+
+
+def get_quantizer(mode, dimension, **kwargs):
+    """Quantizer for a storage mode, or None for float32/float16."""
+    if mode not in _QUANTIZERS:
+        return None
+    return _QUANTIZERS[mode](dimension, **kwargs)
@@ -2,13 +2,143 @@
 ShieldCraft AI Core - Vector Store Scaffold (pgvector, config-driven)
 """
 
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import io
+import json
+import struct
+import threading
+import time
+from datetime import datetime, timezone
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 import numpy as np
 from infra.utils.config_loader import get_config_loader
+from ai_core.vector_backend import (
+    FILTER_STRATEGIES,
+    INDEX_TYPES,
+    METRICS,
+    RRF_K,
+    UPSERT_KEYS,
+    VectorStoreBackend,
+    content_hash,
+    get_vector_store,
+    normalize_filters,
+    split_metadata,
+    to_vector,
+)
 
+UPSERT_MODES = ("values", "copy", "row")
+# pgvector can index half-precision and binary-quantized expressions of the
+# stored vector; int8/PQ codes have no pgvector type (local backend only).
+STORAGE_MODES = ("float32", "float16", "binary")
+_UPSERT_COLUMNS = (
+    "doc_id",
+    "chunk_index",
+    "content_hash",
+    "text",
+    "embedding",
+    "source",
+    "event_time",
+    "severity",
+    "metadata",
+)
+_PLACEHOLDERS = {"embedding": "%s::vector", "metadata": "%s::jsonb"}
+_PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
 
-class VectorStore:
-    def __init__(self, config=None):
+
+_QUERY_COLUMNS = "text, embedding"
+_ROW_COLUMNS = "id, text, embedding, doc_id, chunk_index, metadata"
+
+
+def _row_dicts(rows):
+    return [
+        {
+            "id": row_id,
+            "text": text,
+            "embedding": to_vector(embedding),
+            "doc_id": doc_id,
+            "chunk_index": chunk_index,
+            "metadata": metadata,
+        }
+        for row_id, text, embedding, doc_id, chunk_index, metadata in rows
+    ]
+
+
+def _vector_literals(embeddings):
+    """
+    Encode a 2D float array as pgvector text literals ('[x,y,...]') in one pass,
+    formatting straight from the NumPy buffer instead of via emb.tolist().
+    """
+    buf = io.StringIO()
+    np.savetxt(buf, embeddings, fmt="%.8g", delimiter=",")
+    return ["[" + line + "]" for line in buf.getvalue().splitlines()]
+
+
+def _copy_text_field(value):
+    if value is None:
+        return struct.pack(">i", -1)
+    data = value.encode("utf-8")
+    return struct.pack(">i", len(data)) + data
+
+
+def _copy_int_field(value, fmt=">i", size=4):
+    if value is None:
+        return struct.pack(">i", -1)
+    return struct.pack(">i", size) + struct.pack(fmt, value)
+
+
+def _copy_timestamptz_field(value):
+    # Binary timestamptz: int64 microseconds since 2000-01-01 UTC.
+    if value is None:
+        return struct.pack(">i", -1)
+    delta = value - _PG_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return struct.pack(">iq", 8, micros)
+
+
+def _copy_jsonb_field(value):
+    # Binary jsonb: version byte 1 followed by the JSON text.
+    if value is None:
+        return struct.pack(">i", -1)
+    data = b"\x01" + json.dumps(value).encode("utf-8")
+    return struct.pack(">i", len(data)) + data
+
+
+def _copy_binary_payload(columns, embeddings):
+    """
+    Build a PostgreSQL binary COPY stream for one batch. Vectors are written in
+    pgvector's binary wire format (uint16 dim, uint16 unused, float4 big-endian)
+    directly from the array buffer.
+    """
+    vectors = np.ascontiguousarray(embeddings, dtype=">f4")
+    dim = vectors.shape[1]
+    vector_prefix = struct.pack(">iHH", 4 + 4 * dim, dim, 0)
+    field_count = struct.pack(">h", len(_UPSERT_COLUMNS))
+    parts = [_PGCOPY_HEADER]
+    for i in range(vectors.shape[0]):
+        parts.append(field_count)
+        parts.append(_copy_text_field(columns["doc_id"][i]))
+        parts.append(_copy_int_field(columns["chunk_index"][i]))
+        parts.append(_copy_text_field(columns["content_hash"][i]))
+        parts.append(_copy_text_field(columns["text"][i]))
+        parts.append(vector_prefix)
+        parts.append(vectors[i].tobytes())
+        parts.append(_copy_text_field(columns["source"][i]))
+        parts.append(_copy_timestamptz_field(columns["event_time"][i]))
+        parts.append(_copy_int_field(columns["severity"][i], ">h", 2))
+        parts.append(_copy_jsonb_field(columns["metadata"][i]))
+    parts.append(_PGCOPY_TRAILER)
+    return io.BytesIO(b"".join(parts))
+
+
+class VectorStore(VectorStoreBackend):
+    def __init__(self, config=None, dimension=None):
         config_loader = get_config_loader()
         if config is None:
             config = config_loader.get_section("vector_store")
@@ -19,62 +149,948 @@ class VectorStore:
         self.db_password = config.get("db_password", "postgres")
         self.table_name = config.get("table_name", "embeddings")
         self.batch_size = config.get("batch_size", 100)
+        self.upsert_mode = config.get("upsert_mode", "values")
+        self.upsert_key = config.get("upsert_key", "content_hash")
+        if self.upsert_mode not in UPSERT_MODES:
+            print(f"[WARN] Unknown upsert_mode: {self.upsert_mode}, using 'values'.")
+            self.upsert_mode = "values"
+        if self.upsert_key not in UPSERT_KEYS:
+            print(
+                f"[WARN] Unknown upsert_key: {self.upsert_key}, using 'content_hash'."
+            )
+            self.upsert_key = "content_hash"
+        # None -> read from an existing table, else taken from the first upsert
+        self.dimension = dimension or config.get("dimension")
+        self.index_type = config.get("index_type", "hnsw")
+        self.metric = config.get("metric", "cosine")
+        if self.index_type not in INDEX_TYPES:
+            print(f"[WARN] Unknown index_type: {self.index_type}, using 'hnsw'.")
+            self.index_type = "hnsw"
+        if self.metric not in METRICS:
+            print(f"[WARN] Unknown metric: {self.metric}, using 'cosine'.")
+            self.metric = "cosine"
+        self.hnsw_m = config.get("hnsw_m", 16)
+        self.hnsw_ef_construction = config.get("hnsw_ef_construction", 64)
+        self.ivf_lists = config.get("ivf_lists", 100)
+        self.ef_search = config.get("ef_search", 40)
+        self.probes = config.get("probes", 1)
+        self.maintenance_work_mem = config.get("maintenance_work_mem")
+        self.storage_mode = config.get("storage_mode", "float32")
+        if self.storage_mode not in STORAGE_MODES:
+            print(
+                f"[WARN] storage_mode '{self.storage_mode}' is not supported by pgvector, using 'float32'."
+            )
+            self.storage_mode = "float32"
+        self.rerank_factor = config.get("rerank_factor", 10)
+        self.filter_strategy = config.get("filter_strategy", "auto")
+        if self.filter_strategy not in FILTER_STRATEGIES:
+            print(
+                f"[WARN] Unknown filter_strategy: {self.filter_strategy}, using 'auto'."
+            )
+            self.filter_strategy = "auto"
+        self.prefilter_max_rows = config.get("prefilter_max_rows", 50000)
+        self.iterative_scan = config.get("iterative_scan", "relaxed_order")
+        # Text search configuration for the generated tsvector column; 'simple'
+        # avoids stemming/stop words so identifiers match verbatim.
+        self.lexical_config = config.get("lexical_config", "simple")
+        self.rrf_k = config.get("rrf_k", RRF_K)
+        self.hybrid_weights = config.get("hybrid_weights")
+        self.hybrid_candidates = config.get("hybrid_candidates")
+        self.pool_min = config.get("pool_min", 1)
+        self.pool_max = config.get("pool_max", 1)
+        self.pool_pre_ping = config.get("pool_pre_ping", True)
+        self.reconnect_interval = config.get("reconnect_interval", 5.0)
+        self.conn = None
+        self.pool = None
+        self._pool_slots = threading.BoundedSemaphore(max(1, self.pool_max))
+        self._connect_lock = threading.Lock()
+        # Serializes callers sharing self.conn when there is no pool.
+        self._conn_lock = threading.RLock()
+        self._last_connect_failure = None
+        self._open()
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=self.db_host,
+            port=self.db_port,
+            dbname=self.db_name,
+            user=self.db_user,
+            password=self.db_password,
+        )
+
+    def _open(self):
+        """
+        Open the admin connection (DDL, single-connection mode) and, when
+        pool_max > 1, a ThreadedConnectionPool for concurrent queries/upserts.
+        """
         try:
-            self.conn = psycopg2.connect(
-                host=self.db_host,
-                port=self.db_port,
-                dbname=self.db_name,
-                user=self.db_user,
-                password=self.db_password,
-            )
-            self._ensure_table()
+            self.conn = self._connect()
+            if self.dimension is None:
+                self.dimension = self._stored_dimension()
+            if self.dimension is not None:
+                self._ensure_table()
+            else:
+                print(
+                    f"[INFO] Table {self.table_name} will be created on the first upsert, sized to its embeddings."
+                )
+            if self.pool_max > 1:
+                self.pool = ThreadedConnectionPool(
+                    self.pool_min,
+                    self.pool_max,
+                    host=self.db_host,
+                    port=self.db_port,
+                    dbname=self.db_name,
+                    user=self.db_user,
+                    password=self.db_password,
+                )
+            self._last_connect_failure = None
             print(
-                f"[INFO] Connected to pgvector DB: {self.db_name}@{self.db_host}:{self.db_port}"
+                f"[INFO] Connected to pgvector DB: {self.db_name}@{self.db_host}:{self.db_port} | Pool: {self.pool_min}-{self.pool_max}"
             )
         except (psycopg2.DatabaseError, psycopg2.OperationalError) as e:
             print(f"[ERROR] Vector store DB connection failed: {e}")
             self.conn = None
+            self.pool = None
+            self._last_connect_failure = time.monotonic()
+
+    def _maybe_reconnect(self):
+        # Reconnect a dropped/never-established connection, rate-limited after
+        # failures so an unreachable DB is not hammered on every call.
+        with self._connect_lock:
+            if self.pool is not None:
+                return
+            if self.conn is not None and not getattr(self.conn, "closed", 0):
+                return
+            if (
+                self._last_connect_failure is not None
+                and time.monotonic() - self._last_connect_failure
+                < self.reconnect_interval
+            ):
+                return
+            print("[WARN] Vector store connection lost, reconnecting.")
+            self._open()
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _pool_getconn(self):
+        # Health-checked checkout: discard closed (or, with pre-ping, dead)
+        # connections and let the pool open a fresh one.
+        for _ in range(self.pool_max + 1):
+            conn = self.pool.getconn()
+            if not conn.closed and (not self.pool_pre_ping or self._ping(conn)):
+                return conn
+            self.pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("No healthy pooled connection available.")
+
+    @contextlib.contextmanager
+    def _checkout(self):
+        """
+        Yield a healthy connection (pooled or direct), or None if not
+        connected. The direct connection is held by one caller at a time, so
+        concurrent transactions never interleave on it, and is rolled back
+        when a caller fails so one bad statement does not leave it aborted.
+        (The pool resets connections itself on putconn.)
+        """
+        if self.pool is None and (self.conn is None or getattr(self.conn, "closed", 0)):
+            self._maybe_reconnect()
+        if self.pool is None:
+            with self._conn_lock:
+                conn = self.conn
+                try:
+                    yield conn
+                except Exception:
+                    self._rollback(conn)
+                    raise
+            return
+        pool = self.pool
+        with self._pool_slots:
+            conn = self._pool_getconn()
+            try:
+                yield conn
+            finally:
+                pool.putconn(conn, close=bool(conn.closed))
+
+    @staticmethod
+    def _rollback(conn):
+        if conn is None or getattr(conn, "closed", 0):
+            return
+        try:
+            conn.rollback()
+        except (psycopg2.DatabaseError, psycopg2.InterfaceError) as e:
+            print(f"[WARN] Rollback failed: {e}")
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _stored_dimension(self, conn=None):
+        """Dimension of an existing table's embedding column, or None."""
+        conn = conn or self.conn
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT atttypmod FROM pg_attribute WHERE attrelid = to_regclass(%s) "
+                "AND attname = 'embedding' AND NOT attisdropped",
+                (self.table_name,),
+            )
+            row = cur.fetchone()
+        conn.commit()
+        return int(row[0]) if row and row[0] > 0 else None
+
+    def _has_table(self, conn):
+        # The table may since have been created by another process's upsert.
+        if self.dimension is None:
+            self.dimension = self._stored_dimension(conn)
+        return self.dimension is not None
 
     def _ensure_table(self):
+        key_columns = ", ".join(UPSERT_KEYS[self.upsert_key])
         with self.conn.cursor() as cur:
             cur.execute(
                 f"""
                 CREATE TABLE IF NOT EXISTS {self.table_name} (
                     id SERIAL PRIMARY KEY,
+                    doc_id TEXT,
+                    chunk_index INTEGER,
+                    content_hash TEXT,
                     text TEXT,
-                    embedding VECTOR(384)
+                    embedding VECTOR({int(self.dimension)}),
+                    source TEXT,
+                    event_time TIMESTAMPTZ,
+                    severity SMALLINT,
+                    metadata JSONB,
+                    tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('{self.lexical_config}', coalesce(text, ''))) STORED
                 );
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS doc_id TEXT;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS chunk_index INTEGER;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS content_hash TEXT;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS source TEXT;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS event_time TIMESTAMPTZ;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS severity SMALLINT;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS metadata JSONB;
+                ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS tsv TSVECTOR
+                    GENERATED ALWAYS AS (to_tsvector('{self.lexical_config}', coalesce(text, ''))) STORED;
+                CREATE UNIQUE INDEX IF NOT EXISTS {self.table_name}_{self.upsert_key}_key
+                    ON {self.table_name} ({key_columns});
+                CREATE INDEX IF NOT EXISTS {self.table_name}_source_time_idx
+                    ON {self.table_name} (source, event_time);
+                CREATE INDEX IF NOT EXISTS {self.table_name}_event_time_idx
+                    ON {self.table_name} (event_time);
+                CREATE INDEX IF NOT EXISTS {self.table_name}_severity_idx
+                    ON {self.table_name} (severity);
+                CREATE INDEX IF NOT EXISTS {self.table_name}_metadata_idx
+                    ON {self.table_name} USING gin (metadata jsonb_path_ops);
+                CREATE INDEX IF NOT EXISTS {self.table_name}_tsv_idx
+                    ON {self.table_name} USING gin (tsv);
             """
             )
+            # HNSW needs no training data, so it can be created up front and
+            # maintained incrementally. IVFFlat learns its lists from existing
+            # rows and must be built with build_index() after the initial load.
+            if self.index_type == "hnsw":
+                cur.execute(self._index_ddl(if_not_exists=True))
             self.conn.commit()
 
-    def upsert_embeddings(self, texts, embeddings):
+    @property
+    def index_name(self):
+        mode = "" if self.storage_mode == "float32" else f"_{self.storage_mode}"
+        return f"{self.table_name}_embedding_{self.index_type}_{self.metric}{mode}_idx"
+
+    def _index_expression(self):
+        ops = METRICS[self.metric][1]
+        if self.storage_mode == "float16":
+            return f"(embedding::halfvec({int(self.dimension)})) {ops.replace('vector_', 'halfvec_')}"
+        if self.storage_mode == "binary":
+            return f"(binary_quantize(embedding)::bit({int(self.dimension)})) bit_hamming_ops"
+        return f"embedding {ops}"
+
+    def _ann_query(self, columns, vector, top_k, where="", where_params=()):
+        """
+        Index-backed top-k SELECT as (sql, params). Quantized storage modes
+        pre-rank top_k * rerank_factor rows on the halfvec/bit index
+        expression, then re-rank them on the full-precision vectors.
+        """
+        operator = METRICS[self.metric][0]
+        where_sql = f" WHERE {where}" if where else ""
+        if self.storage_mode == "float32":
+            return (
+                f"SELECT {columns} FROM {self.table_name}{where_sql} "
+                f"ORDER BY embedding {operator} %s::vector LIMIT %s",
+                tuple(where_params) + (vector, top_k),
+            )
+        dim = int(self.dimension)
+        if self.storage_mode == "float16":
+            key = f"embedding::halfvec({dim}) {operator} %s::halfvec({dim})"
+        else:
+            key = f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize(%s::vector)::bit({dim})"
+        return (
+            f"SELECT {columns} FROM (SELECT * FROM {self.table_name}{where_sql} "
+            f"ORDER BY {key} LIMIT %s) candidates "
+            f"ORDER BY embedding {operator} %s::vector LIMIT %s",
+            tuple(where_params)
+            + (vector, max(top_k, top_k * self.rerank_factor), vector, top_k),
+        )
+
+    def _index_ddl(self, if_not_exists=False, concurrently=False):
+        if self.index_type == "hnsw":
+            method = "hnsw"
+            params = f"m = {int(self.hnsw_m)}, ef_construction = {int(self.hnsw_ef_construction)}"
+        else:
+            method = "ivfflat"
+            params = f"lists = {int(self.ivf_lists)}"
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}"
+            f"{'IF NOT EXISTS ' if if_not_exists else ''}{self.index_name} "
+            f"ON {self.table_name} USING {method} ({self._index_expression()}) WITH ({params})"
+        )
+
+    def build_index(self, rebuild=False, concurrently=False):
+        """
+        Build (or with rebuild=True, drop and rebuild) the configured ANN index.
+        Returns a dict with the index name and build seconds, or an error string.
+        """
+        if self.index_type == "none":
+            return "[ERROR] index_type is 'none'; nothing to build."
+        if self.conn is None:
+            self._maybe_reconnect()
         if self.conn is None:
             return "[ERROR] Vector store not connected."
+        start = time.perf_counter()
+        previous_autocommit = self.conn.autocommit
         try:
+            # CONCURRENTLY cannot run inside a transaction block.
+            self.conn.autocommit = True
+            if not self._has_table(self.conn):
+                return "[ERROR] Vector store is empty; load data before building the index."
             with self.conn.cursor() as cur:
-                for text, emb in zip(texts, embeddings):
+                if self.maintenance_work_mem:
+                    cur.execute(
+                        "SET maintenance_work_mem = %s", (self.maintenance_work_mem,)
+                    )
+                if rebuild:
                     cur.execute(
-                        f"INSERT INTO {self.table_name} (text, embedding) VALUES (%s, %s)",
-                        (text, emb.tolist()),
+                        f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {self.index_name}"
                     )
-                self.conn.commit()
-            print(f"[INFO] Upserted {len(texts)} embeddings.")
+                cur.execute(
+                    self._index_ddl(
+                        if_not_exists=not rebuild, concurrently=concurrently
+                    )
+                )
+                cur.execute(f"ANALYZE {self.table_name}")
         except (psycopg2.DatabaseError, psycopg2.OperationalError) as e:
+            print(f"[ERROR] Index build failed: {e}")
+            return "[ERROR] Index build failed."
+        finally:
+            if not self.conn.closed:
+                self.conn.autocommit = previous_autocommit
+        elapsed = time.perf_counter() - start
+        print(
+            f"[INFO] Built index {self.index_name} in {elapsed:.1f}s | Type: {self.index_type} | Metric: {self.metric}"
+        )
+        return {"index": self.index_name, "seconds": elapsed}
+
+    def _conflict_clause(self):
+        key_columns = UPSERT_KEYS[self.upsert_key]
+        updates = ", ".join(
+            f"{col} = EXCLUDED.{col}"
+            for col in _UPSERT_COLUMNS
+            if col not in key_columns
+        )
+        return f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}"
+
+    def _dedupe_batch(self, columns):
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement,
+        # so keep only the last occurrence of each key within a batch.
+        key_columns = [columns[c] for c in UPSERT_KEYS[self.upsert_key]]
+        latest = {}
+        for pos, key in enumerate(zip(*key_columns)):
+            latest[key] = pos
+        return sorted(latest.values())
+
+    def _insert_values_batch(self, cur, columns, embeddings):
+        keep = self._dedupe_batch(columns)
+        values = {col: [columns[col][i] for i in keep] for col in columns}
+        values["embedding"] = _vector_literals(embeddings[keep])
+        values["metadata"] = [
+            None if m is None else json.dumps(m) for m in values["metadata"]
+        ]
+        row_template = (
+            "(" + ", ".join(_PLACEHOLDERS.get(c, "%s") for c in _UPSERT_COLUMNS) + ")"
+        )
+        placeholders = ", ".join([row_template] * len(keep))
+        params = [values[col][j] for j in range(len(keep)) for col in _UPSERT_COLUMNS]
+        cur.execute(
+            f"INSERT INTO {self.table_name} ({', '.join(_UPSERT_COLUMNS)}) VALUES "
+            f"{placeholders}{self._conflict_clause()}",
+            params,
+        )
+
+    def _copy_batch(self, cur, columns, embeddings):
+        keep = self._dedupe_batch(columns)
+        payload = _copy_binary_payload(
+            {col: [columns[col][i] for i in keep] for col in columns},
+            embeddings[keep],
+        )
+        column_list = ", ".join(_UPSERT_COLUMNS)
+        staging = f"{self.table_name}_staging"
+        # Only the upserted columns, without defaults: copying into a LIKE
+        # ... INCLUDING DEFAULTS clone would draw ids from the main table's
+        # sequence for rows that then resolve as conflicts.
+        cur.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {self.table_name} WITH NO DATA"
+        )
+        cur.copy_expert(
+            f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT binary)", payload
+        )
+        cur.execute(
+            f"INSERT INTO {self.table_name} ({column_list}) SELECT {column_list} FROM {staging}"
+            f"{self._conflict_clause()}"
+        )
+
+    def upsert_embeddings(
+        self,
+        texts,
+        embeddings,
+        doc_ids=None,
+        chunk_indices=None,
+        mode=None,
+        metadata=None,
+    ):
+        """
+        Upsert chunk embeddings in batch_size groups. Returns a stats dict with
+        rows, seconds and rows_per_sec, or an error string.
+        mode: 'values' (multi-row INSERT), 'copy' (binary COPY via staging table),
+        or 'row' (legacy one INSERT per row, kept for comparison).
+        metadata: optional per-chunk dicts; source/timestamp/severity are
+        promoted to indexed columns and the full dict is stored as JSONB.
+        """
+        mode = mode or self.upsert_mode
+        if mode not in UPSERT_MODES:
+            return f"[ERROR] Unknown upsert mode: {mode}"
+        if len(texts) != len(embeddings):
+            return "[ERROR] texts and embeddings must have the same length."
+        if doc_ids is None:
+            doc_ids = ["" for _ in texts]
+        if chunk_indices is None:
+            chunk_indices = list(range(len(texts)))
+        if metadata is None:
+            metadata = [None for _ in texts]
+        if (
+            len(doc_ids) != len(texts)
+            or len(chunk_indices) != len(texts)
+            or len(metadata) != len(texts)
+        ):
+            return "[ERROR] doc_ids, chunk_indices and metadata must match texts."
+        try:
+            promoted = [split_metadata(m) for m in metadata]
+        except ValueError as e:
+            return f"[ERROR] Invalid chunk metadata: {e}"
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(texts) and embeddings.ndim != 2:
+            return "[ERROR] embeddings must be a 2D array."
+        if len(texts) and self.dimension is None and self.conn is not None:
+            # Sized like LocalVectorStore: by the first batch, not by a model lookup.
+            try:
+                with self._conn_lock:
+                    if self.dimension is None:
+                        self.dimension = int(embeddings.shape[1])
+                        self._ensure_table()
+            except (psycopg2.DatabaseError, psycopg2.OperationalError) as e:
+                self.dimension = None
+                self._rollback(self.conn)
+                print(f"[ERROR] Creating table {self.table_name} failed: {e}")
+                return "[ERROR] Upsert failed."
+        if len(texts) and self.dimension is not None:
+            if embeddings.shape[1] != self.dimension:
+                return f"[ERROR] Embedding dimension {embeddings.shape[1]} does not match store dimension {self.dimension}."
+        batch_size = self.batch_size or len(texts) or 1
+        start = time.perf_counter()
+        try:
+            with self._checkout() as conn:
+                if conn is None:
+                    return "[ERROR] Vector store not connected."
+                try:
+                    with conn.cursor() as cur:
+                        if mode == "row":
+                            for text, emb in zip(texts, embeddings):
+                                cur.execute(
+                                    f"INSERT INTO {self.table_name} (text, embedding) VALUES (%s, %s)",
+                                    (text, emb.tolist()),
+                                )
+                            conn.commit()
+                        else:
+                            write_batch = (
+                                self._copy_batch
+                                if mode == "copy"
+                                else self._insert_values_batch
+                            )
+                            for i in range(0, len(texts), batch_size):
+                                batch = slice(i, i + batch_size)
+                                batch_meta = promoted[batch]
+                                columns = {
+                                    "doc_id": doc_ids[batch],
+                                    "chunk_index": [
+                                        int(c) for c in chunk_indices[batch]
+                                    ],
+                                    "content_hash": [
+                                        content_hash(t) for t in texts[batch]
+                                    ],
+                                    "text": texts[batch],
+                                    "source": [m[0] for m in batch_meta],
+                                    "event_time": [m[1] for m in batch_meta],
+                                    "severity": [m[2] for m in batch_meta],
+                                    "metadata": [
+                                        m[3] if meta is not None else None
+                                        for m, meta in zip(batch_meta, metadata[batch])
+                                    ],
+                                }
+                                write_batch(cur, columns, embeddings[batch])
+                                conn.commit()
+                except psycopg2.DatabaseError:
+                    if not getattr(conn, "closed", 0):
+                        conn.rollback()
+                    raise
+        except (
+            psycopg2.DatabaseError,
+            psycopg2.OperationalError,
+            psycopg2.InterfaceError,
+        ) as e:
             print(f"[ERROR] Upsert failed: {e}")
             return "[ERROR] Upsert failed."
+        elapsed = time.perf_counter() - start
+        rows_per_sec = len(texts) / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"[INFO] Upserted {len(texts)} embeddings in {elapsed:.3f}s | {rows_per_sec:.0f} rows/s | Mode: {mode}"
+        )
+        return {
+            "rows": len(texts),
+            "seconds": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "mode": mode,
+        }
 
-    def query(self, query_embedding, top_k=5):
-        if self.conn is None:
-            return "[ERROR] Vector store not connected."
+    def delete_texts(self, texts):
+        """Delete the rows holding texts (by content hash); returns the count deleted."""
+        hashes = [content_hash(t) for t in texts]
+        if not hashes:
+            return 0
         try:
-            with self.conn.cursor() as cur:
-                cur.execute(
-                    f"SELECT text, embedding FROM {self.table_name} ORDER BY embedding <-> %s LIMIT %s",
-                    (query_embedding.tolist(), top_k),
-                )
-                results = cur.fetchall()
-            return results
-        except (psycopg2.DatabaseError, psycopg2.OperationalError) as e:
-            print(f"[ERROR] Query failed: {e}")
-            return "[ERROR] Query failed."
+            with self._checkout() as conn:
+                if conn is None:
+                    return "[ERROR] Vector store not connected."
+                if not self._has_table(conn):
+                    return 0
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            f"DELETE FROM {self.table_name} WHERE content_hash = ANY(%s)",
+                            (hashes,),
+                        )
+                        deleted = cur.rowcount
+                    conn.commit()
+                except psycopg2.DatabaseError:
+                    if not getattr(conn, "closed", 0):
+                        conn.rollback()
+                    raise
+        except (
+            psycopg2.DatabaseError,
+            psycopg2.OperationalError,
+            psycopg2.InterfaceError,
+        ) as e:
+            print(f"[ERROR] Delete failed: {e}")
+            return "[ERROR] Delete failed."
+        return deleted
+
+    def _search_settings(self, cur, ef_search=None, probes=None, exact=False):
+        # SET LOCAL scopes the knobs to the current transaction only.
+        if exact:
+            cur.execute("SET LOCAL enable_indexscan = off")
+            cur.execute("SET LOCAL enable_bitmapscan = off")
+        elif self.index_type == "hnsw":
+            cur.execute(
+                "SET LOCAL hnsw.ef_search = %s",
+                (int(ef_search if ef_search is not None else self.ef_search),),
+            )
+        elif self.index_type == "ivfflat":
+            cur.execute(
+                "SET LOCAL ivfflat.probes = %s",
+                (int(probes if probes is not None else self.probes),),
+            )
+
+    def _filter_clause(self, filters):
+        """Translate normalized filters into a WHERE clause backed by the B-tree/GIN indexes."""
+        clauses = []
+        params = []
+        for column in ("source", "doc_id", "severity"):
+            if column not in filters:
+                continue
+            value = filters[column]
+            if isinstance(value, list):
+                clauses.append(f"{column} = ANY(%s)")
+            else:
+                clauses.append(f"{column} = %s")
+            params.append(value)
+        if "start" in filters:
+            clauses.append("event_time >= %s")
+            params.append(filters["start"])
+        if "end" in filters:
+            clauses.append("event_time < %s")
+            params.append(filters["end"])
+        if "min_severity" in filters:
+            clauses.append("severity >= %s")
+            params.append(filters["min_severity"])
+        if "metadata" in filters:
+            clauses.append("metadata @> %s::jsonb")
+            params.append(json.dumps(filters["metadata"]))
+        return " AND ".join(clauses), params
+
+    def _filtered_query(
+        self, cur, where, where_params, vector, top_k, columns=_QUERY_COLUMNS
+    ):
+        """
+        Pick the filtered search plan and return (sql, params). 'prefilter' materializes the matching ids
+        through the metadata indexes and ranks them exactly; 'iterative' keeps
+        the ANN index and lets pgvector keep scanning until top_k rows pass the
+        filter. 'auto' prefilters when at most prefilter_max_rows match.
+        """
+        strategy = self.filter_strategy
+        if strategy == "auto":
+            cur.execute(
+                f"SELECT count(*) FROM (SELECT 1 FROM {self.table_name} WHERE {where} LIMIT %s) matched",
+                where_params + [self.prefilter_max_rows + 1],
+            )
+            matched = cur.fetchone()[0]
+            strategy = (
+                "prefilter" if matched <= self.prefilter_max_rows else "iterative"
+            )
+        if strategy == "prefilter":
+            operator = METRICS[self.metric][0]
+            return (
+                f"WITH candidates AS MATERIALIZED (SELECT id FROM {self.table_name} WHERE {where}) "
+                f"SELECT {', '.join('t.' + c for c in columns.split(', '))} "
+                f"FROM {self.table_name} t JOIN candidates c ON t.id = c.id "
+                f"ORDER BY t.embedding {operator} %s::vector LIMIT %s",
+                where_params + [vector, top_k],
+            )
+        if self.iterative_scan and self.index_type in ("hnsw", "ivfflat"):
+            cur.execute(
+                f"SET LOCAL {self.index_type}.iterative_scan = %s",
+                (self.iterative_scan,),
+            )
+        return self._ann_query(columns, vector, top_k, where, where_params)
+
+    def query(
+        self, query_embedding, top_k=5, ef_search=None, probes=None, filters=None
+    ):
+        """
+        Top-k nearest neighbours under the configured metric. ef_search (HNSW)
+        and probes (IVFFlat) override the configured defaults for this query.
+        filters: see VectorStoreBackend (source, doc_id, start, end, severity,
+        min_severity, metadata).
+        """
+        return self._nearest(
+            _QUERY_COLUMNS, query_embedding, top_k, ef_search, probes, filters
+        )
+
+    def query_rows(
+        self, query_embedding, top_k=5, ef_search=None, probes=None, filters=None
+    ):
+        """query() as row dicts keyed by the table's id column."""
+        rows = self._nearest(
+            _ROW_COLUMNS, query_embedding, top_k, ef_search, probes, filters
+        )
+        return rows if isinstance(rows, str) else _row_dicts(rows)
+
+    def _nearest(self, columns, query_embedding, top_k, ef_search, probes, filters):
+        try:
+            filters = normalize_filters(filters)
+        except ValueError as e:
+            return f"[ERROR] Invalid filters: {e}"
+        where, where_params = self._filter_clause(filters)
+        vector = _vector_literals(np.asarray(query_embedding).reshape(1, -1))[0]
+        # One transparent retry: a connection dropped by the server is discarded
+        # on the first failure and replaced on the second checkout.
+        for attempt in range(2):
+            try:
+                with self._checkout() as conn:
+                    if conn is None:
+                        return "[ERROR] Vector store not connected."
+                    if not self._has_table(conn):
+                        return []
+                    with conn.cursor() as cur:
+                        self._search_settings(cur, ef_search, probes)
+                        if where:
+                            sql, params = self._filtered_query(
+                                cur, where, where_params, vector, top_k, columns
+                            )
+                        else:
+                            sql, params = self._ann_query(columns, vector, top_k)
+                        cur.execute(sql, params)
+                        results = cur.fetchall()
+                    conn.commit()
+                    return results
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt == 0:
+                    print(f"[WARN] Query connection error, retrying: {e}")
+                    continue
+                print(f"[ERROR] Query failed: {e}")
+                return "[ERROR] Query failed."
+            except psycopg2.DatabaseError as e:
+                print(f"[ERROR] Query failed: {e}")
+                return "[ERROR] Query failed."
+
+    def lexical_query(self, query_text, top_k=5, filters=None):
+        """
+        Top-k rows by full-text rank over the GIN-indexed tsvector column, as
+        (text, embedding) tuples. Query terms are OR-ed so any exact token
+        (CVE id, IP, hash) can match; ts_rank_cd orders by coverage.
+        """
+        return self._ranked_lexical(_QUERY_COLUMNS, query_text, top_k, filters)
+
+    def lexical_rows(self, query_text, top_k=5, filters=None):
+        """lexical_query() as row dicts keyed by the table's id column."""
+        rows = self._ranked_lexical(_ROW_COLUMNS, query_text, top_k, filters)
+        return rows if isinstance(rows, str) else _row_dicts(rows)
+
+    def _ranked_lexical(self, columns, query_text, top_k, filters):
+        try:
+            filters = normalize_filters(filters)
+        except ValueError as e:
+            return f"[ERROR] Invalid filters: {e}"
+        where, where_params = self._filter_clause(filters)
+        # plainto_tsquery ANDs the terms; swapping '&' for '|' gives OR semantics.
+        sql = (
+            f"SELECT {', '.join('t.' + c for c in columns.split(', '))} FROM {self.table_name} t, "
+            f"CAST(replace(plainto_tsquery('{self.lexical_config}', %s)::text, '&', '|') AS tsquery) q "
+            f"WHERE t.tsv @@ q {'AND ' + where if where else ''} "
+            f"ORDER BY ts_rank_cd(t.tsv, q) DESC LIMIT %s"
+        )
+        for attempt in range(2):
+            try:
+                with self._checkout() as conn:
+                    if conn is None:
+                        return "[ERROR] Vector store not connected."
+                    if not self._has_table(conn):
+                        return []
+                    with conn.cursor() as cur:
+                        cur.execute(sql, [query_text] + where_params + [top_k])
+                        results = cur.fetchall()
+                    conn.commit()
+                    return results
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt == 0:
+                    print(f"[WARN] Lexical query connection error, retrying: {e}")
+                    continue
+                print(f"[ERROR] Lexical query failed: {e}")
+                return "[ERROR] Lexical query failed."
+            except psycopg2.DatabaseError as e:
+                print(f"[ERROR] Lexical query failed: {e}")
+                return "[ERROR] Lexical query failed."
+
+    def _search_ids(self, cur, vector, top_k, ef_search=None, probes=None, exact=False):
+        self._search_settings(cur, ef_search, probes, exact)
+        if exact:
+            cur.execute(
+                f"SELECT id FROM {self.table_name} ORDER BY embedding {METRICS[self.metric][0]} %s::vector LIMIT %s",
+                (vector, top_k),
+            )
+        else:
+            cur.execute(*self._ann_query("id", vector, top_k))
+        return [row[0] for row in cur.fetchall()]
+
+    def recall_latency_report(
+        self, sample_size=100, top_k=10, ef_search_values=None, probes_values=None
+    ):
+        """
+        Tune the ANN index: sample stored vectors as queries, compute exact
+        top-k with index scans disabled, then measure recall@k and latency
+        for each ef_search (HNSW) or probes (IVFFlat) setting.
+        """
+        if self.index_type == "none":
+            return "[ERROR] index_type is 'none'; nothing to tune."
+        if self.index_type == "hnsw":
+            knob = "ef_search"
+            values = ef_search_values or [top_k, 20, 40, 80, 160, 320]
+        else:
+            knob = "probes"
+            values = probes_values or [1, 2, 4, 8, 16, 32]
+        try:
+            with self._checkout() as conn:
+                if conn is None:
+                    return "[ERROR] Vector store not connected."
+                if not self._has_table(conn):
+                    return "[ERROR] Vector store is empty; nothing to tune."
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"SELECT embedding::text FROM {self.table_name} ORDER BY random() LIMIT %s",
+                        (sample_size,),
+                    )
+                    queries = [row[0] for row in cur.fetchall()]
+                    truth = []
+                    for q in queries:
+                        truth.append(set(self._search_ids(cur, q, top_k, exact=True)))
+                        conn.rollback()
+                    report = []
+                    for value in values:
+                        latencies = []
+                        hits = 0
+                        for q, expected in zip(queries, truth):
+                            start = time.perf_counter()
+                            ids = self._search_ids(cur, q, top_k, **{knob: value})
+                            latencies.append((time.perf_counter() - start) * 1000)
+                            conn.rollback()
+                            hits += len(expected.intersection(ids))
+                        denom = sum(len(t) for t in truth) or 1
+                        report.append(
+                            {
+                                knob: value,
+                                f"recall@{top_k}": hits / denom,
+                                "p50_ms": float(np.percentile(latencies, 50)),
+                                "p95_ms": float(np.percentile(latencies, 95)),
+                                "queries": len(queries),
+                            }
+                        )
+                        print(
+                            f"[INFO] {knob}={value} | recall@{top_k}: {hits / denom:.3f} | p50: {report[-1]['p50_ms']:.2f}ms | p95: {report[-1]['p95_ms']:.2f}ms"
+                        )
+                    return report
+        except (
+            psycopg2.DatabaseError,
+            psycopg2.OperationalError,
+            psycopg2.InterfaceError,
+        ) as e:
+            print(f"[ERROR] Index report failed: {e}")
+            return "[ERROR] Index report failed."
+
+    def query_many(self, query_embeddings, top_k=5, filters=None, max_workers=None):
+        """
+        Run several top-k queries concurrently, one pooled connection per
+        in-flight query. Without a pool they run one after another on the
+        single connection. Results are returned in input order.
+        """
+        workers = max_workers or max(1, self.pool_max)
+        if self.pool is None:
+            workers = 1
+        run_one = functools.partial(self.query, top_k=top_k, filters=filters)
+        if workers == 1 or len(query_embeddings) <= 1:
+            return [run_one(q) for q in query_embeddings]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run_one, query_embeddings))
+
+
+class AsyncVectorStore:
+    """
+    asyncio facade over a vector store backend. psycopg2 is blocking, so calls
+    run on an executor sized to the connection pool (pool_max).
+    """
+
+    def __init__(self, config=None, store=None):
+        self.store = store if store is not None else get_vector_store(config)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, self.store.pool_max)
+        )
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def upsert_embeddings(self, texts, embeddings, **kwargs):
+        return await self._run(
+            self.store.upsert_embeddings, texts, embeddings, **kwargs
+        )
+
+    async def upsert_stream(self, batches, **kwargs):
+        return await self._run(self.store.upsert_stream, batches, **kwargs)
+
+    async def query(self, query_embedding, top_k=5, filters=None):
+        return await self._run(
+            self.store.query, query_embedding, top_k=top_k, filters=filters
+        )
+
+    async def query_many(self, query_embeddings, top_k=5, filters=None):
+        return await asyncio.gather(
+            *(self.query(q, top_k=top_k, filters=filters) for q in query_embeddings)
+        )
+
+    async def hybrid_query(self, query_text, query_embedding, top_k=5, filters=None):
+        return await self._run(
+            self.store.hybrid_query,
+            query_text,
+            query_embedding,
+            top_k=top_k,
+            filters=filters,
+        )
+
+    async def close(self):
+        await self._run(self.store.close)
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Manage the vector store ANN index. Backend and index settings come from the vector_store config."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build-index", help="Build the ANN index")
+    build_parser.add_argument(
+        "--rebuild", action="store_true", help="Drop and rebuild the index"
+    )
+    build_parser.add_argument(
+        "--concurrently",
+        action="store_true",
+        help="Build without blocking writes (CREATE INDEX CONCURRENTLY)",
+    )
+    report_parser = subparsers.add_parser(
+        "index-report", help="Recall-vs-latency report for ef_search/probes"
+    )
+    report_parser.add_argument("--sample-size", type=int, default=100)
+    report_parser.add_argument("--top-k", type=int, default=10)
+    report_parser.add_argument("--values", type=int, nargs="*", default=None)
+    report_parser.add_argument(
+        "--output", type=str, default=None, help="Optional JSON output path"
+    )
+    storage_parser = subparsers.add_parser(
+        "storage-report",
+        help="Memory footprint and recall@k per storage mode (local backend)",
+    )
+    storage_parser.add_argument("--sample-size", type=int, default=100)
+    storage_parser.add_argument("--top-k", type=int, default=10)
+    storage_parser.add_argument("--modes", type=str, nargs="*", default=None)
+    storage_parser.add_argument(
+        "--output", type=str, default=None, help="Optional JSON output path"
+    )
+    args = parser.parse_args()
+
+    store = get_vector_store()
+    if args.command == "build-index":
+        print(store.build_index(rebuild=args.rebuild, concurrently=args.concurrently))
+    else:
+        if args.command == "storage-report":
+            report = store.storage_report(
+                sample_size=args.sample_size, top_k=args.top_k, modes=args.modes
+            )
+        else:
+            report = store.recall_latency_report(
+                sample_size=args.sample_size,
+                top_k=args.top_k,
+                ef_search_values=args.values,
+                probes_values=args.values,
+            )
+        if args.output and isinstance(report, list):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+    store.close()
@@ -12,6 +12,7 @@ class BeirConfig(BaseModel):
     data_path: Optional[str] = "./beir_datasets"
     output_path: Optional[str] = "beir_results.json"
     batch_size: Optional[int] = 32
+    retrieval: Optional[str] = "dense"  # dense, hybrid
     model_config = ConfigDict(extra="ignore")
 
 
@@ -423,6 +424,12 @@ class ChunkingConfig(BaseModel):
     token_based: Optional[Dict[str, Any]] = None
     sliding_window: Optional[Dict[str, Any]] = None
     custom_heuristic: Optional[Dict[str, Any]] = None
+    export_models: Optional[bool] = False  # pydantic Chunks instead of ChunkSpans
+    batch_mode: Optional[str] = "auto"  # auto, serial, thread, process
+    parallel_min_chars: Optional[int] = 1000000  # smaller batches run serially
+    parallel_start_method: Optional[str] = "spawn"  # process pool start method
+    stream_read_chars: Optional[int] = 1048576  # chunk_stream characters per read
+    stream_max_part_chars: Optional[int] = 16777216  # cut delimiter-less parts here
     model_config = ConfigDict(extra="ignore")
 
 
@@ -430,6 +437,19 @@ class AICoreConfig(BaseModel):
     model_name: str
     quantize: Optional[bool] = False
     device: Optional[str] = "cpu"
+    lazy_load: Optional[bool] = True  # load weights on first use
+    model_warm_start: Optional[bool] = False  # mmap local safetensors snapshot
+    generation_max_batch_rows: Optional[int] = 16  # generate_batch rows
+    generation_max_batch_tokens: Optional[int] = 8192  # padded prompt + new tokens
+    prefix_cache_enabled: Optional[bool] = True  # reuse KV cache of registered prefixes
+    prefix_cache_max_mb: Optional[float] = 512  # LRU-evicted beyond this
+    response_cache_enabled: Optional[bool] = False  # semantic answer cache
+    response_cache_threshold: Optional[float] = 0.95  # min cosine similarity
+    response_cache_ttl_s: Optional[float] = 3600
+    response_cache_max_entries: Optional[int] = 10000
+    response_cache_candidates: Optional[int] = 5  # nearest rows per lookup
+    response_cache_backend: Optional[str] = "local"  # vector store backend
+    response_cache_path: Optional[str] = "./vector_index/response_cache"
     model_config = ConfigDict(extra="ignore", protected_namespaces=())
 
 
@@ -437,11 +457,48 @@ class EmbeddingConfig(BaseModel):
     model_name: str
     quantize: Optional[bool] = False
     device: Optional[str] = "cpu"
+    lazy_load: Optional[bool] = True  # load weights on first use
+    model_warm_start: Optional[bool] = False  # mmap local safetensors snapshot
     batch_size: Optional[int] = 32
+    cache_enabled: Optional[bool] = False
+    cache_path: Optional[str] = "./embedding_cache/embeddings.sqlite"
+    cache_memory_items: Optional[int] = 10000  # in-memory LRU entries
+    cache_max_disk_mb: Optional[float] = 1024
+    length_bucketing: Optional[bool] = True
+    max_batch_tokens: Optional[int] = 8192  # padded tokens per model batch
+    max_batch_rows: Optional[int] = 256
+    stream_batch_rows: Optional[int] = 1024  # encode_stream rows per batch
+    stream_prefetch: Optional[int] = 2  # batches tokenized ahead
+    tokenizer_cache_items: Optional[int] = 100000  # shared token-id LRU
+    microbatch_max_size: Optional[int] = 64  # API micro-batcher flush size
+    microbatch_max_wait_ms: Optional[float] = 5
+    microbatch_max_queue: Optional[int] = 1024  # reject beyond this (503)
+    microbatch_timeout_s: Optional[float] = 2.0  # per-request deadline (504)
+    pooling: Optional[str] = "mean"  # mean, cls, max
+    normalize: Optional[bool] = False  # L2-normalize outputs
+    backend: Optional[str] = "torch"  # torch, onnx, stub
+    stub_dimension: Optional[int] = 384  # stub backend vector size
+    onnx_cache_dir: Optional[str] = "./embedding_cache/onnx"
+    onnx_quantize: Optional[bool] = True  # dynamic int8 weights
+    onnx_intra_op_threads: Optional[int] = 0  # 0 = all physical cores
+    onnx_inter_op_threads: Optional[int] = 1
+    parallel_workers: Optional[int] = 0  # 0 = cpu_count // threads per worker
+    parallel_threads_per_worker: Optional[int] = 4
+    parallel_chunk_rows: Optional[int] = 512
+    parallel_max_restarts: Optional[int] = 3
+    parallel_task_timeout_s: Optional[float] = 300
+    parallel_start_method: Optional[str] = "spawn"
     model_config = ConfigDict(extra="ignore", protected_namespaces=())
 
 
 class VectorStoreConfig(BaseModel):
+    backend: Optional[str] = "pgvector"  # pgvector, local
+    local_path: Optional[str] = "./vector_index"
+    # float32, float16, binary (pgvector + local); int8, pq (local only)
+    storage_mode: Optional[str] = "float32"
+    pq_m: Optional[int] = 48  # PQ sub-vectors (bytes per vector)
+    rerank_factor: Optional[int] = 10  # quantized modes re-rank top_k * factor
+    kmeans_iters: Optional[int] = 10
     db_host: str
     db_port: int
     db_name: str
@@ -449,6 +506,30 @@ class VectorStoreConfig(BaseModel):
     db_password: str
     table_name: str
     batch_size: Optional[int] = 100
+    upsert_mode: Optional[str] = "values"  # values, copy, row
+    upsert_key: Optional[str] = "content_hash"  # content_hash, doc_chunk
+    dimension: Optional[int] = None  # None = from existing table or first upsert
+    index_type: Optional[str] = "hnsw"  # none, hnsw, ivfflat
+    metric: Optional[str] = "cosine"  # l2, cosine, ip
+    hnsw_m: Optional[int] = 16
+    hnsw_ef_construction: Optional[int] = 64
+    ivf_lists: Optional[int] = 100
+    ef_search: Optional[int] = 40
+    probes: Optional[int] = 1
+    maintenance_work_mem: Optional[str] = None
+    pool_min: Optional[int] = 1
+    pool_max: Optional[int] = 1  # >1 enables ThreadedConnectionPool
+    pool_pre_ping: Optional[bool] = True
+    reconnect_interval: Optional[float] = 5.0
+    filter_strategy: Optional[str] = "auto"  # auto, prefilter, iterative
+    prefilter_max_rows: Optional[int] = 50000
+    iterative_scan: Optional[str] = "relaxed_order"  # strict_order, relaxed_order
+    lexical_config: Optional[str] = "simple"
+    bm25_k1: Optional[float] = 1.2
+    bm25_b: Optional[float] = 0.75
+    rrf_k: Optional[int] = 60
+    hybrid_weights: Optional[List[float]] = None  # [dense, lexical]
+    hybrid_candidates: Optional[int] = None
     model_config = ConfigDict(extra="ignore")
 
     model_config = ConfigDict(extra="allow")
@@ -18,6 +18,7 @@ def handler(event, context):
       - data_path: path for BEIR datasets
       - output_path: where to save results
       - batch_size: batch size for encoding
+      - retrieval: 'dense' or 'hybrid'
     """
     logging.basicConfig(level=logging.INFO)
     try:
@@ -25,11 +26,13 @@ def handler(event, context):
         data_path = event.get("data_path", "./beir_datasets")
         output_path = event.get("output_path", "/tmp/beir_results.json")
         batch_size = event.get("batch_size", 32)
+        retrieval = event.get("retrieval", "dense")
         result = run_beir(
             datasets=datasets,
             data_path=data_path,
             output_path=output_path,
             batch_size=batch_size,
+            retrieval=retrieval,
         )
         return {
             "statusCode": 200,
@@ -0,0 +1,136 @@
+"""
+ShieldCraft AI - Query API
+
+Minimal ASGI app (served by uvicorn, see Dockerfile.api) exposing query
+embedding through the asyncio micro-batcher, so concurrent requests share
+one forward pass.
+
+Routes:
+    POST /embed    {"text": "..."} or {"texts": [...]} -> {"embeddings": [[...]], "latency_ms": [...]}
+    GET  /metrics  micro-batcher counters and p50/p99 latency
+    GET  /health   liveness
+"""
+
+import asyncio
+import json
+import sys
+from ai_core.embedding.micro_batcher import EmbeddingMicroBatcher
+
+# error_type -> HTTP status
+_ERROR_STATUS = {"overloaded": 503, "timeout": 504, "failed": 500}
+
+
+class EmbeddingAPI:
+    def __init__(self, embedder=None, config=None):
+        # The model loads on lifespan startup (or first request), not at import.
+        self.embedder = embedder
+        self.config = config
+        self.batcher = None
+
+    def _load(self):
+        if self.batcher is not None:
+            return
+        if self.config is None:
+            from infra.utils.config_loader import get_config_loader
+
+            self.config = get_config_loader().get_section("embedding")
+        if self.embedder is None:
+            from ai_core.embedding.embedding import EmbeddingModel
+
+            self.embedder = EmbeddingModel(config=self.config)
+        self.batcher = EmbeddingMicroBatcher(self.embedder, self.config)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        method, path = scope["method"], scope["path"]
+        if path == "/health" and method == "GET":
+            await self._respond(send, 200, {"status": "ok"})
+        elif path == "/metrics" and method == "GET":
+            self._load()
+            await self._respond(send, 200, self.batcher.stats())
+        elif path == "/embed" and method == "POST":
+            await self._embed(receive, send)
+        else:
+            await self._respond(send, 404, {"error": f"No route for {method} {path}"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self._load()
+                    await self.batcher.start()
+                    await send({"type": "lifespan.startup.complete"})
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+            elif message["type"] == "lifespan.shutdown":
+                if self.batcher is not None:
+                    await self.batcher.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _embed(self, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            payload = json.loads(body or b"{}")
+            texts = payload["texts"] if "texts" in payload else [payload["text"]]
+            if not texts or not all(isinstance(t, str) for t in texts):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            await self._respond(
+                send, 400, {"error": 'Body must be {"text": str} or {"texts": [str]}.'}
+            )
+            return
+        self._load()
+        results = await asyncio.gather(*(self.batcher.embed(t) for t in texts))
+        failed = next((r for r in results if not r["success"]), None)
+        if failed is not None:
+            await self._respond(
+                send,
+                _ERROR_STATUS.get(failed["error_type"], 500),
+                {"error": failed["error"]},
+            )
+            return
+        await self._respond(
+            send,
+            200,
+            {
+                "embeddings": [r["embedding"].tolist() for r in results],
+                "latency_ms": [r["latency_ms"] for r in results],
+            },
+        )
+
+    async def _respond(self, send, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+app = EmbeddingAPI()
+
+
+if __name__ == "__main__":
+    if "--healthcheck" in sys.argv:
+        # Import-level check used by the container HEALTHCHECK.
+        print("API healthcheck: OK")
+        sys.exit(0)
+    print("Run with: uvicorn src.api.main:app --host 0.0.0.0 --port 8080")
@@ -0,0 +1,180 @@
+import re
+import pytest
+import torch
+from transformers import BatchEncoding
+import ai_core.model_registry as model_registry_module
+import ai_core.tokenizer_service as tokenizer_service_module
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the HF call/pad surface EmbeddingModel uses."""
+
+    model_max_length = 64
+    is_fast = True
+    model_input_names = ["input_ids", "attention_mask"]
+    calls = 0
+
+    def __call__(
+        self,
+        texts,
+        truncation=False,
+        add_special_tokens=True,
+        return_offsets_mapping=False,
+        **kwargs,
+    ):
+        FakeTokenizer.calls += 1
+        ids = [
+            [sum(map(ord, word)) % 1000 + 1 for word in text.split()] or [1]
+            for text in texts
+        ]
+        if truncation:
+            ids = [row[: self.model_max_length] for row in ids]
+        encoding = {"input_ids": ids, "attention_mask": [[1] * len(row) for row in ids]}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = [
+                [m.span() for m in re.finditer(r"\S+", text)] or [(0, 0)]
+                for text in texts
+            ]
+        return BatchEncoding(encoding)
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 0
+
+    def build_inputs_with_special_tokens(self, ids):
+        return list(ids)
+
+    def decode(self, ids):
+        return " ".join(f"t{i}" for i in ids)
+
+    def pad(self, features, return_tensors=None):
+        longest = max(len(row) for row in features["input_ids"])
+        return BatchEncoding(
+            {
+                key: torch.tensor([row + [0] * (longest - len(row)) for row in rows])
+                for key, rows in features.items()
+            }
+        )
+
+    @classmethod
+    def from_pretrained(cls, name, **kwargs):
+        return cls()
+
+
+class FakeConfig:
+    hidden_size = 2
+    _commit_hash = "fake-revision"
+
+    @classmethod
+    def from_pretrained(cls, name, **kwargs):
+        return cls()
+
+
+class FakeModel(torch.nn.Module):
+    """Per-token hidden state [id, 1]; padding positions are all zeros."""
+
+    calls = 0
+    batch_shapes = []
+
+    def __init__(self):
+        super().__init__()
+        self.config = FakeConfig()
+
+    def forward(self, input_ids, attention_mask=None):
+        FakeModel.calls += len(input_ids)
+        FakeModel.batch_shapes.append(tuple(input_ids.shape))
+        hidden = torch.stack([input_ids.float(), attention_mask.float()], dim=-1)
+        return type("Output", (), {"last_hidden_state": hidden})()
+
+    @classmethod
+    def from_pretrained(cls, name, **kwargs):
+        return cls()
+
+
+@pytest.fixture
+def fake_hf(monkeypatch):
+    """Swap the HF tokenizer/model/config loaders for offline fakes, with empty registries."""
+    monkeypatch.setattr("transformers.AutoTokenizer", FakeTokenizer)
+    monkeypatch.setattr(tokenizer_service_module, "_SERVICES", {})
+    FakeTokenizer.calls = 0
+    monkeypatch.setattr("transformers.AutoModel", FakeModel)
+    monkeypatch.setattr("transformers.AutoConfig", FakeConfig)
+    monkeypatch.setattr(model_registry_module, "_MODELS", {})
+    FakeModel.calls = 0
+    FakeModel.batch_shapes = []
+    return FakeModel
+
+
+@pytest.fixture
+def make_model():
+    """
+    Factory for an EmbeddingModel on the fake HF model (CPU, embedding cache
+    off); keyword arguments override the embedding config.
+    """
+    from ai_core.embedding.embedding import EmbeddingModel
+
+    def make(**overrides):
+        config = {"model_name": "fake", "device": "cpu", "cache_enabled": False}
+        config.update(overrides)
+        return EmbeddingModel(config=config)
+
+    return make
+
+
+TINY_LM_WORDS = (
+    "summarize triage the alert failed login from host port scan severity high "
+    "low medium user admin root ssh brute force blocked allowed outbound dns "
+    "malware beacon detected network traffic"
+).split()
+
+
+def build_tiny_lm():
+    """Offline word-level tokenizer and a randomly initialised 2-layer GPT-2."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    vocab = {"<unk>": 0, "<eos>": 1}
+    vocab.update({word: i + 2 for i, word in enumerate(TINY_LM_WORDS)})
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="<unk>", eos_token="<eos>"
+    )
+    torch.manual_seed(0)
+    config = GPT2Config(
+        vocab_size=len(vocab),
+        n_positions=512,
+        n_embd=32,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=1,
+        eos_token_id=1,
+    )
+    return tokenizer, GPT2LMHeadModel(config).eval()
+
+
+@pytest.fixture
+def tiny_lm(monkeypatch):
+    """
+    Factory for ShieldCraftAICore over a tiny local causal LM, pre-registered
+    in an empty model registry; keyword arguments override the ai_core config.
+    """
+    from unittest.mock import MagicMock
+    from ai_core.model_loader import ShieldCraftAICore
+
+    monkeypatch.setattr(model_registry_module, "_MODELS", {})
+    tokenizer, model = build_tiny_lm()
+    model_registry_module.get_model(("tokenizer", "tiny-lm"), lambda: tokenizer)
+    model_registry_module.get_model(
+        ("causal_lm", "tiny-lm", "cpu", "none"), lambda: model
+    )
+
+    def make(**overrides):
+        section = dict({"model_name": "tiny-lm", "device": "cpu"}, **overrides)
+        loader = MagicMock()
+        loader.get_section = lambda name: section
+        monkeypatch.setattr(
+            "infra.utils.config_loader.get_config_loader", lambda: loader
+        )
+        return ShieldCraftAICore(config_section="ai_core")
+
+    return make
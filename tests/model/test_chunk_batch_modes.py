@@ -0,0 +1,107 @@
+"""
+Tests for Chunker.chunk_batch execution modes (serial, thread, process) and
+automatic mode selection.
+"""
+
+import os
+import pytest
+from ai_core.chunking import chunk as chunk_module
+from ai_core.chunking.chunk import Chunker
+
+
+def make_chunker(monkeypatch, strategy, params, **settings):
+    class DummyConfigLoader:
+        def get_section(self, section):
+            return dict({"strategy": strategy, strategy: params}, **settings)
+
+    monkeypatch.setattr(
+        "ai_core.chunking.chunk.get_config_loader", lambda: DummyConfigLoader()
+    )
+    return Chunker()
+
+
+DOCS = [
+    "Failed login for root. Retry in 5s!\n\nBlocked 203.0.113.7? Yes.",
+    "café alert. naïve résumé!\n\nsecond paragraph.",
+    "x",
+    "one\n\none\n\none",
+]
+
+
+@pytest.mark.parametrize(
+    "strategy,params",
+    [
+        ("semantic", {"min_length": 1}),
+        ("sentence", {"min_length": 2}),
+        ("custom_heuristic", {"delimiter": "\n\n", "min_length": 1, "rules": {}}),
+        ("fixed", {"chunk_size": 7, "overlap": 2, "min_length": 3}),
+    ],
+)
+def test_modes_agree_with_serial(monkeypatch, strategy, params):
+    chunker = make_chunker(monkeypatch, strategy, params)
+    doc_ids = [f"doc{i}" for i in range(len(DOCS))]
+    try:
+        serial = chunker.chunk_batch(DOCS, doc_ids, mode="serial")
+        assert serial == [chunker.chunk(t, d) for t, d in zip(DOCS, doc_ids)]
+        assert (
+            chunker.chunk_batch(DOCS, doc_ids, max_workers=2, mode="thread") == serial
+        )
+        assert (
+            chunker.chunk_batch(DOCS, doc_ids, max_workers=2, mode="process") == serial
+        )
+    finally:
+        chunker.close()
+
+
+def test_process_mode_reuses_pool_and_frees_shared_memory(monkeypatch):
+    chunker = make_chunker(monkeypatch, "semantic", {"min_length": 1})
+    before = set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+    try:
+        plan = chunker.plan_batch(DOCS, max_workers=2, mode="process")
+        pool = chunker._pool
+        chunker.plan_batch(DOCS, max_workers=2, mode="process")
+        assert chunker._pool is pool
+    finally:
+        chunker.close()
+    assert chunker._pool is None
+    assert plan.doc_index.tolist() == [0, 0, 1, 1, 2, 3, 3, 3]
+    if before:
+        assert set(os.listdir("/dev/shm")) <= before
+
+
+def test_select_mode_from_batch_sizes(monkeypatch):
+    monkeypatch.setattr(chunk_module, "_available_cpus", lambda: 8)
+    monkeypatch.setattr(chunk_module, "_gil_enabled", lambda: True)
+    chunker = make_chunker(
+        monkeypatch, "semantic", {"min_length": 1}, parallel_min_chars=1000
+    )
+    assert chunker.select_mode([100] * 5) == "serial"  # too little text
+    assert chunker.select_mode([5000, 100, 100]) == "serial"  # one document dominates
+    assert chunker.select_mode([500] * 10) == "process"
+    assert chunker.select_mode([500] * 10, max_workers=1) == "serial"
+    monkeypatch.setattr(chunk_module, "_gil_enabled", lambda: False)
+    assert chunker.select_mode([500] * 10) == "thread"
+    fixed = make_chunker(
+        monkeypatch,
+        "fixed",
+        {"chunk_size": 5, "overlap": 0, "min_length": 1},
+        parallel_min_chars=1000,
+    )
+    assert fixed.select_mode([500] * 10) == "serial"  # vectorized already
+    monkeypatch.setattr(chunk_module, "_available_cpus", lambda: 1)
+    assert chunker.select_mode([500] * 10) == "serial"
+
+
+def test_planner_less_strategy_runs_serially_and_rejects_unknown_mode(
+    monkeypatch, capsys
+):
+    chunker = make_chunker(
+        monkeypatch, "recursive", {"max_chunk_size": 4, "min_length": 1}
+    )
+    texts = ["abcdefgh", "ij\n\nklmnop"]
+    expected = [chunker.chunk(t) for t in texts]
+    assert chunker.chunk_batch(texts, mode="process") == expected
+    assert "no offset planner" in capsys.readouterr().out
+    assert chunker.chunk_batch(texts, mode="thread") == expected
+    with pytest.raises(ValueError):
+        chunker.chunk_batch(texts, mode="fork")
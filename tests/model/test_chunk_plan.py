@@ -0,0 +1,108 @@
+"""
+Tests for vectorized offset planning (FixedChunkingStrategy.plan,
+SlidingWindowChunkingStrategy.plan) against the one-chunk-at-a-time loops.
+"""
+
+import random
+import numpy as np
+import pytest
+from ai_core.chunking.chunk import (
+    ChunkPlan,
+    Chunker,
+    FixedChunkingStrategy,
+    SlidingWindowChunkingStrategy,
+)
+
+
+def fixed_offsets(length, chunk_size, overlap, min_length):
+    offsets, start = [], 0
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end - start >= min_length:
+            offsets.append((start, end))
+        start += chunk_size - overlap if chunk_size > overlap else chunk_size
+    return offsets
+
+
+def sliding_offsets(length, window_size, step_size, min_length):
+    offsets = []
+    for start in range(0, length, step_size):
+        end = min(start + window_size, length)
+        if end - start >= min_length:
+            offsets.append((start, end))
+        if end == length:
+            break
+    return offsets
+
+
+def test_plans_match_reference_loops():
+    rng = random.Random(7)
+    for _ in range(300):
+        texts = ["x" * rng.randint(1, 200) for _ in range(rng.randint(1, 5))]
+        size = rng.randint(1, 40)
+        step_or_overlap = rng.randint(0, 50)
+        min_length = rng.randint(0, 30)
+        fixed = FixedChunkingStrategy.plan(
+            texts, chunk_size=size, overlap=step_or_overlap, min_length=min_length
+        )
+        sliding = SlidingWindowChunkingStrategy.plan(
+            texts,
+            window_size=size,
+            step_size=step_or_overlap + 1,
+            min_length=min_length,
+        )
+        for i, text in enumerate(texts):
+            assert list(zip(*map(list, fixed.offsets(i)))) == fixed_offsets(
+                len(text), size, step_or_overlap, min_length
+            )
+            assert list(zip(*map(list, sliding.offsets(i)))) == sliding_offsets(
+                len(text), size, step_or_overlap + 1, min_length
+            )
+
+
+def test_plan_is_arrays_until_chunks_are_requested():
+    plan = FixedChunkingStrategy.plan(
+        ["abcdefg", "hij"], ["d1", "d2"], chunk_size=3, min_length=3
+    )
+    assert isinstance(plan, ChunkPlan) and len(plan) == 3
+    assert plan.starts.dtype == np.int64
+    assert plan.doc_index.tolist() == [0, 0, 1]
+    chunks = plan.chunks()
+    assert [[c.text for c in doc] for doc in chunks] == [["abc", "def"], ["hij"]]
+    assert [c.chunk_index for c in chunks[0]] == [0, 1]
+    assert chunks[1][0].doc_id == "d2" and chunks[1][0].chunk_index == 0
+
+
+def test_plan_validates_inputs():
+    with pytest.raises(ValueError):
+        FixedChunkingStrategy.plan(["abc", ""])
+    with pytest.raises(ValueError):
+        FixedChunkingStrategy.plan(["abc"], ["d1", "d2"])
+    with pytest.raises(ValueError):
+        SlidingWindowChunkingStrategy.plan("abc", step_size=0)
+
+
+def test_chunker_plans_and_batches(monkeypatch):
+    sections = {
+        "strategy": "sliding_window",
+        "sliding_window": {"window_size": 4, "step_size": 2, "min_length": 2},
+        "recursive": {"max_chunk_size": 4, "min_length": 1},
+    }
+
+    class DummyConfigLoader:
+        def get_section(self, section):
+            return sections
+
+    monkeypatch.setattr(
+        "ai_core.chunking.chunk.get_config_loader", lambda: DummyConfigLoader()
+    )
+    chunker = Chunker()
+    texts = ["abcdefghij", "klmno"]
+    assert len(chunker.plan(texts)) == 6
+    assert chunker.chunk_batch(texts, ["a", "b"]) == [
+        chunker.chunk(texts[0], "a"),
+        chunker.chunk(texts[1], "b"),
+    ]
+    sections["strategy"] = "recursive"
+    with pytest.raises(NotImplementedError):
+        Chunker().plan(texts)
@@ -0,0 +1,87 @@
+"""
+Tests for offset-only ChunkSpans and the pydantic Chunk export.
+"""
+
+import mmap
+from ai_core.chunking.chunk import (
+    Chunk,
+    ChunkSpan,
+    Chunker,
+    FixedChunkingStrategy,
+    RecursiveChunkingStrategy,
+    SentenceChunkingStrategy,
+    export_chunks,
+)
+from ai_core.chunking.chunking import Chunker as ConfigChunker, ChunkingConfig
+from ai_core.chunking.benchmark_chunking import run_chunking_benchmark
+
+
+def test_spans_share_the_source_text():
+    text = "abcdefghij" * 10
+    chunks = FixedChunkingStrategy.chunk(text, chunk_size=30, overlap=5)
+    assert all(c.source is text for c in chunks)
+    assert [c.text for c in chunks] == [
+        text[c.start_offset : c.end_offset] for c in chunks
+    ]
+    assert not hasattr(chunks[0], "__dict__")
+
+
+def test_metadata_is_created_on_first_use():
+    span = ChunkSpan("abc", "d1", 0, 0, 3)
+    assert span._metadata is None
+    span.metadata["source"] = "syslog"
+    assert span.to_model().metadata == {"source": "syslog"}
+
+
+def test_export_to_pydantic_chunk():
+    chunks = SentenceChunkingStrategy.chunk("One. Two!", doc_id="d1")
+    models = export_chunks(chunks)
+    assert all(isinstance(m, Chunk) for m in models)
+    assert [(m.text, m.doc_id, m.start_offset, m.end_offset) for m in models] == [
+        ("One.", "d1", 0, 4),
+        ("Two!", "d1", 5, 9),
+    ]
+    assert export_chunks(models) == models
+
+
+def test_bytes_like_source_uses_byte_offsets(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_bytes("café alert\n".encode("utf-8"))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert ChunkSpan(m, "d1", 0, 0, 5).text == "café"
+        assert ChunkSpan(memoryview(b"xyz"), "d1", 0, 1, 3).text == "yz"
+
+
+def test_recursive_sub_chunks_keep_document_offsets():
+    text = "xy\n\nabcdefghi"
+    chunks = RecursiveChunkingStrategy.chunk(text, max_chunk_size=3, min_length=1)
+    assert [c.text for c in chunks] == ["xy", "abc", "def", "ghi"]
+    assert all(text[c.start_offset : c.end_offset] == c.text for c in chunks)
+    assert [c.chunk_index for c in chunks] == [0, 1, 2, 3]
+
+
+def test_chunkers_export_models_when_configured(monkeypatch):
+    class DummyConfigLoader:
+        def get_section(self, section):
+            return {
+                "strategy": "fixed",
+                "export_models": True,
+                "fixed": {"chunk_size": 2, "overlap": 0, "min_length": 1},
+            }
+
+    monkeypatch.setattr(
+        "ai_core.chunking.chunk.get_config_loader", lambda: DummyConfigLoader()
+    )
+    assert all(isinstance(c, Chunk) for c in Chunker().chunk("abcd"))
+    assert all(
+        isinstance(c, ChunkSpan) for c in Chunker(export_models=False).chunk("abcd")
+    )
+    config = ChunkingConfig(strategy="fixed", chunk_size=2, export_models=True)
+    assert all(isinstance(c, Chunk) for c in ConfigChunker(config).chunk("abcd"))
+
+
+def test_benchmark_reports_both_modes():
+    report = run_chunking_benchmark("fixed", size_mb=0.25)
+    assert report["spans"]["chunks"] == report["models"]["chunks"] > 0
+    assert report["offsets"]["chunks"] == report["spans"]["chunks"]
+    assert report["spans"]["mb_per_sec"] > 0
@@ -0,0 +1,79 @@
+"""
+Tests for the finditer-based splitter behind the semantic, sentence and
+custom_heuristic strategies.
+"""
+
+import random
+import re
+from ai_core.chunking.chunk import (
+    CustomHeuristicChunkingStrategy,
+    SemanticChunkingStrategy,
+    SentenceChunkingStrategy,
+)
+
+
+def delimited_reference(text, delimiter, min_length):
+    """Old str.split semantics, with offsets tracked instead of searched for."""
+    chunks, position, idx = [], 0, 0
+    for part in text.split(delimiter):
+        if part.strip():
+            if len(part) >= min_length:
+                chunks.append((idx, position, position + len(part), part))
+            idx += 1
+        position += len(part) + len(delimiter)
+    return chunks
+
+
+def sentence_reference(text, min_length):
+    chunks, offset = [], 0
+    for idx, sent in enumerate(re.split(r"(?<=[.!?])\s+", text)):
+        sent = sent.strip()
+        if not sent or len(sent) < min_length:
+            continue
+        start = text.find(sent, offset)
+        offset = start + len(sent)
+        chunks.append((idx, start, offset, sent))
+    return chunks
+
+
+def as_tuples(chunks):
+    return [(c.chunk_index, c.start_offset, c.end_offset, c.text) for c in chunks]
+
+
+def test_splitters_match_reference_semantics():
+    rng = random.Random(11)
+    alphabet = ["a", "b", " ", ".", "!", "?", "\n", "\n\n", "-", "\t"]
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+        min_length = rng.randint(0, 4)
+        assert as_tuples(
+            SemanticChunkingStrategy.chunk(text, min_length=min_length)
+        ) == delimited_reference(text, "\n\n", min_length)
+        assert as_tuples(
+            CustomHeuristicChunkingStrategy.chunk(
+                text, delimiter="-", min_length=min_length
+            )
+        ) == delimited_reference(text, "-", min_length)
+        assert as_tuples(
+            SentenceChunkingStrategy.chunk(text, min_length=min_length)
+        ) == sentence_reference(text, min_length)
+
+
+def test_repeated_paragraphs_get_their_own_offsets():
+    text = "\n\n".join(["alert: login failed"] * 4)
+    chunks = SemanticChunkingStrategy.chunk(text)
+    assert [c.start_offset for c in chunks] == [0, 21, 42, 63]
+    parts = CustomHeuristicChunkingStrategy.chunk("x|x|x", delimiter="|")
+    assert [c.start_offset for c in parts] == [0, 2, 4]
+
+
+def test_regex_metacharacters_in_delimiter_are_literal():
+    chunks = CustomHeuristicChunkingStrategy.chunk("a.*b.*c", delimiter=".*")
+    assert [c.text for c in chunks] == ["a", "b", "c"]
+
+
+def test_batch_plan_keeps_per_document_indexes():
+    plan = SemanticChunkingStrategy.plan(["a\n\n\nb", "c\n\nd"], ["x", "y"])
+    assert plan.doc_index.tolist() == [0, 0, 1, 1]
+    assert [c.text for c in plan.chunks(0)] == ["a", "\nb"]
+    assert [c.chunk_index for c in plan.chunks(1)] == [0, 1]
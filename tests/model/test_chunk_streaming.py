@@ -0,0 +1,170 @@
+"""
+Tests for streaming chunking (ai_core.chunking.streaming) against the
+whole-text strategies.
+"""
+
+import io
+import mmap
+import random
+import tracemalloc
+import pytest
+from ai_core.chunking.chunk import (
+    Chunk,
+    Chunker,
+    CustomHeuristicChunkingStrategy,
+    FixedChunkingStrategy,
+    RecursiveChunkingStrategy,
+    SemanticChunkingStrategy,
+    SentenceChunkingStrategy,
+    SlidingWindowChunkingStrategy,
+)
+from ai_core.chunking.streaming import read_blocks, stream_chunks
+
+
+def as_tuples(chunks):
+    return [(c.chunk_index, c.start_offset, c.end_offset, c.text) for c in chunks]
+
+
+def random_params(rng, strategy_class):
+    if strategy_class is FixedChunkingStrategy:
+        return dict(
+            chunk_size=rng.randint(1, 9),
+            overlap=rng.randint(0, 10),
+            min_length=rng.randint(0, 5),
+        )
+    if strategy_class is SlidingWindowChunkingStrategy:
+        return dict(
+            window_size=rng.randint(1, 9),
+            step_size=rng.randint(1, 12),
+            min_length=rng.randint(0, 5),
+        )
+    if strategy_class is CustomHeuristicChunkingStrategy:
+        return dict(delimiter=rng.choice(["-", "---", "\n"]), min_length=1)
+    return dict(min_length=rng.randint(0, 3))
+
+
+@pytest.mark.parametrize(
+    "strategy_class",
+    [
+        FixedChunkingStrategy,
+        SlidingWindowChunkingStrategy,
+        SemanticChunkingStrategy,
+        SentenceChunkingStrategy,
+        CustomHeuristicChunkingStrategy,
+    ],
+)
+def test_stream_matches_whole_text(strategy_class):
+    rng = random.Random(5)
+    alphabet = ["a", "b", " ", ".", "!", "?", "\n", "\n\n", "-", "---", "é"]
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 50)))
+        params = random_params(rng, strategy_class)
+        expected = as_tuples(strategy_class.chunk(text, "d", **params))
+        read_chars = rng.randint(1, 8)
+        for source in (text, io.StringIO(text), io.BytesIO(text.encode("utf-8"))):
+            streamed = stream_chunks(
+                source, strategy_class, "d", read_chars=read_chars, **params
+            )
+            assert as_tuples(streamed) == expected
+
+
+def test_read_blocks_keeps_characters_split_across_reads(tmp_path):
+    text = "é alert ✓ ok\n" * 50
+    path = tmp_path / "log.txt"
+    path.write_bytes(text.encode("utf-8"))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert "".join(read_blocks(m, 3)) == text
+        assert "".join(read_blocks(memoryview(m), 5)) == text
+        streamed = list(stream_chunks(m, SemanticChunkingStrategy, read_chars=7))
+    assert as_tuples(streamed) == as_tuples(SemanticChunkingStrategy.chunk(text))
+    chunks = list(
+        stream_chunks(
+            io.BytesIO(text.encode()),
+            FixedChunkingStrategy,
+            chunk_size=10,
+            read_chars=4,
+        )
+    )
+    assert all(text[c.start_offset : c.end_offset] == c.text for c in chunks)
+
+
+class LogReader:
+    """File-like source generating size characters of log lines on demand."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.line = "2026-10-18T12:00:00Z vpc-flow ACCEPT 10.0.0.5 -> 203.0.113.7.\n\n"
+
+    def read(self, n):
+        n = min(n, self.remaining)
+        self.remaining -= n
+        return (self.line * (n // len(self.line) + 1))[:n]
+
+
+@pytest.mark.parametrize(
+    "strategy_class,params",
+    [
+        (SlidingWindowChunkingStrategy, dict(window_size=512, step_size=256)),
+        (SemanticChunkingStrategy, dict(min_length=1)),
+    ],
+)
+def test_stream_memory_is_bounded(strategy_class, params):
+    size = 32 * 2**20
+    tracemalloc.start()
+    try:
+        count, last_end = 0, 0
+        for chunk in stream_chunks(
+            LogReader(size), strategy_class, read_chars=2**20, **params
+        ):
+            count += 1
+            last_end = chunk.end_offset
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count > 0 and size - last_end <= 512
+    assert peak < 8 * 2**20
+
+
+def test_part_without_delimiter_is_cut(capsys):
+    chunks = list(
+        stream_chunks(
+            "x" * 100,
+            CustomHeuristicChunkingStrategy,
+            delimiter="|",
+            read_chars=10,
+            max_part_chars=30,
+        )
+    )
+    assert "".join(c.text for c in chunks) == "x" * 100
+    assert max(len(c.text) for c in chunks) <= 40
+    assert "[WARN] No delimiter" in capsys.readouterr().out
+
+
+def test_unsupported_streaming_inputs():
+    with pytest.raises(ValueError, match="no streaming variant"):
+        stream_chunks("abc", RecursiveChunkingStrategy)
+    with pytest.raises(ValueError):
+        stream_chunks("abc", CustomHeuristicChunkingStrategy, delimiter="")
+
+
+def test_chunker_streams_with_config(monkeypatch, tmp_path):
+    class DummyConfigLoader:
+        def get_section(self, section):
+            return {
+                "strategy": "sentence",
+                "sentence": {"min_length": 1},
+                "export_models": True,
+                "stream_read_chars": 4,
+            }
+
+    monkeypatch.setattr(
+        "ai_core.chunking.chunk.get_config_loader", lambda: DummyConfigLoader()
+    )
+    path = tmp_path / "trail.log"
+    path.write_text("Login failed. Key rotated! Done?", encoding="utf-8")
+    chunker = Chunker()
+    with open(path, encoding="utf-8") as f:
+        chunks = list(chunker.chunk_stream(f, doc_id="trail"))
+    assert all(isinstance(c, Chunk) for c in chunks)
+    assert [c.text for c in chunks] == ["Login failed.", "Key rotated!", "Done?"]
+    assert chunks == chunker.chunk(path.read_text(encoding="utf-8"), "trail")
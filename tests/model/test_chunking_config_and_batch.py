@@ -14,6 +14,7 @@ from ai_core.chunking.chunk import (
     SlidingWindowChunkingStrategy,
     CustomHeuristicChunkingStrategy,
     Chunk,
+    ChunkSpan,
 )
 
 
@@ -79,7 +80,7 @@ def test_chunk_batch_parallel(monkeypatch):
     results = chunker.chunk_batch(texts, doc_ids, max_workers=2)
     assert len(results) == 3
     for chunks in results:
-        assert all(isinstance(c, Chunk) for c in chunks)
+        assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 # --- Edge case tests ---
@@ -141,7 +142,7 @@ def test_token_based_chunking_param_passing(monkeypatch):
     )
     chunker = Chunker()
     chunks = chunker.chunk("a b c d", doc_id="docX")
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "a b"
     assert chunks[1].text == "c d"
 
@@ -193,7 +194,7 @@ def test_all_strategies(monkeypatch, strategy, params, text, expected_count):
     chunker = Chunker()
     chunks = chunker.chunk(text)
     assert len(chunks) == expected_count
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 # --- Test __str__ and __repr__ ---
@@ -224,7 +225,7 @@ def test_recursive_chunking():
     text = "A long paragraph. " * 20
     chunks = RecursiveChunkingStrategy.chunk(text, max_chunk_size=30, min_length=5)
     assert all(len(c.text) <= 30 for c in chunks)
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 def test_sentence_chunking():
@@ -254,7 +255,7 @@ def test_token_based_chunking():
         text, tokenizer=DummyTokenizer(), chunk_size=3, overlap=1, min_length=2
     )
     assert len(chunks) > 0
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "a b c"
     assert chunks[1].text == "c d e"
 
@@ -270,7 +271,7 @@ def test_sliding_window_chunking():
         text, window_size=4, step_size=2, min_length=2
     )
     assert len(chunks) > 0
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "abcd"
     assert chunks[1].text == "cdef"
 
@@ -11,7 +11,7 @@ from ai_core.chunking.chunk import (
     TokenBasedChunkingStrategy,
     SlidingWindowChunkingStrategy,
     CustomHeuristicChunkingStrategy,
-    Chunk,
+    ChunkSpan,
 )
 
 
@@ -19,7 +19,7 @@ def test_fixed_chunking():
     text = "abcdefghij"
     chunks = FixedChunkingStrategy.chunk(text, chunk_size=3, overlap=1, min_length=2)
     assert len(chunks) > 0
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "abc"
     assert chunks[1].text == "cde"
 
@@ -35,7 +35,7 @@ def test_fixed_chunking_overlap_gt_chunk_size():
     text = "abcdefghij"
     # overlap > chunk_size, should fallback to chunk_size step
     chunks = FixedChunkingStrategy.chunk(text, chunk_size=3, overlap=5, min_length=2)
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     # Should not error, should still produce chunks
     assert len(chunks) > 0
 
@@ -67,7 +67,7 @@ def test_recursive_chunking():
     text = "A long paragraph. " * 50  # Should trigger fallback
     chunks = RecursiveChunkingStrategy.chunk(text, max_chunk_size=30, min_length=5)
     assert all(len(c.text) <= 30 for c in chunks)
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 def test_recursive_chunking_all_large():
@@ -75,7 +75,7 @@ def test_recursive_chunking_all_large():
     # All paragraphs too large, should fallback to fixed
     chunks = RecursiveChunkingStrategy.chunk(text, max_chunk_size=20, min_length=5)
     assert all(len(c.text) <= 20 for c in chunks)
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 def test_sentence_chunking():
@@ -108,7 +108,7 @@ def test_token_based_chunking():
         text, tokenizer=DummyTokenizer(), chunk_size=3, overlap=1, min_length=2
     )
     assert len(chunks) > 0
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "a b c"
     assert chunks[1].text == "c d e"
 
@@ -138,7 +138,7 @@ def test_token_based_chunking_no_decode():
     chunks = TokenBasedChunkingStrategy.chunk(
         text, tokenizer=DummyTokenizer(), chunk_size=2, overlap=1, min_length=1
     )
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
 
 
 def test_sliding_window_chunking():
@@ -147,7 +147,7 @@ def test_sliding_window_chunking():
         text, window_size=4, step_size=2, min_length=2
     )
     assert len(chunks) > 0
-    assert all(isinstance(c, Chunk) for c in chunks)
+    assert all(isinstance(c, ChunkSpan) for c in chunks)
     assert chunks[0].text == "abcd"
     assert chunks[1].text == "cdef"
 
@@ -0,0 +1,131 @@
+import os
+import sys
+import types
+import numpy as np
+import pytest
+import torch
+from ai_core.embedding import onnx_backend
+from ai_core.embedding.onnx_backend import onnx_cache_dir
+
+
+class FakeSession:
+    """Computes the same hidden states as conftest.FakeModel."""
+
+    def __init__(self, path, sess_options=None, providers=None):
+        self.options = sess_options
+
+    def get_inputs(self):
+        return [
+            types.SimpleNamespace(name="input_ids"),
+            types.SimpleNamespace(name="attention_mask"),
+        ]
+
+    def run(self, outputs, feeds):
+        ids = feeds["input_ids"].astype(np.float32)
+        mask = feeds["attention_mask"].astype(np.float32)
+        return [np.stack([ids, mask], axis=-1)]
+
+
+def fake_onnxruntime():
+    module = types.ModuleType("onnxruntime")
+    module.SessionOptions = types.SimpleNamespace
+    module.GraphOptimizationLevel = types.SimpleNamespace(ORT_ENABLE_ALL=99)
+    module.ExecutionMode = types.SimpleNamespace(ORT_SEQUENTIAL=0)
+    module.InferenceSession = FakeSession
+    return module
+
+
+def test_onnx_cache_dir_is_keyed_by_revision_and_quantization(tmp_path):
+    a = onnx_cache_dir(str(tmp_path), "org/model", "abc123", True)
+    assert a != onnx_cache_dir(str(tmp_path), "org/model", "def456", True)
+    assert a != onnx_cache_dir(str(tmp_path), "org/model", "abc123", False)
+    assert "/" not in a[len(str(tmp_path)) + 1 :].split("-abc123")[0]
+
+
+def test_onnx_backend_exports_once_and_matches_torch(
+    tmp_path, fake_hf, make_model, monkeypatch
+):
+    monkeypatch.setitem(sys.modules, "onnxruntime", fake_onnxruntime())
+    exports = []
+
+    def fake_export(self, model_name, directory):
+        exports.append(directory)
+        os.makedirs(directory)
+        open(self.path, "wb").close()
+
+    monkeypatch.setattr(onnx_backend.OnnxEncoder, "_export", fake_export)
+    config = {
+        "backend": "onnx",
+        "onnx_cache_dir": str(tmp_path),
+        "onnx_intra_op_threads": 2,
+    }
+    texts = ["failed login from 10.0.0.1", "port scan", "a much longer alert line here"]
+    onnx_model = make_model(**config)
+    assert onnx_model.model.session.options.intra_op_num_threads == 2
+    assert onnx_model.backend == "onnx" and onnx_model.quant_status == "onnx-int8"
+    onnx_out = onnx_model.encode(texts)["embeddings"]
+    torch_out = make_model().encode(texts)["embeddings"]
+    assert np.allclose(onnx_out, torch_out)
+    make_model(**config)
+    assert len(exports) == 1
+    assert onnx_model.cache_namespace() != make_model().cache_namespace()
+
+
+def test_onnx_backend_falls_back_to_torch_without_onnxruntime(
+    fake_hf, make_model, monkeypatch
+):
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    model = make_model(backend="onnx")
+    assert model.encode(["alert"])["success"]
+    assert model.backend == "torch"
+
+
+def test_torch_int8_applies_dynamic_quantization(fake_hf, make_model, monkeypatch):
+    quantized = []
+
+    def fake_quantize(model, layers, dtype):
+        quantized.append((layers, dtype))
+        return model
+
+    monkeypatch.setattr(torch.ao.quantization, "quantize_dynamic", fake_quantize)
+    model = make_model(quantize=True, quantization_type="int8")
+    assert model.quant_status == "int8"
+    assert quantized == []  # weights load on first use
+    assert model.model is not None
+    assert quantized == [({torch.nn.Linear}, torch.qint8)]
+
+
+def test_onnx_export_of_tiny_model_matches_torch(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from transformers import BertConfig, BertModel
+
+    torch.manual_seed(0)
+    model = BertModel(
+        BertConfig(
+            vocab_size=100,
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=64,
+            max_position_embeddings=64,
+        )
+    ).eval()
+    model_dir = str(tmp_path / "tiny-bert")
+    model.save_pretrained(model_dir)
+    input_ids = torch.tensor([[2, 17, 45, 9, 3, 0], [2, 61, 3, 0, 0, 0]])
+    attention_mask = (input_ids != 0).long()
+    with torch.no_grad():
+        expected = model(input_ids=input_ids, attention_mask=attention_mask)
+    expected = expected.last_hidden_state.numpy()
+    mask = attention_mask.numpy().astype(bool)
+    for quantize, tolerance in ((False, 1e-4), (True, 0.25)):
+        encoder = onnx_backend.OnnxEncoder(
+            model_dir,
+            model.config,
+            {"onnx_cache_dir": str(tmp_path / "onnx"), "onnx_quantize": quantize},
+        )
+        assert os.path.exists(encoder.path)
+        hidden = encoder(input_ids, attention_mask).last_hidden_state.numpy()
+        assert hidden.shape == expected.shape
+        assert np.abs(hidden - expected)[mask].max() < tolerance
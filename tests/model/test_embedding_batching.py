@@ -0,0 +1,85 @@
+import numpy as np
+import torch
+from ai_core.embedding.embedding import pool_hidden_states
+from ai_core.embedding.benchmark_throughput import (
+    run_pooling_regression,
+    run_throughput,
+    security_corpus,
+)
+
+
+def test_plan_batches_respects_token_budget(make_model):
+    model = make_model(max_batch_tokens=100, max_batch_rows=4)
+    lengths = [50, 3, 40, 2, 4, 5, 6, 30]
+    batches = model._plan_batches(lengths, batch_size=32)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 100
+    assert batches[0] == [3, 1, 4, 5]
+
+
+def test_length_bucketed_encode_preserves_order_and_cuts_padding(fake_hf, make_model):
+    texts = ["short line"] * 3 + ["word " * 60] + ["tiny"] * 3 + ["a b c"]
+    texts = [f"{t} {i}" for i, t in enumerate(texts)]
+    fixed = make_model(length_bucketing=False).encode(texts, batch_size=4)
+    bucketed = make_model(max_batch_tokens=64).encode(texts)
+    assert bucketed["batching"]["padded_tokens"] < fixed["batching"]["padded_tokens"]
+    assert bucketed["batching"]["tokens"] == fixed["batching"]["tokens"]
+    # One row per batch: no padding, so row i must equal texts[i] encoded alone.
+    sorted_rows = make_model(max_batch_rows=1).encode(texts)["embeddings"]
+    single = [make_model().encode([t])["embeddings"][0] for t in texts]
+    assert np.allclose(sorted_rows, np.stack(single))
+
+
+def test_throughput_benchmark_reports_variants(fake_hf):
+    report = run_throughput(
+        security_corpus(60),
+        variants={
+            "fixed_batch": {"length_bucketing": False},
+            "length_bucketed": {"max_batch_tokens": 256},
+        },
+        base_config={"model_name": "fake", "device": "cpu"},
+        repeats=1,
+    )
+    assert set(report) == {"fixed_batch", "length_bucketed"}
+    assert (
+        report["length_bucketed"]["padding_efficiency"]
+        > report["fixed_batch"]["padding_efficiency"]
+    )
+
+
+def test_pooling_ignores_padding():
+    hidden = torch.tensor([[[1.0, 2.0], [3.0, -4.0], [0.0, 0.0]]])
+    mask = torch.tensor([[1, 1, 0]])
+    assert torch.allclose(
+        pool_hidden_states(hidden, mask, "mean"), torch.tensor([[2.0, -1.0]])
+    )
+    assert torch.allclose(
+        pool_hidden_states(hidden, mask, "max"), torch.tensor([[3.0, 2.0]])
+    )
+    assert torch.allclose(
+        pool_hidden_states(hidden, mask, "cls"), torch.tensor([[1.0, 2.0]])
+    )
+
+
+def test_masked_pooling_is_batch_invariant_and_normalized(fake_hf, make_model):
+    corpus = {f"d{i}": t for i, t in enumerate(security_corpus(40))}
+    queries = {"q0": corpus["d3"], "q1": corpus["d7"]}
+    qrels = {"q0": {"d3": 1}, "q1": {"d7": 1}}
+    report = run_pooling_regression(
+        corpus,
+        queries,
+        qrels,
+        variants={
+            "legacy_mean": {"pooling": "mean_unmasked"},
+            "mean": {"pooling": "mean", "normalize": True},
+        },
+        base_config={"model_name": "fake", "device": "cpu", "max_batch_tokens": 512},
+    )
+    assert report["legacy_mean"]["batch_max_abs_diff"] > 1e-3
+    assert report["mean"]["batch_max_abs_diff"] < 1e-5
+    assert report["mean"]["ndcg@10"] >= report["legacy_mean"]["ndcg@10"]
+    model = make_model(normalize=True, pooling="max")
+    norms = np.linalg.norm(model.encode(list(corpus.values()))["embeddings"], axis=1)
+    assert np.allclose(norms, 1.0, atol=1e-5)
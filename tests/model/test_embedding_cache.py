@@ -0,0 +1,84 @@
+import numpy as np
+from ai_core.embedding.embedding import EmbeddingModel
+from ai_core.embedding.embedding_cache import EmbeddingCache, cache_namespace
+
+
+def make_cache(tmp_path, namespace="ns-a", **overrides):
+    config = {"cache_path": str(tmp_path / "cache.sqlite"), "cache_memory_items": 2}
+    config.update(overrides)
+    return EmbeddingCache(namespace, config)
+
+
+def test_cache_memory_and_disk_tiers(tmp_path):
+    cache = make_cache(tmp_path)
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+    cache.put_many(["a", "b", "c"], vectors)
+    # LRU keeps the 2 most recent; "a" must come from disk.
+    found = cache.get_many(["c", "a", "missing"])
+    assert np.array_equal(found[0], vectors[2])
+    assert np.array_equal(found[1], vectors[0])
+    assert found[2] is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    cache.close()
+    # Normalized-whitespace keys survive a restart.
+    reopened = make_cache(tmp_path)
+    assert np.array_equal(reopened.get_many(["a  "])[0], vectors[0])
+
+
+def test_cache_invalidates_on_namespace_change(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many(["a"], np.ones((1, 4), dtype=np.float32))
+    cache.close()
+    other = make_cache(tmp_path, namespace=cache_namespace({"pooling": "cls"}))
+    assert other.get_many(["a"]) == [None]
+    assert other.stats()["disk_mb"] > 0  # kept until purged explicitly
+    assert other.purge_namespaces() == 1
+    assert other.stats()["disk_mb"] == 0
+
+
+def test_namespaces_share_one_file(tmp_path):
+    mean = make_cache(tmp_path, namespace="mean")
+    cls = make_cache(tmp_path, namespace="cls")
+    mean.put_many(["a", "b"], np.ones((2, 4), dtype=np.float32))
+    cls.put_many(["a"], np.zeros((1, 4), dtype=np.float32))
+    mean.close()
+    cls.close()
+    mean = make_cache(tmp_path, namespace="mean")
+    cls = make_cache(tmp_path, namespace="cls")
+    assert np.array_equal(mean.get_many(["a"])[0], np.ones(4))
+    assert np.array_equal(cls.get_many(["a"])[0], np.zeros(4))
+    assert cls.get_many(["b"]) == [None]
+    cls.clear()
+    mean._memory.clear()
+    assert mean.get_many(["a", "b"])[1] is not None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, cache_max_disk_mb=4096 * 3 / 2**20)
+    vectors = np.ones((4, 1024), dtype=np.float32)
+    cache.put_many(["a", "b", "c"], vectors[:3])
+    cache.get_many(["a"])
+    cache.put_many(["d"], vectors[3:])
+    assert cache.stats()["evictions"] >= 1
+    cache._memory.clear()
+    found = cache.get_many(["a", "b", "d"])
+    assert found[0] is not None and found[2] is not None
+    assert found[1] is None
+
+
+def test_encode_uses_cache_and_dedupes(tmp_path, fake_hf):
+    config = {
+        "model_name": "fake",
+        "device": "cpu",
+        "cache_enabled": True,
+        "cache_path": str(tmp_path / "cache.sqlite"),
+    }
+    embedder = EmbeddingModel(config=config)
+    first = embedder.encode(["alert A", "alert B", "alert A"])
+    assert fake_hf.calls == 2
+    assert first["cache"] == {"hits": 0, "computed": 2}
+    second = EmbeddingModel(config=config).encode(["alert B", "alert C"])
+    assert fake_hf.calls == 3
+    assert second["cache"] == {"hits": 1, "computed": 1}
+    assert np.array_equal(second["embeddings"][0], first["embeddings"][1])
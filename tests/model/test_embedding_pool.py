@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pytest
+from ai_core.embedding import embedding as embedding_module
+from ai_core.embedding.embedding import EmbeddingModel
+from ai_core.embedding.embedding_pool import _cpu_subsets
+
+# Fork keeps the fake_hf monkeypatches in the workers.
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="pool tests use the fork start method"
+)
+
+
+PARALLEL_CONFIG = {
+    "parallel_start_method": "fork",
+    "parallel_threads_per_worker": 1,
+    "parallel_chunk_rows": 3,
+    "parallel_task_timeout_s": 60,
+}
+
+
+def test_cpu_subsets_are_disjoint_blocks():
+    subsets = _cpu_subsets(2, 1)
+    assert len(subsets) == 2 and all(len(s) == 1 for s in subsets)
+    if (os.cpu_count() or 1) > 1 and hasattr(os, "sched_getaffinity"):
+        if len(os.sched_getaffinity(0)) > 1:
+            assert subsets[0] != subsets[1]
+
+
+def test_encode_parallel_matches_serial(fake_hf, make_model):
+    texts = [f"alert {i} from host-{i % 3}" for i in range(10)] + [
+        "alert 0 from host-0"
+    ]
+    model = make_model(**PARALLEL_CONFIG)
+    try:
+        parallel = model.encode_parallel(texts, workers=2)
+        assert parallel["success"], parallel["error"]
+        serial = model.encode(texts)
+        assert parallel["embeddings"].dtype == np.float32
+        assert np.allclose(parallel["embeddings"], serial["embeddings"])
+        assert model._pool.restarts == 0
+    finally:
+        model.close_pool()
+
+
+def test_encode_parallel_restarts_crashed_worker(
+    fake_hf, make_model, tmp_path, monkeypatch
+):
+    marker = tmp_path / "crashed"
+    original = EmbeddingModel._compute
+
+    def crash_once(self, missing, batch_size, batching):
+        if "CRASH" in missing and not marker.exists():
+            marker.touch()
+            os._exit(1)
+        return original(self, missing, batch_size, batching)
+
+    monkeypatch.setattr(embedding_module.EmbeddingModel, "_compute", crash_once)
+    texts = [f"log line {i}" for i in range(8)] + ["CRASH"]
+    model = make_model(**PARALLEL_CONFIG)
+    try:
+        result = model.encode_parallel(texts, workers=2)
+        assert result["success"], result["error"]
+        assert marker.exists()
+        assert model._pool.restarts == 1
+        assert np.allclose(result["embeddings"], model.encode(texts)["embeddings"])
+    finally:
+        model.close_pool()
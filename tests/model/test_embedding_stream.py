@@ -0,0 +1,66 @@
+import time
+import numpy as np
+import pytest
+from ai_core.local_vector_store import LocalVectorStore
+
+
+def test_encode_stream_yields_ids_in_order(fake_hf, make_model):
+    texts = [f"event {i} " + "x " * (i % 7) for i in range(23)]
+    model = make_model()
+    batches = list(model.encode_stream(iter(texts), batch_size=5))
+    assert [len(ids) for ids, _ in batches] == [5, 5, 5, 5, 3]
+    assert [i for ids, _ in batches for i in ids] == list(range(23))
+    streamed = np.concatenate([emb for _, emb in batches])
+    assert np.allclose(streamed, model.encode(texts)["embeddings"])
+    pairs = list(model.encode_stream((f"id-{i}", t) for i, t in enumerate(texts[:3])))
+    assert pairs[0][0] == ["id-0", "id-1", "id-2"]
+
+
+def test_encode_stream_reads_ahead_boundedly(fake_hf, make_model):
+    consumed = []
+
+    def source():
+        for i in range(10_000):
+            consumed.append(i)
+            yield f"line {i}"
+
+    stream = make_model().encode_stream(source(), batch_size=10, prefetch=2)
+    next(stream)
+    time.sleep(0.3)
+    # One batch in hand, `prefetch` queued, one being tokenized.
+    assert len(consumed) <= 10 * 4
+    stream.close()
+
+
+def test_encode_stream_surfaces_input_errors(fake_hf, make_model):
+    def broken():
+        yield "fine"
+        raise ValueError("bad source")
+
+    with pytest.raises(RuntimeError, match="bad source"):
+        list(make_model().encode_stream(broken(), batch_size=1))
+
+
+def test_upsert_stream_into_local_store(fake_hf, make_model, tmp_path):
+    store = LocalVectorStore(
+        config={
+            "local_path": str(tmp_path / "index"),
+            "index_type": "none",
+            "upsert_key": "doc_chunk",
+        }
+    )
+    chunks = [
+        {"text": f"alert {i}", "doc_id": "doc", "metadata": {"source": "ids"}}
+        for i in range(7)
+    ]
+    stream = make_model().encode_stream(((c, c["text"]) for c in chunks), batch_size=3)
+    stats = store.upsert_stream(stream)
+    assert stats["rows"] == 7 and stats["batches"] == 3
+    logs = (f"log {i}" for i in range(5))
+    plain = make_model().encode_stream(((t, t) for t in logs), batch_size=2)
+    assert store.upsert_stream(plain)["rows"] == 5
+    assert len(store.query(np.ones(2), top_k=20, filters={"source": "ids"})) == 7
+    assert len(store.query(np.ones(2), top_k=20)) == 12
+    assert store.upsert_stream([([{"no_text": 1}], np.zeros((1, 2)))]).startswith(
+        "[ERROR]"
+    )
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import numpy as np
+from ai_core.embedding.embedding import EmbeddingModel
+
+TEXTS = ["failed login from 10.0.0.1", "port scan", "failed login from 10.0.0.1"]
+
+
+def make_model(**overrides):
+    return EmbeddingModel(config=dict({"backend": "stub"}, **overrides))
+
+
+def test_stub_vectors_are_deterministic_per_text():
+    first = make_model().encode(TEXTS)
+    assert first["success"]
+    assert first["embeddings"].shape == (3, 384)
+    assert first["embeddings"].dtype == np.float32
+    assert np.array_equal(first["embeddings"][0], first["embeddings"][2])
+    assert not np.allclose(first["embeddings"][0], first["embeddings"][1])
+    again = make_model().encode(TEXTS[1:2])["embeddings"]
+    assert np.array_equal(again[0], first["embeddings"][1])
+
+
+def test_stub_dimension_and_normalization():
+    model = make_model(stub_dimension=64, normalize=True)
+    embeddings = model.encode(TEXTS)["embeddings"]
+    assert model.dimension == 64 and embeddings.shape == (3, 64)
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+
+
+def test_stub_stream_matches_encode():
+    model = make_model()
+    expected = model.encode(TEXTS)["embeddings"]
+    streamed = list(model.encode_stream(TEXTS, batch_size=2))
+    assert [ids for ids, _ in streamed] == [[0, 1], [2]]
+    assert np.array_equal(np.concatenate([e for _, e in streamed]), expected)
+
+
+def test_stub_cache_namespace_differs_from_real_model_and_dimension():
+    stub = make_model()
+    assert stub.cache_fingerprint()["backend"] == "stub"
+    assert stub.cache_namespace() != make_model(stub_dimension=64).cache_namespace()
+
+
+def test_stub_backend_needs_no_torch_or_transformers():
+    code = (
+        "import sys; from ai_core.embedding.embedding import EmbeddingModel;"
+        "r = EmbeddingModel(config={'backend': 'stub'}).encode(['a', 'b']);"
+        "assert r['success'];"
+        "print('torch' in sys.modules, 'transformers' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split()[-2:] == ["False", "False"]
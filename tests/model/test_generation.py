@@ -0,0 +1,69 @@
+import pytest
+
+
+PROMPTS = [
+    "summarize the alert",
+    "triage failed login from host admin over ssh brute force",
+    "port scan",
+    "malware beacon detected in outbound dns traffic from host root",
+    "summarize the alert",
+]
+
+
+def test_generate_batch_matches_single_prompt_generation(tiny_lm):
+    core = tiny_lm(generation_max_batch_rows=4)
+    batched = core.generate_batch(PROMPTS, max_new_tokens=6)
+    assert batched["success"], batched["error"]
+    assert batched["timings"]["batches"] == 2
+    assert batched["timings"]["generated_tokens"] > 0
+    for prompt, output in zip(PROMPTS, batched["outputs"]):
+        single = core.generate_batch([prompt], max_new_tokens=6)
+        assert single["outputs"] == [output]
+    assert core.tokenizer.padding_side == "left"
+
+
+def test_generate_batch_respects_token_budget(tiny_lm):
+    core = tiny_lm(generation_max_batch_tokens=40)
+    lengths = [4, 12, 2, 12, 4]
+    batches = core._plan_batches(lengths, max_new_tokens=6)
+    assert sorted(i for rows in batches for i in rows) == list(range(5))
+    for rows in batches:
+        longest = max(lengths[i] for i in rows)
+        assert len(rows) == 1 or len(rows) * (longest + 6) <= 40
+
+
+def test_generate_batch_validates_input(tiny_lm):
+    core = tiny_lm()
+    assert core.generate_batch([])["error"] == "Input prompt list is empty."
+    assert not core.generate_batch([1, 2])["success"]
+
+
+def test_generate_stream_yields_deltas_and_timings(tiny_lm):
+    core = tiny_lm()
+    expected = core.generate_batch([PROMPTS[1]], max_new_tokens=8)["outputs"][0]
+    stream = core.generate_stream(PROMPTS[1], max_new_tokens=8)
+    pieces = list(stream)
+    assert "".join(pieces) == stream.result["text"]
+    assert stream.result["text"].strip() == expected.strip()
+    assert stream.result["generated_tokens"] >= 1
+    assert 0 < stream.result["ttft_ms"] <= stream.result["total_ms"]
+
+
+def test_generate_stream_surfaces_errors(tiny_lm, monkeypatch):
+    core = tiny_lm()
+
+    def broken(**kwargs):
+        raise RuntimeError("device lost")
+
+    monkeypatch.setattr(core.model, "generate", broken)
+    with pytest.raises(RuntimeError, match="device lost"):
+        list(core.generate_stream("port scan"))
+
+
+def test_stub_backend_supports_batch_and_stream(tiny_lm):
+    core = tiny_lm(model_name="stub")
+    batched = core.generate_batch(["a", "b"], max_new_tokens=3)
+    assert batched["outputs"] == [core.generate("a", 3), core.generate("b", 3)]
+    stream = core.generate_stream("a", max_new_tokens=3)
+    assert "".join(stream) == core.generate("a", 3)
+    assert stream.result["ttft_ms"] is not None
@@ -0,0 +1,216 @@
+import numpy as np
+import pytest
+from ai_core.local_vector_store import LocalVectorStore
+from ai_core.vector_backend import get_vector_store
+
+
+def make_store(tmp_path, **overrides):
+    config = {
+        "backend": "local",
+        "local_path": str(tmp_path / "index"),
+        "metric": "cosine",
+        "index_type": "ivfflat",
+        "ivf_lists": 8,
+        "probes": 8,
+    }
+    config.update(overrides)
+    return LocalVectorStore(config=config)
+
+
+def random_corpus(n=500, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"chunk {i}" for i in range(n)], rng.standard_normal((n, dim)).astype(
+        np.float32
+    )
+
+
+def test_local_store_exact_query_matches_pgvector_shape(tmp_path):
+    store = make_store(tmp_path, index_type="none")
+    texts, embeddings = random_corpus(50)
+    stats = store.upsert_embeddings(texts, embeddings)
+    assert stats["rows"] == 50
+    results = store.query(embeddings[7], top_k=3)
+    assert isinstance(results, list)
+    assert len(results) == 3
+    assert results[0][0] == "chunk 7"
+    assert np.allclose(results[0][1], embeddings[7])
+
+
+def test_local_store_upsert_replaces_by_content_hash(tmp_path):
+    store = make_store(tmp_path, index_type="none")
+    store.upsert_embeddings(["alert A"], np.ones((1, 4)))
+    store.upsert_embeddings(["alert  A"], np.full((1, 4), 2.0))
+    assert len(store) == 1
+    assert np.allclose(store.query(np.ones(4), top_k=1)[0][1], 2.0)
+
+
+def test_local_store_persists_and_mmaps(tmp_path):
+    store = make_store(tmp_path, storage_mode="float16")
+    texts, embeddings = random_corpus(300)
+    store.upsert_embeddings(texts, embeddings)
+    store.build_index()
+    store.save()
+    reloaded = make_store(tmp_path, storage_mode="float16")
+    assert len(reloaded) == 300
+    assert isinstance(reloaded._vectors, np.memmap)
+    assert reloaded._vectors.dtype == np.float16
+    assert reloaded.query(embeddings[42], top_k=1)[0][0] == "chunk 42"
+    # Writes after a mmap load go to RAM and survive another save/load.
+    reloaded.upsert_embeddings(["new chunk"], embeddings[:1] * -1)
+    reloaded.close()
+    assert len(make_store(tmp_path)) == 301
+
+
+def test_local_store_delete_texts(tmp_path):
+    store = make_store(tmp_path)
+    texts, embeddings = random_corpus(300)
+    store.upsert_embeddings(texts, embeddings)
+    store.build_index()
+    store.save()
+    store = make_store(tmp_path)  # mmap'd columns
+    assert store.lexical_query("chunk", top_k=1)
+    assert store.delete_texts(["chunk 5", "chunk 299", "missing"]) == 2
+    assert len(store) == 298
+    assert store.query(embeddings[5], top_k=1, probes=8)[0][0] != "chunk 5"
+    assert store.query(embeddings[42], top_k=1, probes=8)[0][0] == "chunk 42"
+    assert store.lexical_query("299", top_k=5) == []
+    assert store.lexical_query("298", top_k=1)[0][0] == "chunk 298"
+    store.upsert_embeddings(["chunk 298"], embeddings[298:299])
+    assert len(store) == 298
+    store.close()
+    reloaded = make_store(tmp_path)
+    assert len(reloaded) == 298
+    assert reloaded.query(embeddings[298], top_k=1)[0][0] == "chunk 298"
+
+
+def test_local_store_ivf_recall(tmp_path):
+    store = make_store(tmp_path, probes=2)
+    texts, embeddings = random_corpus(2000, dim=32)
+    store.upsert_embeddings(texts, embeddings)
+    assert store.build_index()["lists"] == 8
+    report = store.recall_latency_report(sample_size=20, top_k=5, probes_values=[8])
+    assert report[0]["recall@5"] == pytest.approx(1.0)
+    rows, _ = store.search(embeddings[3], top_k=1)
+    assert rows[0] == 3
+
+
+def test_local_store_dimension_mismatch(tmp_path):
+    store = make_store(tmp_path, dimension=8)
+    result = store.upsert_embeddings(["a"], np.zeros((1, 4)))
+    assert "ERROR" in str(result)
+
+
+def test_get_vector_store_selects_backend(tmp_path):
+    store = get_vector_store(
+        {"backend": "local", "local_path": str(tmp_path / "index")}
+    )
+    assert isinstance(store, LocalVectorStore)
+    with pytest.raises(ValueError):
+        get_vector_store({"backend": "faiss"})
+
+
+def test_local_store_metadata_filters(tmp_path):
+    store = make_store(tmp_path, prefilter_max_rows=0)
+    texts, embeddings = random_corpus(400)
+    metadata = [
+        {
+            "source": "cloudtrail" if i % 2 else "guardduty",
+            "timestamp": 1_700_000_000 + i,
+            "severity": "high" if i % 10 == 0 else "low",
+            "tags": {"account": str(i % 3)},
+        }
+        for i in range(400)
+    ]
+    store.upsert_embeddings(texts, embeddings, metadata=metadata)
+    store.build_index()
+    filters = {
+        "source": "guardduty",
+        "min_severity": "high",
+        "start": 1_700_000_100,
+        "metadata": {"tags": {"account": "0"}},
+    }
+    results = store.query(embeddings[0], top_k=5, filters=filters)
+    expected = {f"chunk {i}" for i in range(120, 400, 30)}
+    assert len(results) == 5
+    assert {text for text, _ in results} <= expected
+    # Persisted metadata columns filter identically after reload.
+    store.save()
+    reloaded = make_store(tmp_path)
+    assert [t for t, _ in reloaded.query(embeddings[0], 5, filters=filters)] == [
+        t for t, _ in results
+    ]
+    assert reloaded.query(embeddings[0], filters={"bogus": 1}).startswith("[ERROR]")
+
+
+def test_local_store_hybrid_query_surfaces_exact_identifiers(tmp_path):
+    store = make_store(tmp_path, index_type="none", upsert_key="doc_chunk")
+    texts, embeddings = random_corpus(200)
+    texts[150] = "Exploit attempt for CVE-2024-3094 from 10.0.0.12"
+    texts[151] = "Unrelated CVE-2023-0001 advisory"
+    doc_ids = [f"doc-{i}" for i in range(200)]
+    store.upsert_embeddings(texts, embeddings, doc_ids=doc_ids, chunk_indices=[0] * 200)
+    lexical = store.lexical_query("cve-2024-3094 ssh", top_k=5)
+    assert [text for text, _ in lexical] == [texts[150]]
+    hybrid = store.hybrid_query("CVE-2024-3094", embeddings[3], top_k=2)
+    assert {text for text, _ in hybrid["results"]} == {"chunk 3", texts[150]}
+    assert hybrid["dense"][0]["text"] == "chunk 3"
+    assert hybrid["rows"][0]["doc_id"] in {"doc-3", "doc-150"}
+    # Replacing a chunk re-indexes its terms in place.
+    store.upsert_embeddings(
+        ["Patched host 10.0.0.12"],
+        embeddings[150:151],
+        doc_ids=["doc-150"],
+        chunk_indices=[0],
+    )
+    assert store.lexical_query("cve-2024-3094", top_k=5) == []
+    assert store.lexical_query("10.0.0.12", top_k=5)[0][0] == "Patched host 10.0.0.12"
+
+
+def test_local_store_hybrid_keeps_chunks_with_identical_text(tmp_path):
+    store = make_store(tmp_path, index_type="none", upsert_key="doc_chunk")
+    line = "Accepted publickey for root from 10.0.0.12"
+    embeddings = np.eye(3, dtype=np.float32)
+    store.upsert_embeddings(
+        [line, line, "unrelated"],
+        embeddings,
+        doc_ids=["host-a", "host-b", "host-c"],
+        chunk_indices=[0, 0, 0],
+        metadata=[{"source": "auth"}, {"source": "auth"}, None],
+    )
+    hybrid = store.hybrid_query("10.0.0.12", embeddings[0], top_k=3)
+    fused = [(row["doc_id"], row["text"]) for row in hybrid["rows"]]
+    assert fused[:2] == [("host-a", line), ("host-b", line)]
+    assert hybrid["scores"][0] == pytest.approx(2 / 61)
+    assert hybrid["rows"][0]["metadata"]["source"] == "auth"
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary", "pq"])
+def test_local_store_quantized_modes_rerank(tmp_path, mode):
+    texts, embeddings = random_corpus(600, dim=32)
+    store = make_store(tmp_path, index_type="none", storage_mode=mode, pq_m=8)
+    store.upsert_embeddings(texts, embeddings)
+    # Reranked results carry full-precision vectors and exact distances.
+    results = store.query(embeddings[11], top_k=3)
+    assert results[0][0] == "chunk 11"
+    assert np.array_equal(results[0][1], embeddings[11])
+    assert store._codes.dtype in (np.int8, np.uint8)
+    store.upsert_embeddings(["late chunk"], embeddings[:1] * -1)
+    store.save()
+    reloaded = make_store(tmp_path, index_type="none", storage_mode=mode, pq_m=8)
+    assert not isinstance(reloaded._codes, np.memmap)
+    assert len(reloaded._codes) == 601
+    assert reloaded.query(embeddings[:1] * -1, top_k=1)[0][0] == "late chunk"
+
+
+def test_local_store_storage_report(tmp_path):
+    store = make_store(tmp_path, index_type="none", pq_m=8)
+    texts, embeddings = random_corpus(400, dim=32)
+    store.upsert_embeddings(texts, embeddings)
+    report = {r["storage_mode"]: r for r in store.storage_report(20, top_k=5)}
+    assert set(report) == {"float32", "float16", "int8", "binary", "pq"}
+    assert report["float32"]["recall@5"] == 1.0
+    assert report["int8"]["bytes_per_vector"] == 32 + 4
+    assert report["binary"]["bytes_per_vector"] == 4 + 4
+    assert report["pq"]["bytes_per_vector"] == 8 + 4
+    assert report["int8"]["recall@5"] >= report["int8"]["recall@5_prerank"]
+    assert report["int8"]["recall@5"] > 0.9
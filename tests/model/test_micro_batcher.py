@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+import time
+import numpy as np
+from ai_core.embedding.micro_batcher import EmbeddingMicroBatcher
+from src.api.main import EmbeddingAPI
+
+
+class RecordingEmbedder:
+    """encode() stand-in: vector [len(text), batch position]; records batch sizes."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def encode(self, texts):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.batches.append(len(texts))
+        if self.fail:
+            return {"success": False, "error": "model down", "embeddings": None}
+        return {
+            "success": True,
+            "embeddings": np.array([[len(t), i] for i, t in enumerate(texts)], float),
+        }
+
+
+def test_concurrent_requests_share_one_forward_pass():
+    embedder = RecordingEmbedder()
+
+    async def main():
+        batcher = EmbeddingMicroBatcher(
+            embedder, {"microbatch_max_size": 8, "microbatch_max_wait_ms": 20}
+        )
+        results = await asyncio.gather(*(batcher.embed("x" * i) for i in range(20)))
+        stats = batcher.stats()
+        await batcher.close()
+        return results, stats
+
+    results, stats = asyncio.run(main())
+    assert all(r["success"] for r in results)
+    assert [r["embedding"][0] for r in results] == list(range(20))
+    assert embedder.batches == [8, 8, 4]
+    assert stats["batches"] == 3 and stats["mean_batch_size"] > 6
+    assert stats["p50_ms"] is not None and stats["p99_ms"] >= stats["p50_ms"]
+
+
+def test_backpressure_and_timeouts():
+    embedder = RecordingEmbedder()
+    embedder.release.clear()
+
+    async def main():
+        batcher = EmbeddingMicroBatcher(
+            embedder,
+            {
+                "microbatch_max_size": 1,
+                "microbatch_max_wait_ms": 1,
+                "microbatch_max_queue": 2,
+                "microbatch_timeout_s": 0.2,
+            },
+        )
+        # All six arrive before the worker runs: two fill the queue, four bounce,
+        # and the queued two time out behind the blocked model.
+        results = await asyncio.gather(*(batcher.embed(f"q{i}") for i in range(6)))
+        embedder.release.set()
+        stats = batcher.stats()
+        await batcher.close()
+        return results, stats
+
+    results, stats = asyncio.run(main())
+    kinds = sorted(r["error_type"] for r in results)
+    assert kinds.count("overloaded") == 4
+    assert kinds.count("timeout") == 2
+    assert stats["rejected"] == 4 and stats["timeouts"] == 2
+
+
+def call_app(app, method, path, payload=None):
+    async def main():
+        sent = []
+        body = json.dumps(payload).encode() if payload is not None else b""
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await app({"type": "http", "method": method, "path": path}, receive, send)
+        if app.batcher is not None:
+            await app.batcher.close()
+        return sent[0]["status"], json.loads(sent[1]["body"])
+
+    return asyncio.run(main())
+
+
+def test_api_embed_routes():
+    app = EmbeddingAPI(embedder=RecordingEmbedder(), config={})
+    status, body = call_app(app, "POST", "/embed", {"texts": ["ab", "abcd"]})
+    assert status == 200
+    assert [e[0] for e in body["embeddings"]] == [2, 4]
+    assert call_app(app, "POST", "/embed", {"nope": 1})[0] == 400
+    assert call_app(app, "GET", "/health")[1] == {"status": "ok"}
+    failing = EmbeddingAPI(embedder=RecordingEmbedder(fail=True), config={})
+    status, body = call_app(failing, "POST", "/embed", {"text": "a"})
+    assert status == 500 and "model down" in body["error"]
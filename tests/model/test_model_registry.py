@@ -0,0 +1,104 @@
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import torch
+from ai_core import model_registry
+from ai_core.embedding.embedding import EmbeddingModel
+
+
+def make_model(**overrides):
+    return EmbeddingModel(
+        config=dict({"model_name": "fake", "device": "cpu"}, **overrides)
+    )
+
+
+def test_get_model_loads_once_under_concurrency(monkeypatch):
+    monkeypatch.setattr(model_registry, "_MODELS", {})
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(model_registry.get_model(("k",), loader))
+        )
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert all(r is results[0] for r in results)
+    assert model_registry.registry_stats()[("k",)]["hits"] == 7
+
+
+def test_failed_load_is_retried(monkeypatch):
+    monkeypatch.setattr(model_registry, "_MODELS", {})
+
+    def broken():
+        raise OSError("download failed")
+
+    with pytest.raises(OSError):
+        model_registry.get_model(("k",), broken)
+    assert model_registry.get_model(("k",), lambda: "loaded") == "loaded"
+
+
+def test_embedding_models_load_lazily_and_share_weights(fake_hf, monkeypatch):
+    loads = []
+    original = fake_hf.from_pretrained.__func__
+
+    def counting(cls, name, **kwargs):
+        loads.append(kwargs)
+        return original(cls, name, **kwargs)
+
+    monkeypatch.setattr(fake_hf, "from_pretrained", classmethod(counting))
+    first, second = make_model(), make_model()
+    assert loads == []
+    assert first.encode(["alert"])["success"]
+    assert second.model is first.model
+    assert (
+        make_model(quantize=True, quantization_type="float16").model is not first.model
+    )
+    assert len(loads) == 2
+    assert make_model(lazy_load=False)._loaded
+
+
+def test_plain_import_does_not_load_torch_or_transformers():
+    code = (
+        "import sys, ai_core.embedding.embedding, ai_core.model_loader;"
+        "print('torch' in sys.modules, 'transformers' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_warm_start_loads_safetensors_snapshot(tmp_path):
+    from transformers import BertConfig, BertModel
+
+    config = BertConfig(
+        vocab_size=32,
+        hidden_size=8,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=16,
+    )
+    saved = BertModel(config)
+    saved.save_pretrained(tmp_path, safe_serialization=True)
+    loaded = model_registry.from_pretrained(BertModel, str(tmp_path), warm_start=True)
+    for name, tensor in saved.state_dict().items():
+        assert torch.equal(loaded.state_dict()[name], tensor)
+
+
+def test_warm_start_falls_back_without_safetensors(tmp_path, fake_hf, capsys):
+    model = model_registry.from_pretrained(fake_hf, str(tmp_path), warm_start=True)
+    assert isinstance(model, fake_hf)
+    assert "Warm start unavailable" in capsys.readouterr().out
@@ -0,0 +1,58 @@
+from ai_core.benchmark_prefix_cache import run_prefix_benchmark, triage_prompts
+from ai_core.prefix_cache import PrefixKVCache
+
+PREFIX = "triage the alert severity high low medium user admin root ssh\n"
+
+
+def test_registered_prefix_is_reused_without_changing_output(tiny_lm):
+    core = tiny_lm()
+    prompt = PREFIX + "failed login from host"
+    expected = core.generate(prompt, max_new_tokens=6, use_prefix_cache=False)
+    registered = core.register_prefix(PREFIX)
+    assert registered["success"] and registered["tokens"] == 11
+    assert core.generate(prompt, max_new_tokens=6) == expected
+    streamed = core.generate_stream(prompt, max_new_tokens=6)
+    assert "".join(streamed).strip() in expected
+    stats = core.prefix_cache.stats()
+    assert stats["hits"] == 2 and stats["reused_tokens"] == 22
+
+
+def test_prompts_without_the_prefix_miss(tiny_lm):
+    core = tiny_lm()
+    core.register_prefix(PREFIX)
+    core.generate("port scan from host", max_new_tokens=2)
+    # The whole prompt equal to the prefix leaves nothing to prefill.
+    core.generate(PREFIX, max_new_tokens=2)
+    assert core.prefix_cache.stats()["hits"] == 0
+    assert core.prefix_cache.stats()["misses"] == 2
+
+
+def test_prefix_cache_is_shared_across_instances(tiny_lm):
+    first, second = tiny_lm(), tiny_lm()
+    first.register_prefix(PREFIX)
+    assert second.prefix_cache is first.prefix_cache
+
+
+def test_least_recently_used_prefix_is_evicted_over_budget(tiny_lm):
+    core = tiny_lm()
+    size = PrefixKVCache(core.model, "cpu").register([2, 3, 4, 5])
+    cache = PrefixKVCache(
+        core.model, "cpu", {"prefix_cache_max_mb": 2.5 * size / 2**20}
+    )
+    cache.register([2, 3, 4, 5])
+    cache.register([6, 7, 8, 9])
+    assert cache.lookup([2, 3, 4, 5, 10])[0] == 4  # refreshes the first prefix
+    cache.register([10, 11, 12, 13])
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup([6, 7, 8, 9, 10]) == (0, None)
+    assert cache.lookup([2, 3, 4, 5, 10])[0] == 4
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_prefix_benchmark_reports_ttft(tiny_lm):
+    core = tiny_lm()
+    report = run_prefix_benchmark(core, triage_prompts(3), repeats=1)
+    assert report["outputs_match"]
+    assert report["prefix_tokens"] > 100
+    assert report["prefix_cache"]["hits"] == 3
+    assert report["baseline_ttft_ms"] > 0 and report["cached_ttft_ms"] > 0
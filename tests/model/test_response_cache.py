@@ -0,0 +1,143 @@
+import zlib
+import numpy as np
+import pytest
+from ai_core.local_vector_store import LocalVectorStore
+from ai_core.response_cache import SemanticResponseCache
+
+CONTEXT = "alert: failed login from host admin over ssh"
+
+
+class BagOfWordsEmbedder:
+    """Hashed bag-of-words vectors: same words in any case/spacing embed identically."""
+
+    dimension = 64
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        return {"success": True, "embeddings": vectors, "error": None}
+
+
+def cached_core(tiny_lm, tmp_path, **cache_config):
+    core = tiny_lm(response_cache_enabled=True)
+    store = LocalVectorStore(
+        config={"local_path": str(tmp_path), "metric": "cosine", "index_type": "none"},
+        dimension=BagOfWordsEmbedder.dimension,
+    )
+    core.response_cache = SemanticResponseCache(
+        BagOfWordsEmbedder(),
+        store,
+        dict({"response_cache_threshold": 0.9}, **cache_config),
+    )
+    calls = []
+    original = core.model.generate
+
+    def counting(**kwargs):
+        calls.append(1)
+        return original(**kwargs)
+
+    core.model.generate = counting
+    return core, calls
+
+
+def test_repeated_question_is_answered_from_cache(tiny_lm, tmp_path):
+    core, calls = cached_core(tiny_lm, tmp_path)
+    first = core.generate("triage the alert", max_new_tokens=4, context=CONTEXT)
+    again = core.generate("Triage  the ALERT", max_new_tokens=4, context=CONTEXT)
+    assert again == first
+    assert len(calls) == 1
+    stats = core.response_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+    assert stats["mean_hit_ms"] is not None
+
+
+def test_different_context_or_settings_miss(tiny_lm, tmp_path):
+    core, calls = cached_core(tiny_lm, tmp_path)
+    core.generate("triage the alert", max_new_tokens=4, context=CONTEXT)
+    core.generate("triage the alert", max_new_tokens=4, context="alert: port scan")
+    core.generate("triage the alert", max_new_tokens=5, context=CONTEXT)
+    assert len(calls) == 3
+    assert core.response_cache.stats()["hits"] == 0
+
+
+def test_expired_answers_are_regenerated(tiny_lm, tmp_path):
+    core, calls = cached_core(tiny_lm, tmp_path, response_cache_ttl_s=-1)
+    core.generate("triage the alert", max_new_tokens=4, context=CONTEXT)
+    core.generate("triage the alert", max_new_tokens=4, context=CONTEXT)
+    assert len(calls) == 2
+    assert core.response_cache.stats()["expired"] == 1
+
+
+def test_bypass_flag_skips_the_cache(tiny_lm, tmp_path):
+    core, calls = cached_core(tiny_lm, tmp_path)
+    core.generate("triage the alert", max_new_tokens=4, context=CONTEXT)
+    core.generate(
+        "triage the alert", max_new_tokens=4, context=CONTEXT, bypass_cache=True
+    )
+    assert len(calls) == 2
+    stats = core.response_cache.stats()
+    assert stats["bypassed"] == 1 and stats["hits"] == 0
+
+
+def test_evicted_and_expired_entries_leave_the_store(tmp_path):
+    store = LocalVectorStore(
+        config={"local_path": str(tmp_path), "metric": "cosine", "index_type": "none"},
+        dimension=BagOfWordsEmbedder.dimension,
+    )
+    cache = SemanticResponseCache(
+        BagOfWordsEmbedder(), store, {"response_cache_max_entries": 2}
+    )
+    for i in range(4):
+        cache.put(f"question {i}", f"answer {i}")
+    assert len(store) == 2
+    cache.ttl = -1
+    assert cache.lookup("question 3")[0] is None
+    assert len(store) == 1 and cache.stats()["expired"] == 1
+
+
+def test_orphan_row_does_not_shadow_live_entry(tmp_path):
+    store = LocalVectorStore(
+        config={"local_path": str(tmp_path), "metric": "cosine", "index_type": "none"},
+        dimension=BagOfWordsEmbedder.dimension,
+    )
+    cache = SemanticResponseCache(
+        BagOfWordsEmbedder(), store, {"response_cache_threshold": 0.8}
+    )
+    cache.put("triage the failed login alert", "live answer")
+    # Left by another process: nearer to the query but has no answer here.
+    orphan = ":triage the failed login alert now"
+    store.upsert_embeddings(
+        [orphan], BagOfWordsEmbedder().encode([orphan[1:]])["embeddings"]
+    )
+    response, similarity, _ = cache.lookup("triage the failed login alert now")
+    assert response == "live answer" and 0.8 <= similarity < 1.0
+
+
+class TextVectorStore:
+    """Returns embeddings in pgvector's text form, as psycopg2 does unadapted."""
+
+    def __init__(self):
+        self.rows = []
+
+    def upsert_embeddings(self, texts, embeddings, doc_ids=None):
+        self.rows += [
+            (t, "[" + ",".join(str(float(x)) for x in e) + "]")
+            for t, e in zip(texts, embeddings)
+        ]
+        return {"rows": len(texts)}
+
+    def query(self, query_embedding, top_k=5, filters=None):
+        return self.rows[:top_k]
+
+    def delete_texts(self, texts):
+        self.rows = [r for r in self.rows if r[0] not in texts]
+        return len(texts)
+
+
+def test_text_embeddings_from_pgvector_are_parsed():
+    cache = SemanticResponseCache(BagOfWordsEmbedder(), TextVectorStore())
+    cache.put("triage the alert", "answer")
+    response, similarity, _ = cache.lookup("Triage the alert")
+    assert response == "answer" and similarity == pytest.approx(1.0)
@@ -0,0 +1,58 @@
+import pytest
+from ai_core.chunking.chunk import TokenBasedChunkingStrategy
+from ai_core.embedding.embedding import EmbeddingModel
+from ai_core.tokenizer_service import TokenizerService, get_tokenizer_service
+
+
+def test_service_batches_misses_and_caches(fake_hf):
+    service = get_tokenizer_service("fake", {"tokenizer_cache_items": 2})
+    assert get_tokenizer_service("fake") is service
+    first = service.encode_batch(["a b", "c", "a b"])
+    assert first[0] == first[2]
+    assert service.tokenizer.calls == 1
+    service.encode_batch(["c", "a b"])
+    assert service.tokenizer.calls == 1
+    service.encode_batch(["d"])  # evicts the oldest entry
+    assert service.stats()["cached"] == 2
+
+
+def test_service_requires_fast_tokenizer(fake_hf, monkeypatch):
+    monkeypatch.setattr("transformers.AutoTokenizer.is_fast", False)
+    with pytest.raises(ValueError, match="fast"):
+        TokenizerService("fake")
+
+
+def test_chunk_token_ids_are_reused_by_encoder(fake_hf):
+    words = [f"word{i}" for i in range(20)]
+    chunks = TokenBasedChunkingStrategy.chunk(
+        " ".join(words), tokenizer="fake", chunk_size=6, overlap=0
+    )
+    service = get_tokenizer_service("fake")
+    # One call for the whole document; chunk text is cut from the source.
+    assert service.tokenizer.calls == 1
+    assert chunks[0].text == " ".join(words[:6])
+    model = EmbeddingModel(
+        config={"model_name": "fake", "device": "cpu", "cache_enabled": False}
+    )
+    assert model.tokenizer_service is service
+    result = model.encode([c.text for c in chunks])
+    assert result["success"]
+    assert service.tokenizer.calls == 1
+    assert service.stats()["remembered"] == len(chunks) == 4
+    assert result["batching"]["tokens"] == 20
+
+
+def test_chunk_ids_cut_inside_a_word_are_not_cached(fake_hf, monkeypatch):
+    service = get_tokenizer_service("fake")
+    # Three tokens with no gap between them: "ab", "cd", "ef".
+    monkeypatch.setattr(
+        service,
+        "encode_with_offsets",
+        lambda text: ([7, 8, 9], [(0, 2), (2, 4), (4, 6)]),
+    )
+    chunks = TokenBasedChunkingStrategy.chunk("abcdef", tokenizer=service, chunk_size=2)
+    assert [c.text for c in chunks] == ["abcd", "ef"]
+    assert service.stats()["remembered"] == 0
+    cached = service.encode_batch([c.text for c in chunks])
+    service._cache.clear()
+    assert service.encode_batch([c.text for c in chunks]) == cached
@@ -1,3 +1,4 @@
+import time
 import pytest
 import numpy as np
 from ai_core.vector_store import VectorStore
@@ -52,3 +53,455 @@ def test_vector_store_error_handling():
     assert "ERROR" in str(result)
     result = store.query(np.zeros(384), top_k=1)
     assert "ERROR" in str(result)
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+        self.copied = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def copy_expert(self, sql, payload):
+        self.copied.append((sql, payload.read()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class RecordingConn:
+    def __init__(self):
+        self.cur = RecordingCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_vector_store_bulk_values_upsert_batches():
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    store.batch_size = 2
+    texts = ["a", "b", "c"]
+    embeddings = np.arange(12, dtype=np.float32).reshape(3, 4)
+    stats = store.upsert_embeddings(texts, embeddings, mode="values")
+    assert stats["rows"] == 3
+    assert stats["rows_per_sec"] > 0
+    inserts = store.conn.cur.statements
+    assert len(inserts) == 2
+    sql, params = inserts[0]
+    assert "ON CONFLICT (content_hash) DO UPDATE" in sql
+    assert params[4] == "[0,1,2,3]"
+    assert params[13] == "[4,5,6,7]"
+    assert store.conn.commits == 2
+
+
+def test_vector_store_bulk_upsert_dedupes_keys_within_batch():
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    texts = ["dup  line", "dup line", "other"]
+    stats = store.upsert_embeddings(texts, np.ones((3, 4)), mode="values")
+    assert stats["rows"] == 3
+    sql, params = store.conn.cur.statements[0]
+    assert sql.count("::vector") == 2
+    assert params[3] == "dup line"
+
+
+def test_vector_store_copy_upsert_payload():
+    store = VectorStore(dimension=2)
+    store.conn = RecordingConn()
+    embeddings = np.array([[1.0, -2.0]], dtype=np.float32)
+    stats = store.upsert_embeddings(
+        ["alert"], embeddings, doc_ids=["doc1"], chunk_indices=[7], mode="copy"
+    )
+    assert stats["mode"] == "copy"
+    copy_sql, payload = store.conn.cur.copied[0]
+    assert "FORMAT binary" in copy_sql
+    assert payload.startswith(b"PGCOPY\n\xff\r\n\x00")
+    assert payload.endswith(b"\xff\xff")
+    assert np.array([1.0, -2.0], dtype=">f4").tobytes() in payload
+    assert any("ON CONFLICT" in sql for sql, _ in store.conn.cur.statements)
+    staging_sql = store.conn.cur.statements[0][0]
+    assert "WITH NO DATA" in staging_sql and "INCLUDING DEFAULTS" not in staging_sql
+    assert "SELECT doc_id," in staging_sql and " id," not in staging_sql
+
+
+def test_vector_store_table_is_sized_by_first_upsert(monkeypatch):
+    store = VectorStore()
+    assert store.dimension is None  # no table yet and no model lookup
+    store.conn = RecordingConn()
+    store.conn.closed = 0
+    stats = store.upsert_embeddings(["alert"], np.ones((1, 6)), mode="values")
+    assert stats["rows"] == 1 and store.dimension == 6
+    create_sql, _ = store.conn.cur.statements[0]
+    assert "embedding VECTOR(6)" in create_sql
+    assert "does not match" in store.upsert_embeddings(["b"], np.ones((1, 3)))
+    # An existing table keeps its dimension on reconnect.
+    existing = RecordingConn()
+    existing.cur.fetchone = lambda: (6,)
+    monkeypatch.setattr(VectorStore, "_connect", lambda self: existing)
+    reopened = VectorStore()
+    assert reopened.dimension == 6
+    assert "to_regclass" in existing.cur.statements[0][0]
+
+
+def test_vector_store_without_table_returns_empty_results():
+    store = VectorStore()
+    store.conn = RecordingConn()
+    store.conn.closed = 0
+    store.conn.autocommit = False
+    store.conn.cur.fetchone = lambda: None
+    assert store.query(np.ones(4), top_k=3) == []
+    assert store.lexical_query("alert") == []
+    assert store.hybrid_query("alert", np.ones(4))["results"] == []
+    assert store.delete_texts(["alert"]) == 0
+    assert "empty" in store.build_index()
+    assert all("to_regclass" in sql for sql, _ in store.conn.cur.statements)
+    # Created meanwhile by another process's upsert: found on the next query.
+    store.conn.cur.fetchone = lambda: (4,)
+    store.conn.cur.fetchall = lambda: [("alert", "[1,1,1,1]")]
+    assert store.query(np.ones(4), top_k=1) == [("alert", "[1,1,1,1]")]
+    assert store.dimension == 4
+
+
+def test_vector_store_upsert_length_mismatch():
+    store = VectorStore()
+    store.conn = RecordingConn()
+    result = store.upsert_embeddings(["a", "b"], np.zeros((1, 4)))
+    assert "ERROR" in str(result)
+
+
+def test_vector_store_reconnects_dropped_connection(monkeypatch):
+    store = VectorStore()
+    dropped = RecordingConn()
+    dropped.closed = 2
+    store.conn = dropped
+    store.pool_max = 1
+    store.dimension = 4
+    store._last_connect_failure = None
+    fresh = RecordingConn()
+    fresh.closed = 0
+    monkeypatch.setattr(store, "_connect", lambda: fresh)
+    store.upsert_embeddings(["a"], np.zeros((1, 4)))
+    assert store.conn is fresh
+    assert any("INSERT INTO" in sql for sql, _ in fresh.cur.statements)
+
+
+def test_vector_store_reconnect_is_rate_limited():
+    store = VectorStore()
+    # Initial connection failed moments ago; the next call must not retry yet.
+    store.conn = None
+    store.reconnect_interval = 60
+    store._last_connect_failure = time.monotonic()
+    assert "ERROR" in str(store.query(np.zeros(4), top_k=1))
+
+
+class FakePool:
+    def __init__(self, conns):
+        self.conns = list(conns)
+        self.returned = []
+
+    def getconn(self):
+        return self.conns.pop(0)
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+def test_vector_store_pool_checkout_discards_dead_connections():
+    import psycopg2
+
+    class DeadCursor(RecordingCursor):
+        def execute(self, sql, params=None):
+            raise psycopg2.OperationalError("server closed the connection")
+
+    store = VectorStore(dimension=4)
+    dead = RecordingConn()
+    dead.closed = 0
+    dead.cur = DeadCursor()
+    healthy = RecordingConn()
+    healthy.closed = 0
+    healthy.rollback = lambda: None
+    healthy.cur.fetchall = lambda: [("alert", None)]
+    store.pool = FakePool([dead, healthy])
+    store.pool_max = 2
+    results = store.query(np.zeros(4), top_k=1)
+    assert results == [("alert", None)]
+    assert store.pool.returned == [(dead, True), (healthy, False)]
+
+
+def test_vector_store_query_many_preserves_order():
+    store = VectorStore()
+    store.pool_max = 4
+    store.query = lambda q, top_k=5, filters=None: [(str(int(q[0])), None)]
+    queries = np.arange(8, dtype=np.float32).reshape(8, 1)
+    results = store.query_many(queries, top_k=1)
+    assert [r[0][0] for r in results] == [str(i) for i in range(8)]
+
+
+def test_vector_store_single_connection_is_not_shared_across_threads():
+    import threading
+
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    store.conn.closed = 0
+    active, overlaps = [], []
+
+    def fetchall():
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.01)
+        active.pop()
+        return [("alert", None)]
+
+    store.conn.cur.fetchall = fetchall
+    results = store.query_many(np.zeros((4, 4)), top_k=1, max_workers=4)
+    assert results == [[("alert", None)]] * 4
+    threads = [
+        threading.Thread(target=store.query, args=(np.zeros(4),)) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1
+
+
+def test_vector_store_single_connection_rolls_back_failed_statement():
+    import psycopg2
+
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    store.conn.closed = 0
+    rollbacks = []
+    store.conn.rollback = lambda: rollbacks.append(1)
+
+    def failing_fetchall():
+        raise psycopg2.ProgrammingError("relation does not exist")
+
+    store.conn.cur.fetchall = failing_fetchall
+    assert "ERROR" in store.query(np.zeros(4))
+    assert "ERROR" in store.lexical_query("alert")
+    assert len(rollbacks) == 2
+    store.conn.cur.fetchall = lambda: [("alert", None)]
+    assert store.query(np.zeros(4)) == [("alert", None)]
+
+
+def test_async_vector_store_query_many():
+    import asyncio
+    from ai_core.vector_store import AsyncVectorStore
+
+    store = VectorStore()
+    store.query = lambda q, top_k=5, filters=None: [("hit", float(q[0]))]
+    async_store = AsyncVectorStore(store=store)
+
+    async def run():
+        try:
+            return await async_store.query_many(np.ones((3, 1)), top_k=1)
+        finally:
+            async_store._executor.shutdown(wait=False)
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert results[0] == [("hit", 1.0)]
+
+
+def test_vector_store_index_ddl_from_config():
+    store = VectorStore(
+        config={
+            "index_type": "hnsw",
+            "metric": "cosine",
+            "hnsw_m": 24,
+            "hnsw_ef_construction": 128,
+        }
+    )
+    ddl = store._index_ddl(if_not_exists=True)
+    assert "USING hnsw (embedding vector_cosine_ops)" in ddl
+    assert "m = 24, ef_construction = 128" in ddl
+    store.index_type = "ivfflat"
+    store.metric = "ip"
+    store.ivf_lists = 50
+    ddl = store._index_ddl(concurrently=True)
+    assert ddl.startswith("CREATE INDEX CONCURRENTLY")
+    assert "USING ivfflat (embedding vector_ip_ops) WITH (lists = 50)" in ddl
+
+
+def test_vector_store_query_applies_metric_and_search_knobs():
+    store = VectorStore(config={"index_type": "hnsw", "metric": "l2"}, dimension=4)
+    store.conn = RecordingConn()
+    store.conn.cur.fetchall = lambda: [("alert", None)]
+    store.query(np.zeros(4), top_k=3, ef_search=100)
+    statements = store.conn.cur.statements
+    assert statements[0] == ("SET LOCAL hnsw.ef_search = %s", (100,))
+    sql, params = statements[1]
+    assert "ORDER BY embedding <-> %s::vector" in sql
+    assert params == ("[0,0,0,0]", 3)
+
+
+def test_vector_store_build_index_rebuild():
+    store = VectorStore(
+        config={"index_type": "ivfflat", "metric": "cosine"}, dimension=4
+    )
+    store.conn = RecordingConn()
+    store.conn.autocommit = False
+    store.conn.closed = 0
+    result = store.build_index(rebuild=True)
+    assert result["index"] == store.index_name
+    sqls = [sql for sql, _ in store.conn.cur.statements]
+    assert sqls[0].startswith("DROP INDEX IF EXISTS")
+    assert "USING ivfflat" in sqls[1]
+    assert store.conn.autocommit is False
+
+
+def test_vector_store_upsert_promotes_metadata_columns():
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    metadata = [
+        {
+            "source": "alerts",
+            "timestamp": "2025-01-02T03:04:05Z",
+            "severity": "high",
+            "rule": "ssh-bruteforce",
+        }
+    ]
+    store.upsert_embeddings(["alert"], np.ones((1, 4)), metadata=metadata)
+    sql, params = store.conn.cur.statements[0]
+    assert "%s::jsonb" in sql
+    assert params[5] == "alerts"
+    assert params[6].year == 2025 and params[6].tzinfo is not None
+    assert params[7] == 3
+    assert '"rule": "ssh-bruteforce"' in params[8]
+
+
+def test_vector_store_copy_payload_with_metadata():
+    store = VectorStore()
+    store.conn = RecordingConn()
+    store.upsert_embeddings(
+        ["flow"],
+        np.ones((1, 2)),
+        metadata=[{"source": "network_flows", "severity": 1}],
+        mode="copy",
+    )
+    _, payload = store.conn.cur.copied[0]
+    assert b"network_flows" in payload
+    assert b"\x01{" in payload
+
+
+def test_vector_store_filtered_query_prefilter_plan():
+    store = VectorStore(
+        config={"metric": "cosine", "filter_strategy": "auto"}, dimension=4
+    )
+    store.conn = RecordingConn()
+    store.conn.cur.fetchone = lambda: (12,)
+    store.conn.cur.fetchall = lambda: [("alert", None)]
+    results = store.query(
+        np.zeros(4),
+        top_k=2,
+        filters={"source": ["alerts", "vuln_scans"], "min_severity": "high"},
+    )
+    assert results == [("alert", None)]
+    statements = store.conn.cur.statements
+    count_sql, count_params = statements[1]
+    assert "source = ANY(%s) AND severity >= %s" in count_sql
+    assert count_params[:2] == [["alerts", "vuln_scans"], 3]
+    sql, params = statements[2]
+    assert sql.startswith("WITH candidates AS MATERIALIZED")
+    assert params[-2:] == ["[0,0,0,0]", 2]
+
+
+def test_vector_store_filtered_query_iterative_plan():
+    store = VectorStore(
+        config={"index_type": "hnsw", "filter_strategy": "iterative"}, dimension=4
+    )
+    store.conn = RecordingConn()
+    store.conn.cur.fetchall = lambda: []
+    store.query(np.zeros(4), filters={"metadata": {"rule": "ssh-bruteforce"}})
+    sqls = [sql for sql, _ in store.conn.cur.statements]
+    assert "SET LOCAL hnsw.iterative_scan = %s" in sqls
+    assert "WHERE metadata @> %s::jsonb ORDER BY" in sqls[-1]
+
+
+def test_vector_store_rejects_unknown_filters():
+    store = VectorStore()
+    store.conn = RecordingConn()
+    assert "ERROR" in str(store.query(np.zeros(4), filters={"colour": "red"}))
+
+
+def test_vector_store_lexical_query_uses_tsvector_or_query():
+    store = VectorStore(dimension=4)
+    store.conn = RecordingConn()
+    store.conn.cur.fetchall = lambda: [("CVE-2024-3094 in xz", None)]
+    results = store.lexical_query(
+        "CVE-2024-3094 10.0.0.12", top_k=3, filters={"source": "vuln_scans"}
+    )
+    assert results == [("CVE-2024-3094 in xz", None)]
+    sql, params = store.conn.cur.statements[-1]
+    assert "replace(plainto_tsquery('simple', %s)::text, '&', '|')" in sql
+    assert "t.tsv @@ q AND source = %s" in sql
+    assert params == ["CVE-2024-3094 10.0.0.12", "vuln_scans", 3]
+
+
+def test_vector_store_hybrid_query_fuses_with_rrf(monkeypatch):
+    store = VectorStore()
+    store.conn = RecordingConn()
+
+    def rows(*pairs):
+        return [
+            {"id": i, "text": t, "embedding": None, "doc_id": "", "chunk_index": 0}
+            for i, t in pairs
+        ]
+
+    monkeypatch.setattr(
+        store, "query_rows", lambda q, top_k=5, filters=None: rows((1, "a"), (2, "b"))
+    )
+    monkeypatch.setattr(
+        store,
+        "lexical_rows",
+        lambda q, top_k=5, filters=None: rows((3, "c"), (2, "b")),
+    )
+    hybrid = store.hybrid_query("CVE-2024-3094", np.zeros(4), top_k=2)
+    assert [text for text, _ in hybrid["results"]] == ["b", "a"]
+    assert [row["id"] for row in hybrid["rows"]] == [2, 1]
+    assert hybrid["scores"][0] == pytest.approx(1 / 62 + 1 / 62)
+    assert set(hybrid["timings"]) == {"dense_ms", "lexical_ms", "fusion_ms", "total_ms"}
+
+
+def test_vector_store_query_rows_select_ids_and_parse_vectors():
+    store = VectorStore()
+    store.conn = RecordingConn()
+    store.conn.cur.fetchall = lambda: [
+        (7, "dup line", "[1,2]", "doc1", 3, {"source": "cloudtrail"})
+    ]
+    store.conn.cur.fetchone = lambda: (1,)  # filter_strategy auto -> prefilter
+    rows = store.query_rows(np.zeros(2), top_k=1, filters={"source": "cloudtrail"})
+    assert rows[0]["id"] == 7 and rows[0]["metadata"] == {"source": "cloudtrail"}
+    assert rows[0]["embedding"].tolist() == [1.0, 2.0]
+    sql, _ = store.conn.cur.statements[-1]
+    assert "SELECT t.id, t.text, t.embedding, t.doc_id" in sql
+    assert store.lexical_rows("dup", top_k=1)[0]["doc_id"] == "doc1"
+
+
+def test_vector_store_quantized_storage_modes():
+    store = VectorStore(
+        config={"storage_mode": "float16", "metric": "cosine", "dimension": 4}
+    )
+    assert "USING hnsw ((embedding::halfvec(4)) halfvec_cosine_ops)" in (
+        store._index_ddl()
+    )
+    assert store.index_name.endswith("_cosine_float16_idx")
+    store.storage_mode = "binary"
+    store.rerank_factor = 5
+    assert "(binary_quantize(embedding)::bit(4)) bit_hamming_ops" in store._index_ddl()
+    sql, params = store._ann_query("text, embedding", "[0,0,0,1]", 3)
+    assert "binary_quantize(embedding)::bit(4) <~> binary_quantize(%s::vector)" in sql
+    assert sql.endswith("candidates ORDER BY embedding <=> %s::vector LIMIT %s")
+    assert params == ("[0,0,0,1]", 15, "[0,0,0,1]", 3)
+    # int8/PQ codes have no pgvector type.
+    assert VectorStore(config={"storage_mode": "pq"}).storage_mode == "float32"